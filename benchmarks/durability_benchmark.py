@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from clinic.dao import persistence
+
+# times rewriting a patients file and appending journal lines in each durability mode
+# python benchmarks/durability_benchmark.py [writes]
+
+def benchmark(durability, writes, directory):
+
+    snapshot = os.path.join(directory, durability + '.json')
+    journal = os.path.join(directory, durability + '.journal')
+    data = b'x' * 64 * 1024
+    line = b'{"op": "delete", "PHN": 9790012000}\n'
+
+    start = time.perf_counter()
+    for i in range(writes):
+        persistence.write_file(snapshot, data, durability)
+    rewrite_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(writes):
+        persistence.append_file(journal, line, durability)
+    persistence.sync()
+    append_time = time.perf_counter() - start
+
+    print('%-8s  rewrite 64 KB: %8.3f ms   append line: %8.3f ms' % (durability, rewrite_time / writes * 1000, append_time / writes * 1000))
+
+
+def main():
+
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory(dir='.') as directory:
+        for durability in persistence.DURABILITY_MODES:
+            benchmark(durability, writes, directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from clinic.patient import Patient
+from clinic.dao.patient_dao_json import PatientDAOJSON
+
+# compares retrieving patients by name through the trigram index and by scanning every patient
+# python benchmarks/name_search_benchmark.py [patients]
+
+FIRST_NAMES = "John Mary Joe Ann Elizabeth Robert Linda Michael Susan David Karen James Nancy Daniel Lisa".split()
+LAST_NAMES = "Doe Smith Hancock Brown Wilson Taylor Anderson Thomas Martin Thompson Garcia Clark Lewis Walker".split()
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    generator = random.Random(1)
+
+    dao = PatientDAOJSON(False, file=os.devnull)
+    for i in range(count):
+        PHN = 9000000000 + i
+        name = '%s %s %s%d' % (generator.choice(FIRST_NAMES), generator.choice(LAST_NAMES), generator.choice(LAST_NAMES), i)
+        dao.patients[PHN] = Patient(PHN, name, "1980-03-03", "250 301 6060", "patient%d@gmail.com" % i, "500 Fairfield Rd, Victoria")
+
+    start = time.perf_counter()
+    dao.retrieve_patients('Hancock')
+    print('%d patients, index built in %.1f s' % (count, time.perf_counter() - start))
+
+    for name in ['Smith', 'John Doe', dao.patients[9000000000 + generator.randrange(count)].name, 'Mary Lewis Clark', 'Zelda', 'Jo']:
+        start = time.perf_counter()
+        found = dao.retrieve_patients(name)
+        index_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scanned = [patient for patient in dao.patients.values() if name in patient.name]
+        scan_time = time.perf_counter() - start
+
+        assert found == scanned
+        print('%-28r %7d found   index %9.3f ms   scan %9.3f ms' % (name, len(found), index_time * 1000, scan_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from clinic.note import Note
+from clinic.dao.note_codec import encode_notes, decode_notes
+
+# compares the size and the encode and decode times of a chart saved with pickle and with the note codec
+# python benchmarks/note_codec_benchmark.py [notes]
+
+PHRASES = [
+    "Patient comes with headache and high blood pressure.",
+    "Patient complains of a strong headache on the back of neck.",
+    "Patient says high BP is controlled, 120x80 in general.",
+    "Prescribed metformin 500 mg twice a day, follow up in three months.",
+]
+
+def timed(function, repeat=5):
+
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return result, best
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    notes = {code: Note(code, PHRASES[code % len(PHRASES)] + " Visit %d." % code) for code in range(1, count + 1)}
+
+    pickled, pickle_encode = timed(lambda: pickle.dumps(notes))
+    encoded, codec_encode = timed(lambda: encode_notes(notes, count))
+    unpickled, pickle_decode = timed(lambda: pickle.loads(pickled))
+    decoded, codec_decode = timed(lambda: decode_notes(encoded))
+    assert list(decoded[0].values()) == list(unpickled.values())
+
+    print('%d notes' % count)
+    print('pickle  %9d bytes   encode %8.2f ms   decode %8.2f ms' % (len(pickled), pickle_encode * 1000, pickle_decode * 1000))
+    print('codec   %9d bytes   encode %8.2f ms   decode %8.2f ms' % (len(encoded), codec_encode * 1000, codec_decode * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from clinic.note import Note
+from clinic.dao.note_codec import encode_notes, decode_notes
+from clinic.dao.note_compression import DEFAULT_DICTIONARY, train_dictionary, dictionaries
+
+# compares the size of a chart with plain, default dictionary and trained dictionary
+# compression, and the time to decompress one note
+# python benchmarks/note_compression_benchmark.py [notes]
+
+COMPLAINTS = ["headache", "chest pain", "shortness of breath", "back pain", "dizziness", "fever and cough"]
+MEDICINES = ["metformin", "lisinopril", "amlodipine", "atorvastatin", "ibuprofen", "warfarin"]
+
+def make_text(generator):
+
+    return (
+        "Patient complains of %s for the last %d days. BP %d/%d mmHg, HR %d bpm. "
+        "Prescribed %s %d mg twice a day, follow up in two weeks."
+        % (generator.choice(COMPLAINTS), generator.randint(1, 14), generator.randint(100, 160),
+           generator.randint(60, 100), generator.randint(55, 110), generator.choice(MEDICINES),
+           generator.choice([5, 10, 20, 250, 500]))
+    )
+
+
+def measure(name, notes, dictionary):
+
+    data = encode_notes(notes, len(notes), dictionary)
+
+    start = time.perf_counter()
+    decoded = decode_notes(data)[0]
+    decode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for note in decoded.values():
+        note.text
+    read_time = time.perf_counter() - start
+
+    print('%-18s %9d bytes   decode chart %7.2f ms   read every text %7.2f ms (%.2f us per note)'
+          % (name, len(data), decode_time * 1000, read_time * 1000, read_time / len(notes) * 1000000))
+    return len(data)
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    generator = random.Random(1)
+    notes = {code: Note(code, make_text(generator)) for code in range(1, count + 1)}
+
+    trained = train_dictionary(make_text(generator) for i in range(2000))
+    dictionaries[zlib.adler32(trained)] = trained
+
+    print('%d notes' % count)
+    plain = measure('plain', notes, None)
+    default = measure('default dictionary', notes, DEFAULT_DICTIONARY)
+    clinic = measure('trained dictionary', notes, trained)
+    print('ratio: default dictionary %.1fx, trained dictionary %.1fx' % (plain / default, plain / clinic))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+
+# compares searching a chart through the note indexes and by scanning every note
+# python benchmarks/note_search_benchmark.py [notes]
+
+WORDS = ("patient headache pressure blood fever cough metformin lisinopril warfarin insulin "
+         "controlled improvement dizziness nausea prescribed referred follow visit weeks months").split()
+SEARCHES = ["warfarin", "blood pressure", "metfor", "ache", "Visit 4321.", "anticoagulant"]
+PATTERNS = [r"metfor\w*", r"(warfarin|insulin) \w+ rare\d+", r"Visit 43\d\.", r"rare\d+7\.", r"\d+"]
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    generator = random.Random(1)
+
+    dao = NoteDAOPickle(9790012000)
+    for i in range(count):
+        words = [generator.choice(WORDS) for j in range(12)]
+        words.append('rare%d' % generator.randrange(count))
+        dao.create_note(' '.join(words).capitalize() + '. Visit %d.' % i)
+
+    start = time.perf_counter()
+    dao.retrieve_notes('warfarin')
+    print('%d notes, index built in %.1f ms' % (count, (time.perf_counter() - start) * 1000))
+
+    for search_string in SEARCHES + ['rare%d' % generator.randrange(count)]:
+        start = time.perf_counter()
+        found = dao.retrieve_notes(search_string)
+        index_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scanned = [note for note in dao.notes.values() if search_string in note.text]
+        scan_time = time.perf_counter() - start
+
+        assert found == scanned
+        print('%-16r %7d found   index %8.3f ms   scan %8.3f ms' % (search_string, len(found), index_time * 1000, scan_time * 1000))
+
+    start = time.perf_counter()
+    dao.retrieve_notes('warfarin', regex=True)
+    print('trigram index built in %.1f ms' % ((time.perf_counter() - start) * 1000))
+
+    for pattern in PATTERNS:
+        start = time.perf_counter()
+        found = dao.retrieve_notes(pattern, regex=True)
+        index_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expression = re.compile(pattern)
+        scanned = [note for note in dao.notes.values() if expression.search(note.text)]
+        scan_time = time.perf_counter() - start
+
+        assert found == scanned
+        print('%-32r %7d found   index %8.3f ms   scan %8.3f ms' % (pattern, len(found), index_time * 1000, scan_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
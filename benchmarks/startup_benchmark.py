@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from clinic.patient import Patient
+from clinic.dao.patient_dao_json import PatientDAOJSON
+
+# times loading PatientDAOJSON from patients.json and from its binary snapshot
+# python benchmarks/startup_benchmark.py [patients ...]
+
+def benchmark(count, directory):
+
+    file = os.path.join(directory, 'patients-%d.json' % count)
+
+    dao = PatientDAOJSON(False, file=file)
+    for i in range(count):
+        PHN = 9000000000 + i
+        dao.patients[PHN] = Patient(PHN, "Patient %d" % i, "1980-03-03", "250 301 6060", "patient%d@gmail.com" % i, "500 Fairfield Rd, Victoria")
+    dao.save_patients()
+
+    start = time.perf_counter()
+    snapshot_dao = PatientDAOJSON(True, file=file)
+    snapshot_time = time.perf_counter() - start
+
+    os.remove(dao.snapshot_file)
+    start = time.perf_counter()
+    json_dao = PatientDAOJSON(True, file=file)
+    json_time = time.perf_counter() - start
+
+    assert len(snapshot_dao.patients) == len(json_dao.patients) == count
+    print('%9d patients   json: %8.3f s   snapshot: %8.3f s   %5.1fx faster' % (count, json_time, snapshot_time, json_time / snapshot_time))
+
+
+def main():
+
+    counts = [int(count) for count in sys.argv[1:]] or [10000, 100000, 1000000]
+    with tempfile.TemporaryDirectory(dir='.') as directory:
+        for count in counts:
+            benchmark(count, directory)
+
+
+if __name__ == '__main__':
+    main()
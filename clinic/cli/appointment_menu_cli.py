@@ -126,11 +126,12 @@ class AppointmentMenuCLI():
     def list_full_patient_record(self):
         print('LIST FULL PATIENT RECORD:\n')
         try:
-            notes = self.controller.list_notes()
-            if notes:
-                for note in notes:
-                    self.print_note_data(note)
-            else:
+            # notes are printed as they are read, without making a list of the whole record
+            empty = True
+            for note in self.controller.iter_notes():
+                self.print_note_data(note)
+                empty = False
+            if empty:
                 print('\nPatient record is empty.\n')
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
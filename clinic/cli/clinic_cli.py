@@ -7,10 +7,18 @@ from getpass import getpass
 class ClinicCLI():
 
 	def __init__(self):
-		self.controller = Controller(autosave=True)
+		self.load_percent = None
+		self.controller = Controller(autosave=True, progress=self.print_load_progress)
 		self.main_menu_cli = MainMenuCLI(self.controller)
 		self.login_menu()
 
+	def print_load_progress(self, count, fraction):
+		# only print when the percentage changes, printing every patient would slow loading down
+		percent = int(fraction * 100)
+		if percent != self.load_percent:
+			self.load_percent = percent
+			print('\rLoading patients: %d (%d%%)' % (count, percent), end='\n' if percent == 100 else '', flush=True)
+
 	def login_menu(self):
 		while True:
 			self.print_login_menu()
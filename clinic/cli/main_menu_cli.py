@@ -1,3 +1,8 @@
+try:
+    import readline
+except ImportError:
+    # not available on Windows, names are then typed without completion
+    readline = None
 from clinic.controller import Controller
 from clinic.exception.invalid_logout_exception import InvalidLogoutException
 from clinic.exception.illegal_access_exception import IllegalAccessException
@@ -104,18 +109,42 @@ class MainMenuCLI():
     def retrieve_patients_by_name(self):
         print('RETRIEVE PATIENTS BY NAME:')
         try:
-            search_string = input('Search for: ')
-            found_patients = self.controller.retrieve_patients(search_string)
-            if found_patients:
-                print('\nPatients found with name %s:\n' % search_string)
-                for patient in found_patients:
-                    print(patient)
-            else:
+            search_string = self.input_name('Search for: ')
+            found = False
+            for patient in self.controller.iter_retrieve_patients(search_string):
+                if not found:
+                    print('\nPatients found with name %s:\n' % search_string)
+                    found = True
+                print(patient)
+            if not found:
                 print('\nNo patients found with name: %s\n' % search_string)
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
 
 
+    def input_name(self, prompt):
+        # the tab key completes the name from the names of the patients
+        if readline is None:
+            return input(prompt)
+        
+        completions = []
+        def complete(text, state):
+            if state == 0:
+                completions[:] = self.controller.complete_patient_names(text)
+            return completions[state] if state < len(completions) else None
+        
+        old_completer = readline.get_completer()
+        old_delimiters = readline.get_completer_delims()
+        readline.set_completer(complete)
+        # the whole line is completed, not only its last word
+        readline.set_completer_delims('')
+        readline.parse_and_bind('tab: complete')
+        try:
+            return input(prompt)
+        finally:
+            readline.set_completer(old_completer)
+            readline.set_completer_delims(old_delimiters)
+
     def update_patient(self):
         print('CHANGE PATIENT DATA:')
         try:
@@ -184,11 +213,12 @@ class MainMenuCLI():
     def list_all_patients(self):
         print('LIST ALL PATIENTS:\n')
         try:
-            patients = self.controller.list_patients()
-            if patients:
-                for patient in patients:
-                    print(patient)
-            else:
+            # patients are printed as they are read, without making a list of every patient
+            empty = True
+            for patient in self.controller.iter_patients():
+                print(patient)
+                empty = False
+            if empty:
                 print('\nNo patients registered in the clinic.\n')
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
@@ -0,0 +1,50 @@
+import os
+
+# storage settings for the clinic, each one can be changed with an environment variable
+
+# where patients are stored, 'json' for clinic/records/patients.json, 'sharded' for
+# shard files next to it, or 'sqlite' for clinic/records/patients.db
+PATIENT_BACKEND = os.environ.get('CLINIC_PATIENT_BACKEND', 'json')
+
+# number of shard files a new sharded patient store is split into
+PATIENT_SHARDS = int(os.environ.get('CLINIC_PATIENT_SHARDS', 16))
+
+# how each patient's notes are stored, 'pickle' for clinic/records/PHN.dat,
+# 'journal' for an append-only clinic/records/PHN.journal, 'pack' for
+# clinic/records/notes.pack shared by every patient, 'binary' for
+# clinic/records/PHN.notes written with the note codec, or 'mapped' for a
+# PHN.notes that is read in place through mmap
+NOTE_BACKEND = os.environ.get('CLINIC_NOTE_BACKEND', 'pickle')
+
+# compress note texts in PHN.notes files (CLINIC_NOTE_BACKEND=binary or mapped) with a preset dictionary
+NOTE_COMPRESSION = os.environ.get('CLINIC_NOTE_COMPRESSION', '0') == '1'
+
+# checksum of a dictionary trained with python -m clinic.dao.note_compression, or empty
+# for the dictionary of common clinical phrases that comes with the clinic
+NOTE_DICTIONARY = os.environ.get('CLINIC_NOTE_DICTIONARY', '')
+
+# append patient changes to clinic/records/patients.journal instead of rewriting patients.json
+PATIENT_JOURNAL = os.environ.get('CLINIC_PATIENT_JOURNAL', '0') == '1'
+
+# size in bytes the patient journal can reach before it is compacted into patients.json
+JOURNAL_COMPACT_BYTES = int(os.environ.get('CLINIC_JOURNAL_COMPACT_BYTES', 1024 * 1024))
+
+# seconds to wait before writing changes on a background thread, so changes made close
+# together are written once, 0 writes every change right away
+FLUSH_DELAY = float(os.environ.get('CLINIC_FLUSH_DELAY', 0))
+
+# number of unsaved changes that makes a delayed write happen right away
+FLUSH_MAX_CHANGES = int(os.environ.get('CLINIC_FLUSH_MAX_CHANGES', 100))
+
+# number of patients whose notes are kept in memory, the notes of the least recently
+# used patient are dropped once there are more, 0 keeps every patient's notes
+RECORD_CACHE_SIZE = int(os.environ.get('CLINIC_RECORD_CACHE_SIZE', 0))
+
+# megabytes of note text kept in memory, 0 for no limit
+RECORD_CACHE_MB = float(os.environ.get('CLINIC_RECORD_CACHE_MB', 0))
+
+# how writes are protected against crashes: 'none', 'commit' or 'batched', see clinic/dao/persistence.py
+DURABILITY = os.environ.get('CLINIC_DURABILITY', 'none')
+
+# seconds between fsyncs in the 'batched' durability mode
+FSYNC_BATCH_INTERVAL = float(os.environ.get('CLINIC_FSYNC_BATCH_INTERVAL', 1.0))
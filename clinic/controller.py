@@ -1,6 +1,15 @@
 import os
+import re
+from calendar import monthrange
+from datetime import date
+from clinic import config
 from .patient import Patient
 from clinic.dao.patient_dao_json import PatientDAOJSON
+from clinic.dao.patient_dao_sqlite import PatientDAOSQLite
+from clinic.dao.patient_dao_sharded import PatientDAOSharded
+from clinic.dao import flush_scheduler
+from clinic.dao.record_cache import get_record_cache
+from clinic.dao.birth_date_index import birth_ordinal
 from .note import Note
 from .patient_record import PatientRecord
 from clinic.exception.invalid_login_exception import InvalidLoginException
@@ -13,9 +22,11 @@ import hashlib
 
 class Controller:
 
-    def __init__(self, autosave=False):
+    def __init__(self, autosave=False, progress=None):
         """
         the controllers constructer with the current user, current patient, a dictionary of users and a dictionary of patients
+
+        progress is called while patients are loaded with the number of patients loaded and the fraction of the file read
         """
         self.autosave = autosave
         self.current_user = None
@@ -32,10 +43,44 @@ class Controller:
         self.logedin = False
         self.have_current_patient = False
 
-        self.patient_dao = PatientDAOJSON(self.autosave)
+        # changes another controller has not written yet are written before loading
+        flush_scheduler.flush_all()
+
+        if config.PATIENT_BACKEND == 'sqlite':
+            self.patient_dao = PatientDAOSQLite(self.autosave)
+        elif config.PATIENT_BACKEND == 'sharded':
+            self.patient_dao = PatientDAOSharded(self.autosave, shards=config.PATIENT_SHARDS, progress=progress, scheduler=flush_scheduler.get_scheduler())
+        else:
+            self.patient_dao = PatientDAOJSON(self.autosave, journal=config.PATIENT_JOURNAL, compact_threshold=config.JOURNAL_COMPACT_BYTES, progress=progress, scheduler=flush_scheduler.get_scheduler())
         
         
         
+    def flush(self):
+        """
+        writes every change that is waiting to be saved
+
+        Returns:
+            True once everything is written
+        """
+
+        flush_scheduler.flush_all()
+        return True
+
+    def get_cache_stats(self):
+        """
+        gets the counters of the cache of patient notes
+
+        Returns:
+            A dictionary with hits, misses, evictions, records and bytes
+            None if every patient's notes stay in memory
+        """
+
+        cache = get_record_cache()
+        if cache is None:
+            return None
+
+        return cache.stats()
+
     def load_users(self):
         
         users = {}
@@ -145,6 +190,96 @@ class Controller:
 
         return self.patient_dao.retrieve_patients(name)
 
+    def iter_retrieve_patients(self, name):
+        """
+        goes through the patients whose name has name in it, without making a list of them
+        
+        Returns:
+            A generator of patients
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        return self.patient_dao.iter_retrieve_patients(name)
+
+    def complete_patient_names(self, prefix, limit=10):
+        """
+        finds the names of patients with a word that starts with prefix, for completing
+        a name as it is typed
+        
+        Returns:
+            A list of at most limit names
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        return self.patient_dao.complete_names(prefix, limit)
+
+    def find_patients_by_phone(self, phone):
+        """
+        finds the patients with a phone number, written with or without spaces,
+        dashes, brackets or the country code
+        
+        Returns:
+            A list of patients
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        return self.patient_dao.find_patients_by_phone(phone)
+
+    def find_patients_by_email(self, email):
+        """
+        finds the patients with an email, in any case
+        
+        Returns:
+            A list of patients
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        return self.patient_dao.find_patients_by_email(email)
+
+    def find_patients_born_between(self, start, end):
+        """
+        finds the patients born from the YYYY-MM-DD date start to the date end, both included
+        
+        Returns:
+            A list of patients from the oldest to the youngest
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        if birth_ordinal(start) is None or birth_ordinal(end) is None:
+            raise IllegalOperationException("Dates Must Be YYYY-MM-DD")
+
+        return self.patient_dao.find_patients_born_between(start, end)
+
+    def find_patients_turning(self, age, year, month):
+        """
+        finds the patients who turn age in a month of a year
+        
+        Returns:
+            A list of patients from the oldest to the youngest
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        birth_year = year - age
+        try:
+            start = date(birth_year, month, 1)
+            end = date(birth_year, month, monthrange(birth_year, month)[1])
+        except (ValueError, OverflowError):
+            raise IllegalOperationException("Invalid Age, Year or Month")
+
+        return self.find_patients_born_between(start.isoformat(), end.isoformat())
+
     def update_patient(self, key, PHN, name, birth_date, phone, email, address):
         """
         Updates a patients PHN, name, birthday, phonem email, and address
@@ -200,6 +335,19 @@ class Controller:
 
         return self.patient_dao.list_patients()
 
+    def iter_patients(self):
+        """
+        Goes through every patient, without making a list of them
+
+        Returns:
+            A generator of patients
+        """
+
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+
+        return self.patient_dao.iter_patients()
+
     def set_current_patient(self, PHN):
         """
         Sets a current patient base on the PHN
@@ -284,9 +432,12 @@ class Controller:
         
         return self.current_patient.search_note(code)
 
-    def retrieve_notes(self, text):
+    def retrieve_notes(self, text, regex=False, wildcard=False):
         """
-        retrieves all notes that have text in the note's text
+        retrieves all notes that have text in the note's text, or with regex,
+        all notes with a match of the regular expression text, like BP \\d+/\\d+,
+        or with wildcard, all notes with text where * is any characters and ? is
+        any one character, like metfor*
         
         Returns:
            A list of Notes
@@ -298,7 +449,27 @@ class Controller:
         if not self.have_current_patient:
             raise NoCurrentPatientException("Current Patient Not Set")
         
-        return  self.current_patient.retrieve_notes(text)
+        try:
+            return self.current_patient.retrieve_notes(text, regex, wildcard)
+        except re.error:
+            raise IllegalOperationException("Invalid Regular Expression")
+
+    def search_all_notes(self, text, limit=20, after=None):
+        """
+        finds the notes of every patient that have text in the note's text, a page at a
+        time, the next page starts after the last hit of the page before
+        
+        Returns:
+            A list of at most limit (PHN, code), ordered by PHN and code
+        """
+        
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+        
+        if limit < 1:
+            raise IllegalOperationException("Limit Must Be At Least 1")
+        
+        return self.patient_dao.search_all_notes(text, limit, after)
 
     def update_note(self, code, text):
         """
@@ -349,3 +520,20 @@ class Controller:
             raise NoCurrentPatientException("Current Patient Not Set")
         
         return self.current_patient.list_notes()
+
+    def iter_notes(self, limit=None, before_code=None):
+        """
+        Goes through the current patient's notes from newest to oldest, a page at a time
+        when limit is given, the code of the last note of a page is the before_code of the next
+
+        Returns:
+            A generator of notes
+        """
+        
+        if not self.logedin:
+            raise IllegalAccessException("Not Logged in")
+        
+        if not self.have_current_patient:
+            raise NoCurrentPatientException("Current Patient Not Set")
+        
+        return self.current_patient.iter_notes(limit, before_code)
@@ -0,0 +1,73 @@
+from bisect import bisect_left, insort
+from datetime import date
+
+def birth_ordinal(birth_date):
+    """
+    turns a YYYY-MM-DD birth date into the number of its day, counting from 0001-01-01
+
+    Returns:
+        The day as an integer
+        None if the birth date is missing or not a date
+    """
+
+    try:
+        return date.fromisoformat(birth_date).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class BirthDateIndex:
+
+    def __init__(self, patients=()):
+        """
+        the birth dates of patients as day numbers in a sorted list, so the patients
+        born between two days are found by binary search, patients are (PHN, patient) pairs
+
+        patients without a valid birth date are left out
+        """
+
+        # (day, number giving the order patients were added, PHN), sorted
+        self.entries = []
+        for PHN, patient in patients:
+            ordinal = birth_ordinal(patient.birth_date)
+            if ordinal is not None:
+                self.entries.append((ordinal, len(self.entries), PHN))
+        # sorted once, adding the patients one at a time would move the list on every insert
+        self.entries.sort()
+        self.next_order = len(self.entries)
+
+    def add(self, PHN, birth_date):
+
+        ordinal = birth_ordinal(birth_date)
+        if ordinal is None:
+            return
+
+        # patients born on the same day stay in the order they were added
+        insort(self.entries, (ordinal, self.next_order, PHN))
+        self.next_order += 1
+
+    def remove(self, PHN, birth_date):
+
+        ordinal = birth_ordinal(birth_date)
+        if ordinal is None:
+            return
+
+        index = bisect_left(self.entries, (ordinal,))
+        while index < len(self.entries) and self.entries[index][0] == ordinal:
+            if self.entries[index][2] == PHN:
+                del self.entries[index]
+                return
+            index += 1
+
+    def between(self, start, end):
+        """
+        finds the patients born from the day start to the day end, both included
+
+        Returns:
+            A list of PHNs from the oldest to the youngest patient
+        """
+
+        first = bisect_left(self.entries, (start,))
+        last = bisect_left(self.entries, (end + 1,))
+
+        return [PHN for ordinal, order, PHN in self.entries[first:last]]
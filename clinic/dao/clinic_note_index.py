@@ -0,0 +1,155 @@
+import threading
+from .note_index import NoteIndex
+
+class ClinicNoteIndex:
+
+    def __init__(self):
+        """
+        a word index over the notes of every patient of a patient DAO, from each
+        term to the notes it is in, so notes can be searched across the clinic
+        without reading every patient's notes
+
+        it is built the first time the clinic is searched, by reading the notes of one
+        patient at a time, after that every watched patient's note DAO tells it about
+        its changes
+
+        notes are known by their note DAO and code, not by PHN, a patient DAO watches
+        a patient again when their PHN changes so their notes are found under the new one
+
+        like the index of one patient's notes, it only narrows down the notes that may
+        have a search string, the notes it finds are still checked
+        """
+
+        # a patient DAO may make the patients it is iterating over while the index is built
+        self.lock = threading.RLock()
+        self.built = False
+        self.reset()
+
+    def reset(self):
+
+        # the keys of the words index are (note DAO, code)
+        self.words = NoteIndex()
+        # note DAO -> PHN of the patient it has the notes of
+        self.patients = {}
+        # note DAO -> codes of the patient's notes
+        self.codes = {}
+        # number of notes dropped while their words are still in the index
+        self.stale = 0
+        self.live = 0
+
+    def build(self, patients):
+        """
+        indexes the notes of every patient, reading them one patient at a time and
+        dropping the ones that were not in memory before
+        """
+
+        with self.lock:
+            if self.built:
+                return
+
+            self.reset()
+            for patient in patients:
+                notes_dao = patient.patient_record.notes_dao
+                notes_dao.clinic_index = self
+                self.patients[notes_dao] = patient.PHN
+                self.codes[notes_dao] = set()
+
+                was_loaded = notes_dao.is_loaded()
+                for note in notes_dao.iter_notes():
+                    self.index_note(notes_dao, note.code, note.text)
+                if not was_loaded:
+                    notes_dao.unload_notes()
+
+            self.built = True
+
+    def watch(self, patient):
+        """
+        starts indexing the changes to the notes of a patient added after the index was built,
+        or finds the notes of a patient under their PHN after it changed
+        """
+
+        with self.lock:
+            if not self.built:
+                # the patient is read when the index is built
+                return
+
+            notes_dao = patient.patient_record.notes_dao
+            notes_dao.clinic_index = self
+            self.patients[notes_dao] = patient.PHN
+            self.codes.setdefault(notes_dao, set())
+
+    def index_note(self, notes_dao, code, text):
+
+        self.words.add((notes_dao, code), text)
+        self.codes[notes_dao].add(code)
+        self.live += 1
+
+    def add(self, notes_dao, code, text):
+
+        with self.lock:
+            if notes_dao in self.codes:
+                self.index_note(notes_dao, code, text)
+
+    def update(self, notes_dao, code, old_text, new_text):
+
+        with self.lock:
+            if notes_dao in self.codes:
+                self.words.remove((notes_dao, code), old_text)
+                self.words.add((notes_dao, code), new_text)
+
+    def remove(self, notes_dao, code, text):
+
+        with self.lock:
+            if notes_dao in self.codes:
+                self.words.remove((notes_dao, code), text)
+                self.codes[notes_dao].discard(code)
+                self.live -= 1
+
+    def drop(self, notes_dao, notes=None):
+        """
+        forgets a deleted patient and every one of their notes, the words of the notes
+        are taken out when their texts are given, otherwise they are left until the
+        index is built again, which happens once there are more of them than live notes
+        """
+
+        with self.lock:
+            codes = self.codes.pop(notes_dao, None)
+            self.patients.pop(notes_dao, None)
+            if codes is None:
+                return
+
+            self.live -= len(codes)
+            if notes is not None:
+                for note in notes:
+                    self.words.remove((notes_dao, note.code), note.text)
+            else:
+                self.stale += len(codes)
+
+            if self.stale > self.live:
+                # the next search reads every patient's notes again
+                self.reset()
+                self.built = False
+
+    def candidates(self, search_string, after=None):
+        """
+        finds the notes that may have search_string in their text
+
+        Returns:
+            A sorted list of (PHN, code, note DAO), only the ones after the (PHN, code) after if it is given
+        """
+
+        with self.lock:
+            keys = self.words.candidates(search_string, enough=0)
+            if keys is None:
+                # a search with no words in it has to check every note
+                keys = [(notes_dao, code) for notes_dao, codes in self.codes.items() for code in codes]
+
+            found = [(self.patients[notes_dao], code, notes_dao) for notes_dao, code in keys
+                     if code in self.codes.get(notes_dao, ())]
+
+        if after is not None:
+            after = tuple(after)
+            found = [hit for hit in found if hit[:2] > after]
+        found.sort(key=lambda hit: hit[:2])
+
+        return found
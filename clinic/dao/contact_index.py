@@ -0,0 +1,77 @@
+import re
+
+def normalize_phone(phone):
+    """
+    turns a phone number into its digits, so 250 203 1010, (250) 203-1010
+    and +1 250 203 1010 are the same number
+
+    Returns:
+        A string of digits, empty if there is no phone number
+    """
+
+    digits = re.sub(r'\D', '', phone or '')
+    # the country code of North American numbers is left out
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+
+    return digits
+
+
+def normalize_email(email):
+    """
+    Returns:
+        The email without surrounding spaces and in lower case, empty if there is no email
+    """
+
+    return (email or '').strip().casefold()
+
+
+class ContactIndex:
+
+    def __init__(self, patients=()):
+        """
+        hash indexes from the normalized phone number and email of patients
+        to their PHNs, patients are (PHN, patient) pairs
+        """
+
+        # normalized phone or email -> PHNs, a dictionary keeps them in the order they were added
+        self.phones = {}
+        self.emails = {}
+
+        for PHN, patient in patients:
+            self.add(PHN, patient)
+
+    def add(self, PHN, patient):
+
+        for index, key in ((self.phones, normalize_phone(patient.phone)), (self.emails, normalize_email(patient.email))):
+            if key:
+                index.setdefault(key, {})[PHN] = None
+
+    def remove(self, PHN, patient):
+        """
+        takes a patient out of the indexes, it must be called before the patient's
+        phone number or email change
+        """
+
+        for index, key in ((self.phones, normalize_phone(patient.phone)), (self.emails, normalize_email(patient.email))):
+            PHNs = index.get(key)
+            if PHNs is not None:
+                PHNs.pop(PHN, None)
+                if not PHNs:
+                    del index[key]
+
+    def find_phone(self, phone):
+        """
+        Returns:
+            A list of the PHNs of the patients with phone as their phone number
+        """
+
+        return list(self.phones.get(normalize_phone(phone), ()))
+
+    def find_email(self, email):
+        """
+        Returns:
+            A list of the PHNs of the patients with email as their email
+        """
+
+        return list(self.emails.get(normalize_email(email), ()))
@@ -0,0 +1,122 @@
+import atexit
+import threading
+import time
+import traceback
+from clinic import config
+
+class FlushScheduler:
+
+    def __init__(self, delay=0.2, max_changes=100):
+        """
+        writes DAOs to disk on a background thread, so many changes made close
+        together are saved with one write instead of one write each
+
+        a DAO is flushed delay seconds after its first unsaved change, or as soon
+        as it has max_changes unsaved changes
+        """
+
+        self.delay = delay
+        self.max_changes = max_changes
+
+        self.condition = threading.Condition()
+        # DAO -> [time it should be flushed at, number of unsaved changes]
+        self.dirty = {}
+        # DAOs the background thread is writing right now
+        self.flushing = set()
+        self.thread = None
+
+        atexit.register(self.flush_all)
+
+    def mark_dirty(self, dao):
+        """
+        records that dao has a change that still has to be flushed
+        """
+
+        with self.condition:
+            if dao not in self.dirty:
+                self.dirty[dao] = [time.monotonic() + self.delay, 0]
+
+            self.dirty[dao][1] += 1
+            if self.dirty[dao][1] >= self.max_changes:
+                self.dirty[dao][0] = time.monotonic()
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='clinic-flush', daemon=True)
+                self.thread.start()
+
+            self.condition.notify()
+
+    def run(self):
+
+        while True:
+            with self.condition:
+                while not self.dirty:
+                    self.condition.wait()
+
+                now = time.monotonic()
+                due = [dao for dao, (flush_time, changes) in self.dirty.items() if flush_time <= now]
+                if not due:
+                    self.condition.wait(min(flush_time for flush_time, changes in self.dirty.values()) - now)
+                    continue
+
+                for dao in due:
+                    del self.dirty[dao]
+                self.flushing.update(due)
+
+            for dao in due:
+                self.flush_dao(dao)
+                with self.condition:
+                    self.flushing.discard(dao)
+
+    def flush_dao(self, dao):
+
+        try:
+            dao.flush()
+        except Exception:
+            # the changes stay in the DAO, so the write is tried again later
+            traceback.print_exc()
+            self.mark_dirty(dao)
+
+    def flush_all(self):
+        """
+        flushes every DAO that has unsaved changes right away
+        """
+
+        with self.condition:
+            # flushing a DAO the background thread is writing waits for that write to finish
+            daos = list(self.dirty) + list(self.flushing)
+            self.dirty.clear()
+
+        for dao in daos:
+            dao.flush()
+
+
+shared_scheduler = None
+
+def get_scheduler():
+    """
+    gets the scheduler shared by every DAO
+
+    Returns:
+        The scheduler if writes are delayed in the configuration
+        None if every change is written right away
+    """
+
+    global shared_scheduler
+
+    if config.FLUSH_DELAY <= 0:
+        return None
+
+    if shared_scheduler is None:
+        shared_scheduler = FlushScheduler(config.FLUSH_DELAY, config.FLUSH_MAX_CHANGES)
+
+    return shared_scheduler
+
+
+def flush_all():
+    """
+    writes every unsaved change of every DAO
+    """
+
+    if shared_scheduler is not None:
+        shared_scheduler.flush_all()
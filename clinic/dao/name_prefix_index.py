@@ -0,0 +1,85 @@
+from bisect import bisect_left, insort
+
+def name_suffixes(name):
+    """
+    gets the parts of a name that start at one of its words, in lower case, so
+    John Doe is found by typing the start of john doe or of doe
+
+    Returns:
+        A set of strings
+    """
+
+    folded = name.casefold()
+    suffixes = set()
+    start = 0
+    for word in folded.split():
+        start = folded.index(word, start)
+        suffixes.add(folded[start:])
+        start += len(word)
+
+    return suffixes
+
+
+class NamePrefixIndex:
+
+    def __init__(self, names=()):
+        """
+        a sorted list of the parts of patient names that start at a word, so the
+        names that start with what has been typed are found by binary search
+        """
+
+        # name -> number of patients with it, a name is listed while a patient has it
+        self.counts = {}
+        for name in names:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+        # (suffix, name), sorted once instead of inserting every name into a sorted list
+        self.entries = sorted((suffix, name) for name in self.counts for suffix in name_suffixes(name))
+
+    def add(self, name):
+
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.counts[name] == 1:
+            for suffix in name_suffixes(name):
+                insort(self.entries, (suffix, name))
+
+    def remove(self, name):
+
+        count = self.counts.get(name)
+        if count is None:
+            return
+
+        if count > 1:
+            self.counts[name] = count - 1
+            return
+
+        del self.counts[name]
+        for suffix in name_suffixes(name):
+            index = bisect_left(self.entries, (suffix, name))
+            if index < len(self.entries) and self.entries[index] == (suffix, name):
+                del self.entries[index]
+
+    def complete(self, prefix, limit=10):
+        """
+        finds the names with a word that starts with prefix, in any case, ordered
+        by the part of the name that matched
+
+        Returns:
+            A list of at most limit names
+        """
+
+        prefix = prefix.casefold().lstrip()
+        if not prefix:
+            return []
+
+        # a name is found again when more than one of its words starts with prefix
+        names = {}
+        index = bisect_left(self.entries, (prefix,))
+        while index < len(self.entries) and len(names) < limit:
+            suffix, name = self.entries[index]
+            if not suffix.startswith(prefix):
+                break
+            names[name] = None
+            index += 1
+
+        return list(names)
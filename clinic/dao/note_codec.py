@@ -0,0 +1,589 @@
+import datetime
+import mmap
+from array import array
+from itertools import accumulate
+import os
+import struct
+import sys
+import zlib
+from pickle import load
+from clinic.note import Note
+from .persistence import write_file, remove_file
+from .note_compression import LazyNote, get_dictionary, get_write_dictionary, compress, decompress
+
+# a notes file is MAGIC and the version, followed by COLUMN_HEADER, the number of notes,
+# the note counter and the length of the columns, then the columns compressed with zlib:
+# the difference of each code from the one before as 64 bit integers, the minutes since
+# 1970 plus one of each timestamp, or 0, and the length in characters of each text, both
+# as 32 bit integers, all little endian. then come the length as a varint and the text of
+# every timestamp with a 0 in its column, and last every text one after the other in UTF-8
+#
+# version 2 files have the adler32 checksum of a compression dictionary after the
+# version, then varints for the number of notes and the note counter, followed by each
+# note as varints for its code, its timestamp and the length of its text, then the text
+# compressed with the dictionary, see clinic/dao/note_compression.py. codes and
+# timestamps are stored as the difference from the note before, so they are usually one
+# byte long. a timestamp is a number of minutes since 1970, stored plus one, or 0
+# followed by the length and the text of a timestamp in another format
+#
+# version 3 files can be read in place, for example through mmap. after the version
+# comes INDEXED_HEADER, the dictionary checksum or 0, the number of notes and the note
+# counter, then a table with a TABLE_ENTRY of code, offset and length for every note
+# in order of code, then the notes. a note is its timestamp as a varint, minutes since
+# 1970 plus one or 0 followed by the length and text of the timestamp, then its text
+MAGIC = b'CNOT'
+VERSION = 1
+COMPRESSED_VERSION = 2
+INDEXED_VERSION = 3
+DICTIONARY_CHECKSUM = struct.Struct('<I')
+INDEXED_HEADER = struct.Struct('<IIQ')
+TABLE_ENTRY = struct.Struct('<qQI')
+COLUMN_HEADER = struct.Struct('<IQI')
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+MONTH_NUMBERS = {month: number for number, month in enumerate(MONTHS, 1)}
+EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+def write_varint(out, value):
+
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, position):
+    """
+    Returns:
+        The value and the position after it
+    """
+
+    byte = data[position]
+    if byte < 0x80:
+        return byte, position + 1
+
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def format_timestamp(minutes):
+
+    days, minutes = divmod(minutes, 24 * 60)
+    date = datetime.date.fromordinal(EPOCH + days)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}, {date.day:02d}, {MONTHS[date.month - 1]}, {date.year}"
+
+
+def parse_timestamp(timestamp):
+    """
+    turns a timestamp like '09:30, 05, March, 2024' into minutes since 1970
+
+    Returns:
+        The minutes
+        None if the timestamp is not in that format
+    """
+
+    try:
+        time, day, month, year = timestamp.split(', ')
+        hours, minutes = time.split(':')
+        days = datetime.date(int(year), MONTH_NUMBERS[month], int(day)).toordinal() - EPOCH
+        value = days * 24 * 60 + int(hours) * 60 + int(minutes)
+    except (ValueError, KeyError):
+        return None
+
+    # only timestamps that come back exactly the same are stored as numbers
+    if value < 0 or format_timestamp(value) != timestamp:
+        return None
+
+    return value
+
+
+def zigzag(value):
+
+    # small negative numbers become small positive ones, so they stay one byte long
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+
+    return (value >> 1) ^ -(value & 1)
+
+
+def encode_notes(notes, autocounter, dictionary=None):
+    """
+    encodes notes, a dictionary of code to Note, and the note counter, the
+    texts are compressed when a dictionary is given
+
+    Returns:
+        The encoded notes as bytes
+    """
+
+    if dictionary is None:
+        return encode_columns(notes, autocounter)
+
+    out = bytearray(MAGIC)
+    out.append(COMPRESSED_VERSION)
+    out += DICTIONARY_CHECKSUM.pack(zlib.adler32(dictionary))
+    write_varint(out, len(notes))
+    write_varint(out, autocounter)
+
+    # notes written close together share their timestamp, so each one is parsed once
+    timestamps = {}
+    previous_code = 0
+    previous_minutes = 0
+    for note in notes.values():
+        write_varint(out, zigzag(note.code - previous_code))
+        previous_code = note.code
+
+        minutes = timestamps.get(note.timestamp, -1)
+        if minutes == -1:
+            minutes = timestamps[note.timestamp] = parse_timestamp(note.timestamp)
+        if minutes is None:
+            out.append(0)
+            timestamp = note.timestamp.encode('utf-8')
+            write_varint(out, len(timestamp))
+            out += timestamp
+        else:
+            write_varint(out, zigzag(minutes - previous_minutes) + 1)
+            previous_minutes = minutes
+
+        if isinstance(note, LazyNote):
+            text = note.compressed_text(dictionary)
+        else:
+            text = compress(note.text, dictionary)
+        write_varint(out, len(text))
+        out += text
+
+    return bytes(out)
+
+
+def little_endian(column):
+
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def encode_columns(notes, autocounter):
+    """
+    encodes notes, a dictionary of code to Note, and the note counter without compression
+
+    Returns:
+        The encoded notes as bytes
+    """
+
+    codes = array('q')
+    stamps = array('I')
+    lengths = array('I')
+    other_timestamps = bytearray()
+
+    # notes written close together share their timestamp, so each one is parsed once
+    timestamps = {}
+    previous_code = 0
+    for note in notes.values():
+        codes.append(note.code - previous_code)
+        previous_code = note.code
+
+        minutes = timestamps.get(note.timestamp, -1)
+        if minutes == -1:
+            minutes = timestamps[note.timestamp] = parse_timestamp(note.timestamp)
+        if minutes is None or minutes + 1 >= 1 << 32:
+            stamps.append(0)
+            timestamp = note.timestamp.encode('utf-8')
+            write_varint(other_timestamps, len(timestamp))
+            other_timestamps += timestamp
+        else:
+            stamps.append(minutes + 1)
+
+        lengths.append(len(note.text))
+
+    columns = zlib.compress(little_endian(codes).tobytes() + little_endian(stamps).tobytes() + little_endian(lengths).tobytes())
+    texts = ''.join(note.text for note in notes.values()).encode('utf-8')
+
+    header = MAGIC + bytes([VERSION]) + COLUMN_HEADER.pack(len(notes), autocounter, len(columns))
+    return b''.join((header, columns, other_timestamps, texts))
+
+
+def decode_columns(data):
+    """
+    decodes notes written by encode_columns
+
+    Returns:
+        A dictionary of code to Note in the order they were saved, and the note counter
+    """
+
+    count, autocounter, columns_length = COLUMN_HEADER.unpack_from(data, len(MAGIC) + 1)
+    position = len(MAGIC) + 1 + COLUMN_HEADER.size
+    columns = zlib.decompress(data[position:position + columns_length])
+    position += columns_length
+
+    codes = little_endian(array('q', columns[:8 * count]))
+    stamps = little_endian(array('I', columns[8 * count:12 * count]))
+    lengths = little_endian(array('I', columns[12 * count:16 * count]))
+
+    other_timestamps = []
+    for i in range(stamps.count(0)):
+        length, position = read_varint(data, position)
+        other_timestamps.append(str(data[position:position + length], 'utf-8'))
+        position += length
+    other_timestamps = iter(other_timestamps)
+
+    # every text is decoded at once and cut at the lengths in characters
+    texts = str(data[position:], 'utf-8')
+
+    notes = {}
+    timestamps = {}
+    new_note = Note.__new__
+    start = 0
+    for code, minutes, end in zip(accumulate(codes), stamps, accumulate(lengths)):
+        if minutes:
+            timestamp = timestamps.get(minutes)
+            if timestamp is None:
+                timestamp = timestamps[minutes] = format_timestamp(minutes - 1)
+        else:
+            timestamp = next(other_timestamps)
+
+        # a decoded note keeps its saved timestamp, so Note.__init__ is not needed to set the time
+        note = notes[code] = new_note(Note)
+        note.code = code
+        note.text = texts[start:end]
+        note.timestamp = timestamp
+        start = end
+
+    return notes, autocounter
+
+
+def decode_notes(data):
+    """
+    decodes notes written by encode_notes
+
+    Returns:
+        A dictionary of code to Note in the order they were saved, and the note counter,
+        the notes of a compressed file are LazyNotes
+    """
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a notes file")
+
+    version = data[len(MAGIC)]
+    position = len(MAGIC) + 1
+    if version == VERSION:
+        return decode_columns(data)
+    elif version == INDEXED_VERSION:
+        table = NoteTable(data)
+        return {note.code: note for note in table.notes()}, table.autocounter
+    elif version != COMPRESSED_VERSION:
+        raise ValueError(f"Unknown notes file version {version}")
+
+    dictionary = get_dictionary(DICTIONARY_CHECKSUM.unpack_from(data, position)[0])
+    position += DICTIONARY_CHECKSUM.size
+
+    count, position = read_varint(data, position)
+    autocounter, position = read_varint(data, position)
+
+    notes = {}
+    timestamps = {}
+    code = 0
+    minutes = 0
+    for i in range(count):
+        # most values are one byte, only longer ones go through read_varint
+        value = data[position]
+        if value < 0x80:
+            position += 1
+        else:
+            value, position = read_varint(data, position)
+        code += (value >> 1) ^ -(value & 1)
+
+        value = data[position]
+        if value < 0x80:
+            position += 1
+        else:
+            value, position = read_varint(data, position)
+        if value:
+            minutes += unzigzag(value - 1)
+            timestamp = timestamps.get(minutes)
+            if timestamp is None:
+                timestamp = timestamps[minutes] = format_timestamp(minutes)
+        else:
+            length, position = read_varint(data, position)
+            timestamp = str(data[position:position + length], 'utf-8')
+            position += length
+
+        length = data[position]
+        if length < 0x80:
+            position += 1
+        else:
+            length, position = read_varint(data, position)
+        notes[code] = LazyNote(code, bytes(data[position:position + length]), timestamp, dictionary)
+        position += length
+
+    return notes, autocounter
+
+
+def encode_timestamp(out, timestamp):
+
+    minutes = parse_timestamp(timestamp)
+    if minutes is None:
+        out.append(0)
+        timestamp = timestamp.encode('utf-8')
+        write_varint(out, len(timestamp))
+        out += timestamp
+    else:
+        write_varint(out, minutes + 1)
+
+
+def encode_indexed_notes(notes, autocounter, dictionary=None):
+    """
+    encodes notes, a dictionary of code to Note, and the note counter in the
+    version that NoteTable reads in place
+
+    Returns:
+        The encoded notes as bytes
+    """
+
+    ordered = sorted(notes.values(), key=lambda note: note.code)
+    checksum = 0 if dictionary is None else zlib.adler32(dictionary)
+
+    records = bytearray()
+    entries = []
+    start = len(MAGIC) + 1 + INDEXED_HEADER.size + TABLE_ENTRY.size * len(ordered)
+    for note in ordered:
+        if isinstance(note, MappedNote) and note.unchanged(dictionary):
+            # a note that was not changed is copied as it is, without decoding it
+            record = note.record()
+        else:
+            record = bytearray()
+            encode_timestamp(record, note.timestamp)
+            if dictionary is None:
+                record += note.text.encode('utf-8')
+            elif isinstance(note, LazyNote):
+                record += note.compressed_text(dictionary)
+            else:
+                record += compress(note.text, dictionary)
+
+        entries.append(TABLE_ENTRY.pack(note.code, start + len(records), len(record)))
+        records += record
+
+    header = MAGIC + bytes([INDEXED_VERSION]) + INDEXED_HEADER.pack(checksum, len(ordered), autocounter)
+    return header + b''.join(entries) + bytes(records)
+
+
+class NoteTable:
+
+    def __init__(self, data):
+        """
+        reads notes in place from data, the bytes or the mmap of a version 3
+        notes file, nothing is decoded until a note is asked for
+        """
+
+        if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != INDEXED_VERSION:
+            raise ValueError("Not an indexed notes file")
+
+        checksum, self.count, self.autocounter = INDEXED_HEADER.unpack_from(data, len(MAGIC) + 1)
+        self.dictionary = get_dictionary(checksum) if checksum else None
+        self.data = data
+        self.table_start = len(MAGIC) + 1 + INDEXED_HEADER.size
+
+    @classmethod
+    def open(cls, path):
+        """
+        maps the notes file at path into memory
+
+        Returns:
+            The table
+            None if the file is not in the indexed version
+        """
+
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC) + 1) != MAGIC + bytes([INDEXED_VERSION]):
+                return None
+            # the mapping stays valid after the file is closed or replaced
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(data)
+
+    def entry(self, index):
+
+        return TABLE_ENTRY.unpack_from(self.data, self.table_start + index * TABLE_ENTRY.size)
+
+    def position(self, code):
+        """
+        finds where code is or would be in the table by binary search
+
+        Returns:
+            The index of the first entry with a code of at least code
+        """
+
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < code:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def find(self, code):
+        """
+        looks for a note by binary search over the table
+
+        Returns:
+            The note
+            None if there is no note with code
+        """
+
+        low = self.position(code)
+        if low < self.count:
+            entry_code, offset, length = self.entry(low)
+            if entry_code == code:
+                return MappedNote(self, entry_code, offset, length)
+
+        return None
+
+    def notes(self):
+        """
+        Returns:
+            A list of every note in order of code
+        """
+
+        return [MappedNote(self, *entry) for entry in TABLE_ENTRY.iter_unpack(
+            self.data[self.table_start:self.table_start + self.count * TABLE_ENTRY.size])]
+
+    def iter_notes(self, limit=None, before_code=None):
+        """
+        goes through the notes from the newest to the oldest, reading only the table
+        entries of the notes that are asked for
+
+        Returns:
+            A generator of notes
+        """
+
+        index = self.count if before_code is None else self.position(before_code)
+        stop = 0 if limit is None else max(index - limit, 0)
+        for index in range(index - 1, stop - 1, -1):
+            yield MappedNote(self, *self.entry(index))
+
+
+class MappedNote(Note):
+
+    def __init__(self, table, code, offset, length):
+        """
+        a view of a note in a NoteTable, its timestamp and text are only decoded
+        the first time they are used
+        """
+
+        self.table = table
+        self.code = code
+        self.offset = offset
+        self.length = length
+        self.plain_text = None
+        self.plain_timestamp = None
+
+    def decode(self):
+
+        data = self.table.data
+        value, position = read_varint(data, self.offset)
+        if value:
+            timestamp = format_timestamp(value - 1)
+        else:
+            length, position = read_varint(data, position)
+            timestamp = str(data[position:position + length], 'utf-8')
+            position += length
+
+        text = data[position:self.offset + self.length]
+        if self.table.dictionary is None:
+            text = str(text, 'utf-8')
+        else:
+            text = decompress(text, self.table.dictionary)
+
+        if self.plain_timestamp is None:
+            self.plain_timestamp = timestamp
+        if self.plain_text is None:
+            self.plain_text = text
+
+    @property
+    def text(self):
+
+        if self.plain_text is None:
+            self.decode()
+        return self.plain_text
+
+    @text.setter
+    def text(self, text):
+
+        self.detach()
+        self.plain_text = text
+
+    @property
+    def timestamp(self):
+
+        if self.plain_timestamp is None:
+            self.decode()
+        return self.plain_timestamp
+
+    @timestamp.setter
+    def timestamp(self, timestamp):
+
+        self.detach()
+        self.plain_timestamp = timestamp
+
+    def detach(self):
+
+        # a changed note is read first, so it no longer needs the table
+        if self.table is not None:
+            if self.plain_text is None or self.plain_timestamp is None:
+                self.decode()
+            self.table = None
+
+    def unchanged(self, dictionary):
+
+        return self.table is not None and self.table.dictionary is dictionary
+
+    def record(self):
+
+        return self.table.data[self.offset:self.offset + self.length]
+
+
+def migrate_directory(directory='clinic/records', remove=False):
+    """
+    writes a notes file next to every pickled notes file in directory that does not have one yet
+
+    Returns:
+        The number of files migrated
+    """
+
+    migrated = 0
+    for name in sorted(os.listdir(directory)):
+        PHN, extension = os.path.splitext(name)
+        if extension != '.dat' or not PHN.isdigit():
+            continue
+
+        pickle_file = os.path.join(directory, name)
+        notes_file = os.path.join(directory, PHN + '.notes')
+        if not os.path.exists(notes_file):
+            with open(pickle_file, 'rb') as file:
+                notes = load(file)
+            write_file(notes_file, encode_notes(notes, max(notes, default=0), get_write_dictionary()))
+            migrated += 1
+
+        if remove:
+            remove_file(pickle_file)
+
+    return migrated
+
+
+if __name__ == '__main__':
+    # python -m clinic.dao.note_codec [directory] [--remove]
+    arguments = [argument for argument in sys.argv[1:] if argument != '--remove']
+    directory = arguments[0] if arguments else 'clinic/records'
+    migrated = migrate_directory(directory, '--remove' in sys.argv)
+    print(f"Migrated {migrated} notes files in {directory}")
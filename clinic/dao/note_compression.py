@@ -0,0 +1,207 @@
+import os
+import re
+import sys
+import zlib
+from collections import Counter
+from pickle import load
+from clinic import config
+from clinic.note import Note
+from .persistence import write_file
+
+# note texts are compressed one by one with raw deflate and a preset dictionary of
+# phrases that are common in clinical notes, so even a short note gets smaller
+#
+# a dictionary is known by its adler32 checksum, which is saved in every compressed
+# notes file, a trained dictionary is kept as clinic/records/notes-CHECKSUM.zdict and
+# is never changed, so files written with an older dictionary can still be read
+DEFAULT_PHRASES = [
+    "mg once a day", "mg twice a day", "mg three times a day", "as needed",
+    "follow up in two weeks", "follow up in one month", "follow up in three months",
+    "blood pressure", "heart rate", "respiratory rate", "temperature", "oxygen saturation",
+    "BP ", "HR ", "RR ", "SpO2 ", "mmHg", "bpm", "kg", "cm",
+    "Patient comes with ", "Patient complains of ", "Patient says ", "Patient reports ",
+    "Patient denies ", "Patient is taking medicines to control ", "Patient was advised to ",
+    "no known allergies", "allergic to ", "history of ", "family history of ",
+    "headache", "fever", "cough", "chest pain", "shortness of breath", "nausea", "dizziness",
+    "back pain", "abdominal pain", "fatigue", "sore throat", "rash", "swelling",
+    "hypertension", "diabetes", "asthma", "depression", "anxiety", "infection",
+    "metformin", "lisinopril", "amlodipine", "atorvastatin", "ibuprofen", "acetaminophen",
+    "amoxicillin", "warfarin", "insulin", "prednisone", "salbutamol", "omeprazole",
+    "Prescribed ", "Referred to ", "Ordered blood work", "lab results", "X-ray", "ultrasound",
+    "is controlled", "is not controlled", "in general", "on the back of neck",
+    "and high blood pressure", "with a strong ", "since last visit", "for the last ",
+    "days", "weeks", "months", "years", "the patient", " and ", " with ", " of the ", ". ",
+]
+DEFAULT_DICTIONARY = ' '.join(DEFAULT_PHRASES).encode('utf-8')
+
+DICTIONARY_DIRECTORY = 'clinic/records'
+
+# checksum -> dictionary, every dictionary read so far
+dictionaries = {zlib.adler32(DEFAULT_DICTIONARY): DEFAULT_DICTIONARY}
+
+def dictionary_file(checksum, directory=None):
+
+    return os.path.join(directory or DICTIONARY_DIRECTORY, 'notes-%08x.zdict' % checksum)
+
+
+def get_dictionary(checksum):
+    """
+    gets the dictionary with an adler32 checksum
+
+    Returns:
+        The dictionary as bytes
+    """
+
+    if checksum not in dictionaries:
+        try:
+            with open(dictionary_file(checksum), 'rb') as file:
+                dictionary = file.read()
+        except FileNotFoundError:
+            raise ValueError("Missing note dictionary %08x" % checksum)
+        if zlib.adler32(dictionary) != checksum:
+            raise ValueError("Note dictionary %08x is damaged" % checksum)
+        dictionaries[checksum] = dictionary
+
+    return dictionaries[checksum]
+
+
+def get_write_dictionary():
+    """
+    gets the dictionary new notes are compressed with
+
+    Returns:
+        The dictionary as bytes
+        None if notes are not compressed in the configuration
+    """
+
+    if not config.NOTE_COMPRESSION:
+        return None
+
+    if not config.NOTE_DICTIONARY:
+        return DEFAULT_DICTIONARY
+
+    return get_dictionary(int(config.NOTE_DICTIONARY, 16))
+
+
+def compress(text, dictionary):
+
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+    return compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+
+def decompress(data, dictionary):
+
+    decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    return str(decompressor.decompress(data) + decompressor.flush(), 'utf-8')
+
+
+class LazyNote(Note):
+
+    def __init__(self, code, compressed, timestamp, dictionary):
+        """
+        a note read from a compressed notes file, its text is only decompressed
+        the first time it is used
+        """
+
+        self.code = code
+        self.timestamp = timestamp
+        self.compressed = compressed
+        self.dictionary = dictionary
+        self.plain_text = None
+
+    @property
+    def text(self):
+
+        if self.plain_text is None:
+            self.plain_text = decompress(self.compressed, self.dictionary)
+        return self.plain_text
+
+    @text.setter
+    def text(self, text):
+
+        # a changed note is compressed again when it is written
+        self.plain_text = text
+        self.compressed = None
+
+    def compressed_text(self, dictionary):
+        """
+        gets the text compressed with dictionary, without decompressing it if it already is
+
+        Returns:
+            The compressed text as bytes
+        """
+
+        if self.compressed is not None and self.dictionary is dictionary:
+            return self.compressed
+
+        return compress(self.text, dictionary)
+
+
+def train_dictionary(texts, size=16 * 1024):
+    """
+    builds a dictionary from the phrases that save the most space in texts
+
+    Returns:
+        The dictionary as bytes, with the most useful phrases at the end
+        where deflate finds them with the shortest distances
+    """
+
+    phrases = Counter()
+    for text in texts:
+        words = re.findall(r'\S+\s*', text)
+        for length in range(1, 5):
+            for start in range(len(words) - length + 1):
+                phrases[''.join(words[start:start + length])] += 1
+
+    # a phrase is worth the bytes it saves, phrases seen once save nothing
+    scored = sorted(
+        ((count * len(phrase), phrase) for phrase, count in phrases.items() if count > 1 and len(phrase) > 3),
+        reverse=True)
+
+    chosen = []
+    total = 0
+    for score, phrase in scored:
+        encoded = phrase.encode('utf-8')
+        if total + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+
+    return b''.join(reversed(chosen)) or DEFAULT_DICTIONARY
+
+
+def read_chart_texts(directory):
+    """
+    reads the text of every note in the pickled and binary notes files of directory
+
+    Returns:
+        A generator of texts
+    """
+
+    # note_codec imports this module, so it is imported here
+    from .note_codec import decode_notes
+
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith('.dat'):
+            with open(path, 'rb') as file:
+                notes = load(file)
+        elif name.endswith('.notes'):
+            with open(path, 'rb') as file:
+                notes = decode_notes(file.read())[0]
+        else:
+            continue
+
+        for note in notes.values():
+            yield note.text
+
+
+if __name__ == '__main__':
+    # python -m clinic.dao.note_compression [directory] [size]
+    directory = sys.argv[1] if len(sys.argv) > 1 else DICTIONARY_DIRECTORY
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16 * 1024
+
+    dictionary = train_dictionary(read_chart_texts(directory), size)
+    checksum = zlib.adler32(dictionary)
+    write_file(dictionary_file(checksum, directory), dictionary)
+    print("Wrote %s, use it with CLINIC_NOTE_COMPRESSION=1 CLINIC_NOTE_DICTIONARY=%08x" % (dictionary_file(checksum, directory), checksum))
@@ -10,7 +10,7 @@ class NoteDAO(ABC):
         pass
     
     @abstractmethod
-    def retrieve_notes(self, search_string):
+    def retrieve_notes(self, search_string, regex=False, wildcard=False):
         pass
     
     @abstractmethod
@@ -25,3 +25,19 @@ class NoteDAO(ABC):
     def list_notes(self):
         pass
     
+    @abstractmethod
+    def iter_notes(self, limit=None, before_code=None):
+        pass
+    
+    @abstractmethod
+    def drop_notes(self):
+        pass
+    
+    @abstractmethod
+    def is_loaded(self):
+        pass
+    
+    @abstractmethod
+    def unload_notes(self):
+        pass
+    
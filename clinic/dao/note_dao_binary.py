@@ -0,0 +1,39 @@
+import os
+from .note_dao_pickle import NoteDAOPickle
+from .note_codec import encode_notes, decode_notes
+from .note_compression import get_write_dictionary
+from .persistence import write_file, remove_file
+
+class NoteDAOBinary(NoteDAOPickle):
+
+    def __init__(self, PHN, autosave=False, scheduler=None, cache=None, records='clinic/records'):
+        """
+        keeps a patient's notes in PHN.notes in the records directory written with the note
+        codec instead of pickle, so the file does not depend on the Note class
+
+        with compression on, note texts are compressed and only decompressed when read
+        """
+
+        super().__init__(PHN, autosave, scheduler, cache, records)
+
+        self.notes_file = os.path.join(records, f'{PHN}.notes')
+
+    def read_notes(self):
+
+        try:
+            with open(self.notes_file, 'rb') as file:
+                self.notes, self.autocounter = decode_notes(file.read())
+        except FileNotFoundError:
+            # notes saved by NoteDAOPickle are moved into a notes file the first time
+            super().read_notes()
+            if self.notes:
+                self.write_changes()
+
+    def write_changes(self):
+
+        write_file(self.notes_file, encode_notes(self.notes, self.autocounter, get_write_dictionary()))
+
+    def remove_notes(self):
+
+        remove_file(self.notes_file)
+        super().remove_notes()
@@ -0,0 +1,104 @@
+import json
+import os
+from .note_dao_pickle import NoteDAOPickle
+from .persistence import write_file, append_file, remove_file, read_journal
+from clinic.note import Note
+
+class NoteDAOJournal(NoteDAOPickle):
+
+    def __init__(self, PHN, autosave=False, scheduler=None, cache=None, records='clinic/records'):
+        """
+        keeps a patient's notes in a journal where every change is one appended
+        line, a create, an update or a tombstone for a deleted note, instead of
+        writing every note again on each change
+
+        the journal is compacted once most of its lines are for notes that were
+        changed again or deleted
+        """
+
+        super().__init__(PHN, autosave, scheduler, cache, records)
+
+        self.journal_file = os.path.join(records, f'{PHN}.journal')
+        self.pending_lines = []
+        # number of lines in the journal, live or not
+        self.journal_lines = 0
+
+    def read_notes(self):
+
+        if os.path.exists(self.journal_file):
+            self.replay_journal()
+        else:
+            # notes saved by NoteDAOPickle are moved into a journal the first time
+            super().read_notes()
+            if self.notes:
+                self.compact()
+
+    def replay_journal(self):
+        """
+        rebuilds the notes from the journal
+        """
+
+        lines = read_journal(self.journal_file)
+
+        for line in lines:
+            try:
+                change = json.loads(line)
+            except json.JSONDecodeError:
+                # a change that was cut off while being written is ignored
+                continue
+
+            if change['op'] in ('create', 'update'):
+                note = Note(change['code'], change['text'])
+                note.timestamp = change['timestamp']
+                self.notes[change['code']] = note
+            elif change['op'] == 'delete':
+                self.notes.pop(change['code'], None)
+
+            # the counter is saved so codes of deleted notes are never given again
+            if change['op'] == 'counter':
+                self.autocounter = max(self.autocounter, change['value'])
+            elif change['op'] == 'create':
+                self.autocounter = max(self.autocounter, change['code'])
+
+        self.journal_lines = len(lines)
+
+    def encode_change(self, change):
+
+        if change['op'] == 'delete':
+            return json.dumps(change) + '\n'
+
+        note = change['note']
+        return json.dumps({'op': change['op'], 'code': note.code, 'text': note.text, 'timestamp': note.timestamp}) + '\n'
+
+    def record_change(self, change):
+
+        self.pending_lines.append(self.encode_change(change))
+
+    def write_changes(self):
+
+        append_file(self.journal_file, ''.join(self.pending_lines).encode('utf-8'))
+        self.journal_lines += len(self.pending_lines)
+        self.pending_lines = []
+
+        if self.journal_lines > 2 * len(self.notes) + 32:
+            self.compact()
+
+    def compact(self):
+        """
+        writes a new journal with the counter and one line per note
+        """
+
+        with self.lock:
+            lines = [json.dumps({'op': 'counter', 'value': self.autocounter}) + '\n']
+            lines.extend(self.encode_change({'op': 'create', 'note': note}) for note in self.notes.values())
+
+            write_file(self.journal_file, ''.join(lines).encode('utf-8'))
+            self.journal_lines = len(lines)
+
+    def remove_notes(self):
+
+        self.pending_lines = []
+        self.journal_lines = 0
+        remove_file(self.journal_file)
+        # a notes file left from before the journal would be moved in again
+        super().remove_notes()
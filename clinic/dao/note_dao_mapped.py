@@ -0,0 +1,147 @@
+import weakref
+from .note_dao_binary import NoteDAOBinary
+from .note_codec import NoteTable, MappedNote, encode_indexed_notes
+from .note_compression import get_write_dictionary
+from .persistence import write_file
+
+class NoteDAOMapped(NoteDAOBinary):
+
+    def __init__(self, PHN, autosave=False, scheduler=None, cache=None, records='clinic/records'):
+        """
+        keeps a patient's notes in PHN.notes in the records directory with a table of where
+        each note is, and reads them through mmap
+
+        until the notes are changed, search_note and list_notes return views into
+        the mapped file, so reading one note only reads the pages it is on
+        """
+
+        super().__init__(PHN, autosave, scheduler, cache, records)
+
+        self.table = None
+        # notes handed out while the notes are not loaded, code -> note, loading the notes
+        # gives the same objects, so a note the caller holds sees the changes made to it
+        self.views = weakref.WeakValueDictionary()
+
+    def open_table(self):
+        """
+        maps the notes file if it has not been mapped yet
+
+        Returns:
+            The table of the notes file
+            None if there is no notes file in the indexed version
+        """
+
+        with self.lock:
+            if self.table is None:
+                try:
+                    self.table = NoteTable.open(self.notes_file)
+                except FileNotFoundError:
+                    return None
+
+            return self.table
+
+    def peek_table(self):
+        """
+        maps the notes file for one read while the notes are not loaded, without
+        keeping the mapping, so going through many patients does not keep a file
+        open for each of them, the file is unmapped once the notes read from it
+        are not used anymore
+
+        Returns:
+            The table of the notes file
+            None if there is no notes file in the indexed version
+        """
+
+        if self.table is not None:
+            return self.table
+
+        try:
+            return NoteTable.open(self.notes_file)
+        except FileNotFoundError:
+            return None
+
+    def read_notes(self):
+
+        table = self.open_table()
+        if table is None:
+            # notes in another version are read whole, and written in the indexed version with the next change
+            super().read_notes()
+            return
+
+        views = self.views
+        self.notes = {}
+        for note in table.notes():
+            self.notes[note.code] = views.get(note.code, note)
+        self.autocounter = table.autocounter
+
+    def view(self, note):
+        """
+        Returns:
+            The note that was handed out before for the code of note, or note
+            None if note is None
+        """
+
+        if note is None:
+            return None
+
+        with self.lock:
+            return self.views.setdefault(note.code, note)
+
+    def write_changes(self):
+
+        data = encode_indexed_notes(self.notes, self.autocounter, get_write_dictionary())
+
+        # the notes read the written bytes from now on, so nothing reads the mapped file
+        # and it is unmapped before it is replaced, which Windows does not allow while mapped
+        self.table = NoteTable(data)
+        for note in self.table.notes():
+            loaded = self.notes[note.code]
+            if isinstance(loaded, MappedNote) and loaded.table is not None:
+                loaded.table = self.table
+                loaded.offset = note.offset
+                loaded.length = note.length
+
+        write_file(self.notes_file, data)
+
+    def unload_notes(self):
+
+        with self.lock:
+            notes = self.notes
+            super().unload_notes()
+            if not self.loaded:
+                self.table = None
+                # notes the caller still holds are handed out again
+                self.views.update(notes)
+
+    def remove_notes(self):
+
+        self.table = None
+        self.views.clear()
+        super().remove_notes()
+
+    def search_note(self, key):
+
+        if not self.loaded and self.autosave:
+            table = self.peek_table()
+            if table is not None:
+                return self.view(table.find(key))
+
+        return super().search_note(key)
+
+    def list_notes(self):
+
+        if not self.loaded and self.autosave:
+            table = self.peek_table()
+            if table is not None:
+                return [self.view(note) for note in reversed(table.notes())]
+
+        return super().list_notes()
+
+    def iter_notes(self, limit=None, before_code=None):
+
+        if not self.loaded and self.autosave:
+            table = self.peek_table()
+            if table is not None:
+                return (self.view(note) for note in table.iter_notes(limit, before_code))
+
+        return super().iter_notes(limit, before_code)
@@ -0,0 +1,53 @@
+import os
+from .note_dao_pickle import NoteDAOPickle
+from .note_pack import get_pack
+from clinic.note import Note
+
+class NoteDAOPack(NoteDAOPickle):
+
+    def __init__(self, PHN, autosave=False, scheduler=None, cache=None, records='clinic/records', pack_file=None):
+        """
+        keeps a patient's notes in the pack shared by every patient instead of
+        a file of their own, each change is appended to the pack
+        """
+
+        super().__init__(PHN, autosave, scheduler, cache, records)
+
+        self.pack_file = pack_file or os.path.join(records, 'notes.pack')
+        self.pending_changes = []
+
+    def read_notes(self):
+
+        pack = get_pack(self.pack_file)
+        for change in pack.read_notes(self.PHN):
+            note = Note(change['code'], change['text'])
+            note.timestamp = change['timestamp']
+            self.notes[note.code] = note
+        self.autocounter = pack.counter(self.PHN)
+
+        if not pack.counter(self.PHN):
+            # notes saved by NoteDAOPickle are moved into the pack the first time
+            super().read_notes()
+            if self.notes:
+                for note in self.notes.values():
+                    self.record_change({'op': 'create', 'note': note})
+                self.write_changes()
+
+    def record_change(self, change):
+
+        if change['op'] == 'delete':
+            self.pending_changes.append({'op': 'delete', 'PHN': self.PHN, 'code': change['code']})
+        else:
+            note = change['note']
+            self.pending_changes.append({'op': change['op'], 'PHN': self.PHN, 'code': note.code, 'text': note.text, 'timestamp': note.timestamp})
+
+    def write_changes(self):
+
+        get_pack(self.pack_file).append(self.pending_changes)
+        self.pending_changes = []
+
+    def remove_notes(self):
+
+        self.pending_changes = []
+        get_pack(self.pack_file).append([{'op': 'drop', 'PHN': self.PHN, 'code': 0}])
+        super().remove_notes()
@@ -1,83 +1,351 @@
 import os
-from pickle import load, dump
+import re
+import threading
+from pickle import load, dumps
 from .note_dao import NoteDAO
+from .persistence import write_file, remove_file
+from .note_index import NoteIndex
+from .note_pattern import required_trigrams, wildcard_pattern
+from .trigram_index import TrigramIndex
 from clinic.note import Note
 
 class NoteDAOPickle(NoteDAO):
     
-    def __init__(self, PHN, autosave=False):
+    def __init__(self, PHN, autosave=False, scheduler=None, cache=None, records='clinic/records'):
         
         self.autosave = autosave
         
+        # with a scheduler, changes are written together on a background thread,
+        # the lock keeps that thread from saving while notes are being changed
+        self.scheduler = scheduler
+        self.lock = threading.RLock()
+        self.dirty = False
+        
         self.autocounter = 0
         self.notes = {}
         self.PHN = PHN
-        self.file = 'clinic/records/' + f'{PHN}.dat'
-        
-        if self.autosave:
-            try:
-                with open(self.file, 'rb') as file:
-                    self.notes = load(file)
-                self.autocounter = len(self.notes)
-            except FileNotFoundError:
-                self.notes = {}
-        else:
+        self.file = os.path.join(records, f'{PHN}.dat')
+        
+        # the notes file is only read the first time the notes are used
+        self.loaded = False
+        
+        # with a cache, the notes are dropped from memory when other patients were used more recently
+        self.cache = cache
+        
+        # the words of the notes, built the first time the notes are searched
+        self.text_index = None
+        # the trigrams of the notes, built the first time the notes are searched with a regular expression
+        self.pattern_index = None
+        
+        # the index of every patient's notes, once the patient DAO has built it, is told about every change
+        self.clinic_index = None
+        
+    def load_notes(self):
+        """
+        reads the notes from disk if they have not been read yet
+        """
+        
+        if self.loaded:
+            if self.cache:
+                self.cache.hit(self)
+            return
+        
+        with self.lock:
+            if self.loaded:
+                return
+            
+            if self.autosave:
+                self.read_notes()
+            
+            self.loaded = True
+        
+        if self.cache:
+            self.cache.loaded(self)
+        
+    def read_notes(self):
+        
+        try:
+            with open(self.file, 'rb') as file:
+                self.notes = load(file)
+            # the counter is not in the file, the newest code is, counting the notes would
+            # give out the code of a note that is still there when an older one was deleted,
+            # notes read again after being dropped from memory keep the counter they had
+            self.autocounter = max(self.autocounter, max(self.notes, default=0))
+        except FileNotFoundError:
+            self.notes = {}
+        
+    def is_loaded(self):
+        
+        return self.loaded
+    
+    def unload_notes(self):
+        """
+        writes the notes and drops them from memory, they are read again the next time they are used,
+        notes that are not saved to disk stay in memory
+        """
+        
+        if not self.autosave:
+            return
+        
+        with self.lock:
+            self.flush()
+            # the counter stays, a pickled notes file does not have it
             self.notes = {}
+            self.text_index = None
+            self.pattern_index = None
+            self.loaded = False
+        
+        if self.cache:
+            self.cache.forget(self)
+        
+    def resize(self, change):
+        """
+        tells the cache the note text grew or shrank by change characters
+        """
+        
+        if self.cache:
+            self.cache.resize(self, change)
+        
+    def save_notes(self, change):
+        """
+        saves a change to the notes, right away or when the scheduler flushes
+        """
+        
+        with self.lock:
+            self.record_change(change)
+            self.dirty = True
+        
+        if self.scheduler:
+            self.scheduler.mark_dirty(self)
+        else:
+            self.flush()
+    
+    def record_change(self, change):
+        """
+        keeps what is needed to write the change at the next flush,
+        nothing here since the whole notes file is written
+        """
+        
+        pass
+    
+    def flush(self):
+        """
+        writes the notes if they have changed since they were last written
+        """
         
+        with self.lock:
+            if not self.dirty:
+                return
+            
+            self.write_changes()
+            self.dirty = False
+    
+    def write_changes(self):
+        
+        write_file(self.file, dumps(self.notes))
         
     def search_note(self, key):
+        self.load_notes()
+        
         if not key in self.notes:
             return None
         
         return self.notes[key]
     
     def create_note(self, text):
+        self.load_notes()
         
-        self.autocounter += 1
-        key = self.autocounter
-        
-        self.notes[key] = Note(key, text)
+        with self.lock:
+            self.autocounter += 1
+            key = self.autocounter
+            
+            note = self.notes[key] = Note(key, text)
+            if self.text_index is not None:
+                self.text_index.add(key, text)
+            if self.pattern_index is not None:
+                self.pattern_index.add(key, text)
+            
+            if self.autosave:
+                self.save_notes({'op': 'create', 'note': note})
         
-        if self.autocounter:
-            with open(self.file, 'wb') as file:
-                dump(self.notes, file)
-                
-        return self.notes[key]
+        if self.clinic_index is not None:
+            self.clinic_index.add(self, key, text)
+        self.resize(len(text))
+        return note
     
-    def retrieve_notes(self, search_string):
+    def retrieve_notes(self, search_string, regex=False, wildcard=False):
+        
+        if regex:
+            return self.match_notes(search_string)
+        if wildcard:
+            return self.match_notes(wildcard_pattern(search_string))
+        
+        self.load_notes()
+        
+        with self.lock:
+            if self.text_index is None:
+                self.text_index = NoteIndex(self.notes.values())
+            
+            # only the notes the index finds are checked, unless the search has no words
+            # in it or most notes would be checked anyway
+            codes = self.text_index.candidates(search_string)
+            if codes is None or len(codes) > len(self.notes) // 2:
+                notes = list(self.notes.values())
+            else:
+                notes = [self.notes[code] for code in sorted(codes)]
+        
         note_list = []
         
-        for note in self.notes.values():
+        for note in notes:
             if search_string in note.text:
                 note_list.append(note)
         
         return note_list
     
+    def match_notes(self, pattern):
+        """
+        retrieves the notes with a match of the regular expression pattern in their text
+        
+        Returns:
+            A list of notes
+        """
+        
+        expression = re.compile(pattern)
+        self.load_notes()
+        
+        with self.lock:
+            if self.pattern_index is None:
+                self.pattern_index = TrigramIndex((note.code, note.text) for note in self.notes.values())
+            
+            # only the notes with every trigram of the strings the pattern needs are checked,
+            # unless the pattern needs no trigram or intersecting the postings and checking
+            # the notes left costs more than checking every note, a note is checked in about
+            # the time ten keys are intersected, and putting a note left in order adds half of that
+            alternatives = required_trigrams(pattern)
+            if alternatives is None or self.prefilter_cost(alternatives) >= len(self.notes):
+                notes = list(self.notes.values())
+            else:
+                codes = set()
+                for wanted in alternatives:
+                    codes.update(self.pattern_index.intersect(wanted))
+                notes = [self.notes[code] for code in sorted(codes)]
+        
+        return [note for note in notes if expression.search(note.text)]
+    
+    def prefilter_cost(self, alternatives):
+        """
+        estimates the cost of finding the notes to check through the pattern index
+        
+        Returns:
+            The cost in notes checked with a regular expression
+        """
+        
+        intersected = sum(self.pattern_index.cost(wanted) for wanted in alternatives)
+        left = sum(self.pattern_index.count(wanted) for wanted in alternatives)
+        
+        return intersected // 10 + left + left // 2
+    
     def update_note(self, key, text):
+        self.load_notes()
+        
         if not key in self.notes:
             return False
         
-        self.notes[key].update_note(text)
-        
-        if self.autosave:
-            with open(self.file, 'wb') as file:
-                dump(self.notes, file)
+        with self.lock:
+            note = self.notes[key]
+            old_text = note.text
+            if self.text_index is not None:
+                self.text_index.remove(key, note.text)
+                self.text_index.add(key, text)
+            if self.pattern_index is not None:
+                self.pattern_index.update(key, note.text, text)
+            note.update_note(text)
+            
+            if self.autosave:
+                self.save_notes({'op': 'update', 'note': note})
         
-        return self.notes[key]
+        if self.clinic_index is not None:
+            self.clinic_index.update(self, key, old_text, text)
+        self.resize(len(text) - len(old_text))
+        return note
     
     def delete_note(self, key):
+        self.load_notes()
         
         if not self.search_note(key):
             return False
         
-        del self.notes[key]
-        
-        if self.autosave:
-            with open(self.file, 'wb') as file:
-                dump(self.notes, file)
+        with self.lock:
+            note = self.notes.pop(key)
+            if self.text_index is not None:
+                self.text_index.remove(key, note.text)
+            if self.pattern_index is not None:
+                self.pattern_index.remove(key, note.text)
+            
+            if self.autosave:
+                self.save_notes({'op': 'delete', 'code': key})
         
+        if self.clinic_index is not None:
+            self.clinic_index.remove(self, key, note.text)
+        self.resize(-len(note.text))
         return True
     
     def list_notes(self):
+        self.load_notes()
+        
+        return list(reversed(self.notes.values()))
+    
+    def iter_notes(self, limit=None, before_code=None):
+        """
+        goes through the notes from the newest to the oldest without copying them,
+        starting below before_code when it is given, and stopping after limit notes
+        
+        Returns:
+            A generator of notes
+        """
+        
+        self.load_notes()
+        
+        # codes only grow, so the newest note is the last one and the
+        # next older note is found by counting the codes down, a cursor
+        # past the newest note starts from the newest note
+        code = next(reversed(self.notes), 0)
+        if before_code is not None:
+            code = min(code, before_code - 1)
+        
+        count = 0
+        while code > 0 and (limit is None or count < limit):
+            note = self.notes.get(code)
+            if note is not None:
+                yield note
+                count += 1
+            code -= 1
+    
+    def drop_notes(self):
+        """
+        deletes every note of the patient at once, without reading or writing them
+        """
+        
+        with self.lock:
+            # notes in memory can be taken out of the clinic index word by word
+            dropped = list(self.notes.values()) if self.loaded else None
+            self.notes = {}
+            self.autocounter = 0
+            self.text_index = None
+            self.pattern_index = None
+            self.loaded = True
+            self.dirty = False
+            
+            if self.autosave:
+                self.remove_notes()
+        
+        if self.clinic_index is not None:
+            self.clinic_index.drop(self, dropped)
+        if self.cache:
+            self.cache.forget(self)
+        
+        return True
+    
+    def remove_notes(self):
         
-        return list(self.notes.values())[::-1]
\ No newline at end of file
+        remove_file(self.file)
\ No newline at end of file
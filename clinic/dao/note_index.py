@@ -0,0 +1,144 @@
+import re
+from bisect import bisect_left, insort
+
+WORD = re.compile(r'\w+')
+
+def terms(text):
+    """
+    splits text into its words, casefolded so a search for any case finds them
+
+    Returns:
+        A set of terms
+    """
+
+    return {word.casefold() for word in WORD.findall(text)}
+
+
+class NoteIndex:
+
+    def __init__(self, notes=()):
+        """
+        an inverted index from each term in the notes of a patient to the codes
+        of the notes it is in, kept up to date as notes change
+
+        it only narrows down the notes that may have a search string, the notes
+        still have to be checked, so searches find exactly what a scan would
+        """
+
+        # term -> set of note codes
+        self.postings = {}
+        for note in notes:
+            for term in terms(note.text):
+                self.postings.setdefault(term, set()).add(note.code)
+
+        # the terms in order, and the terms written backwards in order, so the terms
+        # that start or end with a word are found by binary search
+        self.sorted_terms = sorted(self.postings)
+        self.sorted_reversed_terms = sorted(term[::-1] for term in self.postings)
+        # every term on its own line, for finding the terms a word is in, made when it is needed
+        self.vocabulary = None
+
+    def add(self, code, text):
+
+        for term in terms(text):
+            codes = self.postings.get(term)
+            if codes is None:
+                codes = self.postings[term] = set()
+                insort(self.sorted_terms, term)
+                insort(self.sorted_reversed_terms, term[::-1])
+                self.vocabulary = None
+            codes.add(code)
+
+    def remove(self, code, text):
+
+        for term in terms(text):
+            codes = self.postings.get(term)
+            if codes is None:
+                continue
+            codes.discard(code)
+            if not codes:
+                del self.postings[term]
+                del self.sorted_terms[bisect_left(self.sorted_terms, term)]
+                reversed_term = term[::-1]
+                del self.sorted_reversed_terms[bisect_left(self.sorted_reversed_terms, reversed_term)]
+                self.vocabulary = None
+
+    def terms_starting_with(self, sorted_terms, prefix):
+
+        index = bisect_left(sorted_terms, prefix)
+        while index < len(sorted_terms) and sorted_terms[index].startswith(prefix):
+            yield sorted_terms[index]
+            index += 1
+
+    def terms_containing(self, word):
+
+        if self.vocabulary is None:
+            self.vocabulary = '\n' + '\n'.join(self.sorted_terms) + '\n'
+
+        # the vocabulary is searched in one go, then each find is widened to its line
+        vocabulary = self.vocabulary
+        position = vocabulary.find(word)
+        while position != -1:
+            start = vocabulary.rfind('\n', 0, position) + 1
+            end = vocabulary.find('\n', position)
+            yield vocabulary[start:end]
+            position = vocabulary.find(word, end)
+
+    def term_codes(self, word, starts_word, ends_word):
+        """
+        finds the notes with a term that word can be part of, a word at the start of a
+        search string can be the end of a longer term, and one at the end can be its start
+
+        Returns:
+            A set of codes
+        """
+
+        if starts_word and ends_word:
+            return self.postings.get(word, set())
+
+        if starts_word:
+            found_terms = self.terms_starting_with(self.sorted_terms, word)
+        elif ends_word:
+            found_terms = (reversed_term[::-1] for reversed_term in self.terms_starting_with(self.sorted_reversed_terms, word[::-1]))
+        else:
+            found_terms = self.terms_containing(word)
+
+        codes = set()
+        for term in found_terms:
+            codes |= self.postings[term]
+
+        return codes
+
+    def candidates(self, search_string, enough=16):
+        """
+        finds the notes that may have search_string in their text, stopping once
+        there are no more than enough of them
+
+        Returns:
+            A set of codes
+            None if search_string has no words, so every note has to be checked
+        """
+
+        words = []
+        for match in WORD.finditer(search_string):
+            # a word with a character that is not part of a word next to it in the
+            # search string is a whole term on that side in any text that matches
+            starts_word = match.start() > 0
+            ends_word = match.end() < len(search_string)
+            words.append((match.group().casefold(), starts_word, ends_word))
+
+        if not words:
+            return None
+
+        # whole terms are looked up first, then starts and ends of terms, and
+        # longer words before shorter ones, since they are in fewer notes
+        words.sort(key=lambda word: (-word[1] - word[2], -len(word[0])))
+
+        result = None
+        for word, starts_word, ends_word in words:
+            codes = self.term_codes(word, starts_word, ends_word)
+            result = codes if result is None else result & codes
+            if len(result) <= enough:
+                break
+
+        return result
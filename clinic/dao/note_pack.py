@@ -0,0 +1,263 @@
+import json
+import os
+import struct
+import threading
+from .persistence import write_file, append_file
+
+# the pack file holds the notes of every patient as records that are only ever appended,
+# each one is its length followed by a JSON change like the ones in a note journal
+#
+# the index file has one fixed width entry per record, (op, PHN, code, offset, length),
+# so the notes of one patient can be found without reading the whole pack
+#
+# a drop record deletes every note of a patient, and their counter, at once
+RECORD_LENGTH = struct.Struct('<I')
+ENTRY = struct.Struct('<BqqQI')
+
+OPS = {'create': 1, 'update': 2, 'delete': 3, 'counter': 4, 'drop': 5}
+OP_NAMES = {number: op for op, number in OPS.items()}
+
+class NotePack:
+
+    def __init__(self, pack_file, index_file, compact_bytes=1024 * 1024):
+        """
+        the notes of every patient in one pack file, shared by every NoteDAOPack
+        """
+
+        self.pack_file = pack_file
+        self.index_file = index_file
+        self.compact_bytes = compact_bytes
+        self.lock = threading.RLock()
+
+        # PHN -> {code: (offset, length)} of the latest record of each note
+        self.notes = {}
+        # PHN -> highest note code ever given
+        self.counters = {}
+        self.pack_size = 0
+        self.live_bytes = 0
+        self.reader = None
+
+        self.load_index()
+
+    def apply(self, op, PHN, code, offset, length):
+        """
+        updates the in memory index with one record
+        """
+
+        patient_notes = self.notes.setdefault(PHN, {})
+
+        if op in ('create', 'update'):
+            if code in patient_notes:
+                self.live_bytes -= patient_notes[code][1]
+            patient_notes[code] = (offset, length)
+            self.live_bytes += length
+            if op == 'create':
+                self.counters[PHN] = max(self.counters.get(PHN, 0), code)
+
+        elif op == 'delete':
+            if code in patient_notes:
+                self.live_bytes -= patient_notes.pop(code)[1]
+
+        elif op == 'counter':
+            self.counters[PHN] = max(self.counters.get(PHN, 0), code)
+
+        elif op == 'drop':
+            self.live_bytes -= sum(length for offset, length in self.notes.pop(PHN).values())
+            self.counters.pop(PHN, None)
+
+    def load_index(self):
+        """
+        reads the index file, or rebuilds it from the pack when it does not match the pack
+        """
+
+        try:
+            self.pack_size = os.path.getsize(self.pack_file)
+        except FileNotFoundError:
+            self.pack_size = 0
+
+        try:
+            with open(self.index_file, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = b''
+
+        entries = list(ENTRY.iter_unpack(data[:len(data) - len(data) % ENTRY.size]))
+
+        # the last entry has to end where the pack ends, otherwise a crash or a
+        # compaction left the two files apart
+        end = entries[-1][3] + entries[-1][4] if entries else 0
+        if end != self.pack_size:
+            self.rebuild_index()
+            return
+
+        for op, PHN, code, offset, length in entries:
+            self.apply(OP_NAMES[op], PHN, code, offset, length)
+
+    def scan_pack(self):
+        """
+        reads every record of the pack
+
+        Returns:
+            A generator of (change, offset, length)
+        """
+
+        with open(self.pack_file, 'rb') as file:
+            offset = 0
+            while True:
+                header = file.read(RECORD_LENGTH.size)
+                if len(header) < RECORD_LENGTH.size:
+                    return
+                length = RECORD_LENGTH.size + RECORD_LENGTH.unpack(header)[0]
+                payload = file.read(length - RECORD_LENGTH.size)
+                if len(payload) < length - RECORD_LENGTH.size:
+                    # a record that was cut off while being written
+                    return
+                yield json.loads(payload), offset, length
+                offset += length
+
+    def rebuild_index(self):
+
+        self.notes = {}
+        self.counters = {}
+        self.live_bytes = 0
+        entries = []
+
+        end = 0
+        if self.pack_size:
+            for change, offset, length in self.scan_pack():
+                entries.append((OPS[change['op']], change['PHN'], change['code'], offset, length))
+                end = offset + length
+
+        if end != self.pack_size:
+            # new records are appended after the last whole record
+            os.truncate(self.pack_file, end)
+            self.pack_size = end
+
+        self.write_entries(entries)
+
+    def encode(self, changes, offset):
+        """
+        turns changes into pack records starting at offset
+
+        Returns:
+            The records as bytes and a list of their index entries
+        """
+
+        records = []
+        entries = []
+        for change in changes:
+            payload = json.dumps(change).encode('utf-8')
+            records.append(RECORD_LENGTH.pack(len(payload)) + payload)
+            entries.append((OPS[change['op']], change['PHN'], change['code'], offset, len(records[-1])))
+            offset += len(records[-1])
+
+        return b''.join(records), entries
+
+    def write_entries(self, entries, append=False):
+        """
+        writes index entries to the index file and applies them to the in memory index
+        """
+
+        data = b''.join(ENTRY.pack(*entry) for entry in entries)
+        if append:
+            append_file(self.index_file, data)
+        else:
+            write_file(self.index_file, data)
+
+        for op, PHN, code, offset, length in entries:
+            self.apply(OP_NAMES[op], PHN, code, offset, length)
+
+    def append(self, changes):
+        """
+        appends changes to the pack and the index, each change is a dict
+        with op, PHN and code, and text and timestamp for creates and updates
+        """
+
+        with self.lock:
+            records, entries = self.encode(changes, self.pack_size)
+
+            # the pack is written before the index, so an index entry never points past the pack
+            append_file(self.pack_file, records)
+            self.write_entries(entries, append=True)
+            self.pack_size += len(records)
+
+            dead_bytes = self.pack_size - self.live_bytes
+            if dead_bytes > self.compact_bytes and dead_bytes > self.live_bytes:
+                self.compact()
+
+    def read(self, offset, length):
+
+        with self.lock:
+            if self.reader is None:
+                self.reader = open(self.pack_file, 'rb')
+            self.reader.seek(offset + RECORD_LENGTH.size)
+            return json.loads(self.reader.read(length - RECORD_LENGTH.size))
+
+    def read_notes(self, PHN):
+        """
+        reads the latest record of every note of a patient
+
+        Returns:
+            A list of changes in the order the notes were created
+        """
+
+        with self.lock:
+            return [self.read(offset, length) for offset, length in self.notes.get(PHN, {}).values()]
+
+    def counter(self, PHN):
+
+        return self.counters.get(PHN, 0)
+
+    def close(self):
+
+        with self.lock:
+            if self.reader is not None:
+                self.reader.close()
+                self.reader = None
+
+    def compact(self):
+        """
+        writes a new pack with only the latest record of every note, and the
+        counter of each patient so codes of deleted notes are not given again
+        """
+
+        with self.lock:
+            changes = []
+            for PHN, patient_notes in self.notes.items():
+                if self.counters.get(PHN, 0):
+                    changes.append({'op': 'counter', 'PHN': PHN, 'code': self.counters[PHN]})
+                changes.extend(self.read(offset, length) for offset, length in patient_notes.values())
+            self.close()
+
+            records, entries = self.encode(changes, 0)
+            write_file(self.pack_file, records)
+
+            self.notes = {}
+            self.counters = {}
+            self.live_bytes = 0
+            self.write_entries(entries)
+            self.pack_size = len(records)
+
+
+packs = {}
+packs_lock = threading.Lock()
+
+def get_pack(pack_file='clinic/records/notes.pack'):
+    """
+    gets the pack shared by every patient, it is read again if its file was changed or removed
+    """
+
+    with packs_lock:
+        pack = packs.get(pack_file)
+        try:
+            size = os.path.getsize(pack_file)
+        except FileNotFoundError:
+            size = None
+
+        if pack is None or (size or 0) != pack.pack_size:
+            if pack is not None:
+                pack.close()
+            pack = NotePack(pack_file, pack_file + '.idx')
+            packs[pack_file] = pack
+
+        return pack
@@ -0,0 +1,133 @@
+import re
+from .trigram_index import trigrams
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # before Python 3.11
+    import sre_parse
+
+# possessive repeats were added in Python 3.11
+REPEATS = tuple(getattr(sre_parse, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT') if hasattr(sre_parse, name))
+
+# a pattern with alternatives is narrowed down by each of them, unless there are more than this
+MAX_ALTERNATIVES = 16
+
+# the alternatives of a part of a pattern that can match anything
+ANYTHING = [[]]
+
+def required_literals(pattern):
+    """
+    finds the strings some text must have in it for the regular expression pattern
+    to match it, as code search engines do before running a regular expression
+
+    Returns:
+        A list of alternatives, each a list of strings that all have to be in a
+        text that matches one way, a text that has none of the alternatives
+        cannot match
+    """
+
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & re.IGNORECASE:
+        return ANYTHING
+
+    return sequence_literals(parsed)
+
+
+def sequence_literals(items):
+
+    alternatives = [[]]
+    run = []
+
+    for op, value in items:
+        if op == sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if op == sre_parse.AT:
+            # anchors match no characters, so the letters on both sides are next to each other
+            continue
+
+        if run:
+            alternatives = [literals + [''.join(run)] for literals in alternatives]
+            run = []
+
+        if op == sre_parse.SUBPATTERN:
+            group_id, add_flags, del_flags, group = value
+            if add_flags & re.IGNORECASE:
+                continue
+            alternatives = combine(alternatives, sequence_literals(group))
+        elif op == sre_parse.BRANCH:
+            alternatives = combine(alternatives, branch_literals(value[1]))
+        elif op in REPEATS:
+            minimum, maximum, item = value
+            if minimum > 0:
+                alternatives = combine(alternatives, sequence_literals(item))
+        # anything else, like a class of characters or a look ahead, adds nothing that is required
+
+    if run:
+        alternatives = [literals + [''.join(run)] for literals in alternatives]
+
+    return alternatives
+
+
+def branch_literals(branches):
+
+    alternatives = []
+    for branch in branches:
+        branch_alternatives = sequence_literals(branch)
+        # a branch that can match anything lets the whole alternation match anything
+        if branch_alternatives == ANYTHING:
+            return ANYTHING
+        alternatives.extend(branch_alternatives)
+
+    if len(alternatives) > MAX_ALTERNATIVES:
+        return ANYTHING
+
+    return alternatives
+
+
+def combine(alternatives, more):
+    """
+    Returns:
+        The alternatives of two parts of a pattern that follow each other
+    """
+
+    if more == ANYTHING:
+        return alternatives
+    if len(alternatives) * len(more) > MAX_ALTERNATIVES:
+        # keeping the shorter list of alternatives still narrows the search down
+        return alternatives if len(alternatives) <= len(more) else more
+
+    return [literals + more_literals for literals in alternatives for more_literals in more]
+
+
+def wildcard_pattern(wildcard):
+    """
+    turns a search with wildcards, where * stands for any characters and ? for any
+    one character, into a regular expression that finds it anywhere in a text, so
+    met*min finds metformin
+
+    Returns:
+        The regular expression
+    """
+
+    return ''.join('.*' if character == '*' else '.' if character == '?' else re.escape(character) for character in wildcard)
+
+
+def required_trigrams(pattern):
+    """
+    Returns:
+        A list of sets of trigrams, a text that matches pattern has every trigram of at least one set
+        None if some way of matching pattern needs no trigram, so every text has to be checked
+    """
+
+    alternatives = []
+    for literals in required_literals(pattern):
+        wanted = set()
+        for literal in literals:
+            wanted |= trigrams(literal)
+        if not wanted:
+            return None
+        alternatives.append(wanted)
+
+    return alternatives
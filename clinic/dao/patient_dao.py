@@ -1,6 +1,17 @@
 from abc import ABC, abstractmethod
+from itertools import groupby
+from operator import itemgetter
+from .contact_index import normalize_phone, normalize_email
+from .birth_date_index import birth_ordinal
+from .name_prefix_index import NamePrefixIndex
+from .clinic_note_index import ClinicNoteIndex
 class PatientDAO(ABC):
     
+    def __init__(self):
+        
+        # the words of every patient's notes, built the first time the notes of the clinic are searched
+        self.clinic_index = ClinicNoteIndex()
+    
     @abstractmethod
     def search_patient(self, key):
         pass
@@ -10,9 +21,13 @@ class PatientDAO(ABC):
         pass
     
     @abstractmethod
-    def retrieve_patients(self, search_string):
+    def iter_retrieve_patients(self, search_string):
         pass
     
+    def retrieve_patients(self, search_string):
+        
+        return list(self.iter_retrieve_patients(search_string))
+    
     @abstractmethod
     def update_patient(self, key, patient):
         pass
@@ -22,6 +37,77 @@ class PatientDAO(ABC):
         pass
     
     @abstractmethod
-    def list_patients(self):
+    def iter_patients(self):
         pass
+    
+    def list_patients(self):
+        
+        return list(self.iter_patients())
+    
+    def find_patients_by_phone(self, phone):
+        
+        phone = normalize_phone(phone)
+        if not phone:
+            return []
+        
+        return [patient for patient in self.iter_patients() if normalize_phone(patient.phone) == phone]
+    
+    def find_patients_by_email(self, email):
+        
+        email = normalize_email(email)
+        if not email:
+            return []
+        
+        return [patient for patient in self.iter_patients() if normalize_email(patient.email) == email]
+    
+    def find_patients_born_between(self, start, end):
+        
+        start = birth_ordinal(start)
+        end = birth_ordinal(end)
+        
+        patients = []
+        for patient in self.iter_patients():
+            ordinal = birth_ordinal(patient.birth_date)
+            if ordinal is not None and start <= ordinal <= end:
+                patients.append(patient)
+        
+        patients.sort(key=lambda patient: birth_ordinal(patient.birth_date))
+        return patients
+    
+    def complete_names(self, prefix, limit=10):
+        
+        return NamePrefixIndex(patient.name for patient in self.iter_patients()).complete(prefix, limit)
+    
+    def search_all_notes(self, search_string, limit=20, after=None):
+        """
+        finds the notes of every patient with search_string in their text, a page at a time,
+        through the clinic index of the DAO, only the notes of the patients the index points
+        to are read, and the ones that were not in memory are dropped again
+        
+        Returns:
+            A list of at most limit (PHN, code) ordered by PHN and code, starting after the (PHN, code) after
+        """
+        
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        
+        self.clinic_index.build(self.iter_patients())
+        
+        hits = []
+        # the candidates of a patient are next to each other, so their notes are read once
+        for notes_dao, keys in groupby(self.clinic_index.candidates(search_string, after), key=itemgetter(2)):
+            was_loaded = notes_dao.is_loaded()
+            for PHN, code, notes_dao in keys:
+                note = notes_dao.search_note(code)
+                if note is not None and search_string in note.text:
+                    hits.append((PHN, code))
+                    if len(hits) == limit:
+                        break
+            
+            if not was_loaded:
+                notes_dao.unload_notes()
+            if len(hits) == limit:
+                break
+        
+        return hits
 
@@ -1,43 +1,224 @@
+import atexit
 import json
 import os
+import threading
+import weakref
 from .patient_dao import PatientDAO
 from clinic.exception.illegal_operation_exception import IllegalOperationException
 from .patient_decoder import PatientDecoder
 from .patient_encoder import PatientEncoder
+from .patient_index import write_index
+from .persistence import write_file, append_file, read_journal
+from .patient_stream import stream_patients
+from .patient_snapshot import read_snapshot, write_snapshot
+from .trigram_index import TrigramIndex
+from .contact_index import ContactIndex
+from .birth_date_index import BirthDateIndex, birth_ordinal
+from .name_prefix_index import NamePrefixIndex
 
 class PatientDAOJSON(PatientDAO):
     
-    def __init__(self, autosave=False):
+    def __init__(self, autosave=False, file='clinic/records/patients.json', journal=False, compact_threshold=1024 * 1024, progress=None, scheduler=None):
         
+        super().__init__()
         self.autosave = autosave
+        self.file = file
+        self.index_file = os.path.splitext(file)[0] + '.idx'
+        self.snapshot_file = os.path.splitext(file)[0] + '.snapshot'
         
+        # in journal mode every change is appended to the journal file and
+        # the snapshot in self.file is only rewritten when the journal is compacted
+        self.journal = journal
+        self.journal_file = os.path.splitext(file)[0] + '.journal'
+        self.compact_threshold = compact_threshold
+        
+        # with a scheduler, changes are written together on a background thread,
+        # the lock keeps that thread from saving while patients are being changed
+        self.scheduler = scheduler
+        self.lock = threading.RLock()
+        self.pending_lines = []
+        self.dirty = False
+        # the PHN index entries of the patients file, while its index and snapshot are older than it
+        self.index_entries = None
+        
+        # trigrams of every patient's name, built the first time patients are retrieved by name
+        self.name_index = None
+        # patients by phone number and email, built the first time a patient is found by either
+        self.contact_index = None
+        # patients by birth date, built the first time patients are found by it
+        self.birth_date_index = None
+        # the starts of the words in patient names, built the first time a name is completed
+        self.prefix_index = None
+        
+        self.patients = {}
         if self.autosave:
-            self.patients = self.load_patients()
-            self.patients = {int(key): patient for key, patient in self.patients.items()}
+            self.load_patients(progress)
+            # a journal left from when journal mode was on is replayed too, and without
+            # journal mode it is folded into the patients file, so it is never replayed
+            # again over changes made after it
+            self.replay_journal()
+            if not self.journal and os.path.exists(self.journal_file):
+                self.compact()
+        
+    def load_patients(self, progress=None):
+        """
+        reads the patients file one patient at a time into self.patients
+
+        progress is called after each patient with the number of patients
+        loaded so far and the fraction of the file that has been read
+        """
+        
+        patients_file = self.file
+        
+        # the binary snapshot is read in one go when it matches the patients file
+        snapshot = read_snapshot(self.snapshot_file, patients_file)
+        if snapshot is not None:
+            for patient in snapshot:
+                self.patients[patient.PHN] = patient
+            if progress:
+                progress(len(self.patients), 1.0)
+            return
+        
+        try:
+            size = max(os.path.getsize(patients_file), 1)
+            with open(patients_file, 'r') as file:
+                for key, patient, position in stream_patients(file):
+                    self.patients[int(key)] = patient
+                    if progress:
+                        progress(len(self.patients), min(position / size, 1.0))
+        except FileNotFoundError:
+            write_file(patients_file, b'{}')
+        
+        if progress:
+            progress(len(self.patients), 1.0)
             
+    def save_patients(self):
+        
+        patients_file = self.file
+        
+        # patients are encoded one at a time, in the same layout as json.dump with indent=4,
+        # so the position of each patient in the file can be kept in the PHN index
+        entries = []
+        if not self.patients:
+            parts = ['{}']
         else:
-            self.patients = {}
+            parts = ['{']
+            position = 1
+            separator = '\n    '
+            for key, patient in self.patients.items():
+                record = json.dumps(patient, cls=PatientEncoder, indent=4).replace('\n', '\n    ')
+                parts.append(separator + json.dumps(str(key)) + ': ')
+                position += len(parts[-1])
+                entries.append((key, position, len(record)))
+                parts.append(record)
+                position += len(record)
+                separator = ',\n    '
+            parts.append('\n}')
         
-    def load_patients(self):
+        write_file(patients_file, ''.join(parts).encode('utf-8'))
+        self.index_entries = entries
+        unsaved_snapshots.add(self)
+    
+    def save_snapshot(self):
+        """
+        writes the PHN index and the binary snapshot of the patients file if it changed since
+        they were written, they only make the next start faster, so they are written when the
+        journal is compacted, on flush and at exit instead of with every change
+        """
         
-        patients_file = 'clinic/records/patients.json'
+        with self.lock:
+            # changes still waiting to be written are not in the patients file yet
+            if self.index_entries is None or self.dirty:
+                return
+            
+            # the records directory can be gone by exit
+            if os.path.exists(self.file):
+                write_index(self.index_file, self.file, self.index_entries)
+                write_snapshot(self.snapshot_file, self.file, self.patients)
+            self.index_entries = None
+            unsaved_snapshots.discard(self)
+    
+    def replay_journal(self):
+        """
+        applies the changes in the journal on top of the patients loaded from the snapshot
+        """
         
-        patients = {}
         try:
-            with open(patients_file, 'r+') as file:
-                patients = json.load(file, cls=PatientDecoder)
+            lines = read_journal(self.journal_file)
         except FileNotFoundError:
-            with open(patients_file, 'w+') as file:
-                json.dump({}, file)
+            return
+        
+        for line in lines:
+            try:
+                change = json.loads(line, cls=PatientDecoder)
+            except json.JSONDecodeError:
+                # a change that was cut off while being written is ignored
+                continue
             
-        return patients
+            if change['op'] == 'put':
+                self.patients[change['patient'].PHN] = change['patient']
+            elif change['op'] == 'delete':
+                self.patients.pop(change['PHN'], None)
+    
+    def commit(self, *changes):
+        """
+        persists the given changes, either by appending them to the journal
+        or by saving every patient when the journal is not used
+
+        with a scheduler the changes are only written when the scheduler flushes
+        """
+        
+        with self.lock:
+            self.record_changes(changes)
+            if not self.scheduler:
+                self.write_changes()
+                return
+            self.dirty = True
+        
+        self.scheduler.mark_dirty(self)
+    
+    def record_changes(self, changes):
+        """
+        keeps what is needed to write the changes at the next flush
+        """
+        
+        if self.journal:
+            self.pending_lines.extend(json.dumps(change, cls=PatientEncoder) + '\n' for change in changes)
+    
+    def flush(self):
+        """
+        writes the changes that have not been saved yet, and the index and snapshot of the patients file
+        """
+        
+        with self.lock:
+            if self.dirty:
+                self.write_changes()
+                self.dirty = False
             
-    def save_patients(self):
+            self.save_snapshot()
+    
+    def write_changes(self):
         
-        patients_file = 'clinic/records/patients.json'
+        if not self.journal:
+            self.save_patients()
+            return
+        
+        append_file(self.journal_file, ''.join(self.pending_lines).encode('utf-8'))
+        self.pending_lines = []
         
-        with open(patients_file, 'w+') as file:
-            json.dump(self.patients, file, cls=PatientEncoder, indent=4)
+        if os.path.getsize(self.journal_file) > self.compact_threshold:
+            self.compact()
+    
+    def compact(self):
+        """
+        folds the journal into the snapshot and starts a new empty journal
+        """
+        
+        with self.lock:
+            self.save_patients()
+            self.save_snapshot()
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
 
     def search_patient(self, key):
         
@@ -45,33 +226,112 @@ class PatientDAOJSON(PatientDAO):
     
     def create_patient(self, patient):
         
-        if not self.search_patient(patient.PHN):
-
+        with self.lock:
+            if self.search_patient(patient.PHN):
+                return None
+            
             self.patients[patient.PHN] = patient
+            if self.name_index is not None:
+                self.name_index.add(patient.PHN, patient.name)
+            if self.contact_index is not None:
+                self.contact_index.add(patient.PHN, patient)
+            if self.birth_date_index is not None:
+                self.birth_date_index.add(patient.PHN, patient.birth_date)
+            if self.prefix_index is not None:
+                self.prefix_index.add(patient.name)
             if self.autosave:
-                self.save_patients()
-                
-            return patient
-
-        else:
-            return None
+                self.commit({'op': 'put', 'patient': patient})
+        
+        self.clinic_index.watch(patient)
+        return patient
     
-    def retrieve_patients(self, name):
+    def name_candidates(self, name):
+        """
+        finds the patients that may have name in their name
         
-        retrieved_patients = []
-
-        for patient in self.patients.values():
+        Returns:
+            The patients to check, in the order of self.patients
+        """
+        
+        with self.lock:
+            if self.name_index is None:
+                self.name_index = TrigramIndex((PHN, patient.name) for PHN, patient in self.patients.items())
+            
+            # only patients with every trigram of name are checked, a name that is too short
+            # or too common is faster to find by checking every patient, past one patient in
+            # sixteen the keys the index finds are put in order by going through every patient,
+            # which costs more than checking them
+            keys = self.name_index.candidates(name, common=max(len(self.patients) // 16, 16))
+            if keys is None:
+                return self.patients.values()
+            
+            return [self.patients[PHN] for PHN in keys]
+    
+    def iter_retrieve_patients(self, name):
+        
+        for patient in self.name_candidates(name):
             if name in patient.name:
-                retrieved_patients.append(patient)
-
-        return retrieved_patients
+                yield patient
+    
+    def retrieve_patients(self, name):
+        
+        # the list is built without going through the generator, most of the time of a common name
+        return [patient for patient in self.name_candidates(name) if name in patient.name]
+    
+    def find_patients_by_phone(self, phone):
+        
+        with self.lock:
+            if self.contact_index is None:
+                self.contact_index = ContactIndex(self.patients.items())
+            
+            return [self.patients[PHN] for PHN in self.contact_index.find_phone(phone)]
+    
+    def find_patients_by_email(self, email):
+        
+        with self.lock:
+            if self.contact_index is None:
+                self.contact_index = ContactIndex(self.patients.items())
+            
+            return [self.patients[PHN] for PHN in self.contact_index.find_email(email)]
+    
+    def find_patients_born_between(self, start, end):
+        
+        start = birth_ordinal(start)
+        end = birth_ordinal(end)
+        
+        with self.lock:
+            if self.birth_date_index is None:
+                self.birth_date_index = BirthDateIndex(self.patients.items())
+            
+            return [self.patients[PHN] for PHN in self.birth_date_index.between(start, end)]
+    
+    def complete_names(self, prefix, limit=10):
+        
+        with self.lock:
+            if self.prefix_index is None:
+                self.prefix_index = NamePrefixIndex(patient.name for patient in self.patients.values())
+            
+            return self.prefix_index.complete(prefix, limit)
     
     def update_patient(self, key, patient):
 
         if key == patient.PHN:
-            self.patients[key].update_patient(patient.PHN, patient.name, patient.birth_date, patient.phone, patient.email, patient.address)
-            if self.autosave:
-                self.save_patients()
+            with self.lock:
+                if self.name_index is not None:
+                    self.name_index.update(key, self.patients[key].name, patient.name)
+                if self.contact_index is not None:
+                    self.contact_index.remove(key, self.patients[key])
+                if self.birth_date_index is not None:
+                    self.birth_date_index.remove(key, self.patients[key].birth_date)
+                    self.birth_date_index.add(key, patient.birth_date)
+                if self.prefix_index is not None:
+                    self.prefix_index.remove(self.patients[key].name)
+                    self.prefix_index.add(patient.name)
+                self.patients[key].update_patient(patient.PHN, patient.name, patient.birth_date, patient.phone, patient.email, patient.address)
+                if self.contact_index is not None:
+                    self.contact_index.add(key, self.patients[key])
+                if self.autosave:
+                    self.commit({'op': 'put', 'patient': self.patients[key]})
                 
             return True
 
@@ -79,29 +339,65 @@ class PatientDAOJSON(PatientDAO):
             if self.search_patient(patient.PHN):
                 raise IllegalOperationException("Cannot Have Same PHN as Existing Patient")
             
-            new_patient = self.patients.pop(key)
-            new_patient.update_patient(patient.PHN, patient.name, patient.birth_date, patient.phone, patient.email, patient.address)
-            self.patients[patient.PHN] = new_patient
-            if self.autosave:
-                self.save_patients()
+            with self.lock:
+                new_patient = self.patients.pop(key)
+                if self.name_index is not None:
+                    # the patient moves to the end of self.patients, and of the index
+                    self.name_index.remove(key, new_patient.name)
+                    self.name_index.add(patient.PHN, patient.name)
+                if self.contact_index is not None:
+                    self.contact_index.remove(key, new_patient)
+                if self.birth_date_index is not None:
+                    self.birth_date_index.remove(key, new_patient.birth_date)
+                    self.birth_date_index.add(patient.PHN, patient.birth_date)
+                if self.prefix_index is not None:
+                    self.prefix_index.remove(new_patient.name)
+                    self.prefix_index.add(patient.name)
+                new_patient.update_patient(patient.PHN, patient.name, patient.birth_date, patient.phone, patient.email, patient.address)
+                self.patients[patient.PHN] = new_patient
+                if self.contact_index is not None:
+                    self.contact_index.add(patient.PHN, new_patient)
+                if self.autosave:
+                    self.commit({'op': 'delete', 'PHN': key}, {'op': 'put', 'patient': new_patient})
+            
+            # the patient's notes are found under the new PHN
+            self.clinic_index.watch(new_patient)
                 
             return True
     
     def delete_patient(self, key):
-        for note in self.patients[key].list_notes():
-            self.patients[key].delete_note(note.code)
+        self.patients[key].drop_notes()
         
-        del self.patients[key]
-        if self.autosave:
-            self.save_patients()
+        with self.lock:
+            patient = self.patients.pop(key)
+            if self.name_index is not None:
+                self.name_index.remove(key, patient.name)
+            if self.contact_index is not None:
+                self.contact_index.remove(key, patient)
+            if self.birth_date_index is not None:
+                self.birth_date_index.remove(key, patient.birth_date)
+            if self.prefix_index is not None:
+                self.prefix_index.remove(patient.name)
+            if self.autosave:
+                self.commit({'op': 'delete', 'PHN': key})
             
         return True
     
-    def list_patients(self):
+    def iter_patients(self):
         
-        list_of_patients = []
-        for patients in self.patients.values():
-            list_of_patients.append(patients)
+        yield from self.patients.values()
+
+
+# DAOs whose PHN index and snapshot are older than their patients file
+unsaved_snapshots = weakref.WeakSet()
+
+def save_snapshots():
+    """
+    writes the index and snapshot of every patients file that changed since they were written
+    """
+
+    for dao in list(unsaved_snapshots):
+        dao.save_snapshot()
 
-        return list_of_patients
 
+atexit.register(save_snapshots)
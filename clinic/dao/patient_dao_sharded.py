@@ -0,0 +1,181 @@
+import json
+import os
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .patient_dao_json import PatientDAOJSON
+from .patient_encoder import PatientEncoder
+from .patient_stream import stream_patients
+from .persistence import write_file
+
+class PatientDAOSharded(PatientDAOJSON):
+
+    def __init__(self, autosave=False, file='clinic/records/patients.json', shards=16, progress=None, scheduler=None):
+        """
+        keeps patients in shard files chosen by a hash of their PHN, so a change
+        only rewrites the shard of the patient that changed
+
+        the number of shards is read from the manifest once it exists,
+        use reshard to change it afterwards
+        """
+
+        base = os.path.splitext(file)[0]
+        self.manifest_file = base + '.manifest.json'
+        self.shard_count = shards
+
+        # shards keep patients listed in the order they were added, like PatientDAOJSON,
+        # by saving a position with each patient
+        self.positions = {}
+        self.next_position = 1
+        self.shard_members = [set() for shard in range(shards)]
+        self.dirty_shards = set()
+
+        super().__init__(autosave, file, progress=progress, scheduler=scheduler)
+
+    def shard_of(self, PHN):
+
+        return zlib.crc32(str(PHN).encode('utf-8')) % self.shard_count
+
+    def shard_file(self, shard):
+
+        return '%s.shard-%03d-of-%03d.json' % (os.path.splitext(self.file)[0], shard, self.shard_count)
+
+    def shard_files(self):
+
+        return [self.shard_file(shard) for shard in range(self.shard_count)]
+
+    def read_manifest(self):
+
+        try:
+            with open(self.manifest_file, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def load_shard(self, shard_file):
+
+        patients = []
+        try:
+            with open(shard_file, 'r') as file:
+                for key, entry, position in stream_patients(file):
+                    patients.append((entry['position'], int(key), entry['patient']))
+        except FileNotFoundError:
+            pass
+
+        return patients
+
+    def load_patients(self, progress=None):
+        """
+        reads every shard into self.patients, several shards at a time
+
+        progress is called after each shard with the number of patients
+        loaded so far and the fraction of the shards that has been read
+        """
+
+        manifest = self.read_manifest()
+
+        if manifest is None:
+            # the first time shards are used, the patients of the single patients file are moved into shards
+            if os.path.exists(self.file):
+                super().load_patients(progress)
+            for PHN in self.patients:
+                self.positions[PHN] = self.next_position
+                self.next_position += 1
+            self.save_patients()
+            return
+
+        self.shard_count = manifest['shards']
+        self.shard_members = [set() for shard in range(self.shard_count)]
+
+        loaded = []
+        with ThreadPoolExecutor(max_workers=min(8, self.shard_count)) as executor:
+            futures = [executor.submit(self.load_shard, shard_file) for shard_file in self.shard_files()]
+            for done, future in enumerate(as_completed(futures), 1):
+                loaded.extend(future.result())
+                if progress:
+                    progress(len(loaded), done / self.shard_count)
+
+        loaded.sort(key=lambda entry: entry[0])
+        for position, PHN, patient in loaded:
+            self.patients[PHN] = patient
+            self.positions[PHN] = position
+            self.shard_members[self.shard_of(PHN)].add(PHN)
+
+        if loaded:
+            self.next_position = loaded[-1][0] + 1
+
+        if progress:
+            progress(len(self.patients), 1.0)
+
+    def save_shard(self, shard):
+
+        members = sorted(self.shard_members[shard], key=lambda PHN: self.positions[PHN])
+        shard_patients = {str(PHN): {'position': self.positions[PHN], 'patient': self.patients[PHN]} for PHN in members}
+
+        write_file(self.shard_file(shard), json.dumps(shard_patients, cls=PatientEncoder, indent=4).encode('utf-8'))
+
+    def save_patients(self):
+        """
+        writes every shard, then the manifest that points to them
+        """
+
+        self.shard_members = [set() for shard in range(self.shard_count)]
+        for PHN in self.patients:
+            self.shard_members[self.shard_of(PHN)].add(PHN)
+
+        for shard in range(self.shard_count):
+            self.save_shard(shard)
+
+        manifest = {'version': 1, 'shards': self.shard_count}
+        write_file(self.manifest_file, json.dumps(manifest, indent=4).encode('utf-8'))
+
+        self.dirty_shards = set()
+
+    def record_changes(self, changes):
+
+        for change in changes:
+            if change['op'] == 'put':
+                PHN = change['patient'].PHN
+                if PHN not in self.positions:
+                    self.positions[PHN] = self.next_position
+                    self.next_position += 1
+                self.shard_members[self.shard_of(PHN)].add(PHN)
+            else:
+                PHN = change['PHN']
+                self.positions.pop(PHN, None)
+                self.shard_members[self.shard_of(PHN)].discard(PHN)
+
+            self.dirty_shards.add(self.shard_of(PHN))
+
+    def write_changes(self):
+
+        for shard in sorted(self.dirty_shards):
+            self.save_shard(shard)
+
+        self.dirty_shards = set()
+
+
+def reshard(shards, file='clinic/records/patients.json'):
+    """
+    moves every patient into a new number of shards
+
+    the new shards are written before the manifest is switched to them,
+    so a crash leaves the patients in either the old or the new shards
+    """
+
+    dao = PatientDAOSharded(True, file)
+    old_files = dao.shard_files()
+
+    dao.shard_count = shards
+    dao.save_patients()
+
+    for old_file in set(old_files) - set(dao.shard_files()):
+        if os.path.exists(old_file):
+            os.remove(old_file)
+
+    return dao
+
+
+if __name__ == '__main__':
+    # python -m clinic.dao.patient_dao_sharded SHARDS
+    reshard(int(sys.argv[1]))
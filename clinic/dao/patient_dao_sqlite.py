@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import weakref
+from .patient_dao import PatientDAO
+from .patient_dao_json import PatientDAOJSON
+from .persistence import get_durability, NONE, COMMIT, BATCHED
+from .name_prefix_index import NamePrefixIndex
+from clinic.patient import Patient
+from clinic.exception.illegal_operation_exception import IllegalOperationException
+
+# how often SQLite syncs for each durability mode, in WAL mode NORMAL only syncs when the
+# log is written back to the database, so a crash can lose the last changes but never
+# leaves a half written one, FULL syncs every transaction
+SYNCHRONOUS = {NONE: 'NORMAL', COMMIT: 'FULL', BATCHED: 'NORMAL'}
+
+class PatientDAOSQLite(PatientDAO):
+    
+    def __init__(self, autosave=False, file='clinic/records/patients.db', json_file='clinic/records/patients.json', durability=None):
+        
+        super().__init__()
+        self.autosave = autosave
+        
+        # without autosave nothing is written to disk
+        if self.autosave:
+            self.file = file
+        else:
+            self.file = ':memory:'
+        
+        created = self.autosave and not os.path.exists(self.file)
+        self.connection = sqlite3.connect(self.file)
+        if self.autosave:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=' + SYNCHRONOUS[get_durability(durability)])
+        self.create_tables()
+        
+        # the patients of a clinic that kept them in patients.json are moved into the new database
+        if created and os.path.exists(json_file):
+            self.import_patients(json_file)
+        
+        # patients that are still in use are handed out again instead of being
+        # rebuilt, so their notes stay shared with whoever holds them
+        if self.autosave:
+            self.loaded_patients = weakref.WeakValueDictionary()
+        else:
+            # without autosave a patient's notes are only in memory, so the patient is kept
+            self.loaded_patients = {}
+        # the note DAOs of patients no longer in use can still be kept by the flush scheduler
+        # with changes to write, or by the record cache, a patient made again is given the
+        # same note DAO so its notes are not read from disk before those changes are written
+        self.loaded_notes = weakref.WeakValueDictionary()
+        
+        # the starts of the words in patient names, built the first time a name is completed
+        self.prefix_index = None
+    
+    def create_tables(self):
+        
+        with self.connection:
+            # position keeps patients listed in the order they were added, like PatientDAOJSON
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS patients ('
+                'PHN INTEGER PRIMARY KEY, '
+                'position INTEGER NOT NULL, '
+                'name TEXT NOT NULL, '
+                'birth_date TEXT, '
+                'phone TEXT, '
+                'email TEXT, '
+                'address TEXT)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS patients_name ON patients (name)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS patients_position ON patients (position)')
+    
+    def import_patients(self, json_file):
+        """
+        copies every patient of a patients file written by PatientDAOJSON, with its journal
+        if it has one, into the database in the order they were added
+        """
+        
+        json_dao = PatientDAOJSON(True, file=json_file)
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO patients (PHN, position, name, birth_date, phone, email, address) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((patient.PHN, position, patient.name, patient.birth_date, patient.phone, patient.email, patient.address)
+                 for position, patient in enumerate(json_dao.iter_patients(), 1)))
+    
+    def next_position(self):
+        
+        row = self.connection.execute('SELECT MAX(position) FROM patients').fetchone()
+        if row[0] is None:
+            return 1
+        
+        return row[0] + 1
+    
+    def to_patient(self, row):
+        """
+        turns a row of the patients table into a Patient
+        """
+        
+        PHN, name, birth_date, phone, email, address = row
+        
+        patient = self.loaded_patients.get(PHN)
+        if patient is None:
+            patient = Patient(PHN, name, birth_date, phone, email, address, self.autosave)
+            notes_dao = self.loaded_notes.get(PHN)
+            if notes_dao is None:
+                self.loaded_notes[PHN] = patient.patient_record.notes_dao
+            else:
+                patient.patient_record.notes_dao = notes_dao
+            self.loaded_patients[PHN] = patient
+            self.clinic_index.watch(patient)
+        
+        return patient
+    
+    def search_patient(self, key):
+        
+        row = self.connection.execute(
+            'SELECT PHN, name, birth_date, phone, email, address FROM patients WHERE PHN = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        
+        return self.to_patient(row)
+    
+    def create_patient(self, patient):
+        
+        if self.search_patient(patient.PHN):
+            return None
+        
+        with self.connection:
+            self.connection.execute(
+                'INSERT INTO patients (PHN, position, name, birth_date, phone, email, address) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (patient.PHN, self.next_position(), patient.name, patient.birth_date, patient.phone, patient.email, patient.address))
+        self.loaded_patients[patient.PHN] = patient
+        self.loaded_notes[patient.PHN] = patient.patient_record.notes_dao
+        if self.prefix_index is not None:
+            self.prefix_index.add(patient.name)
+        self.clinic_index.watch(patient)
+        
+        return patient
+    
+    def iter_retrieve_patients(self, name):
+        
+        # instr keeps the case sensitive substring match of PatientDAOJSON, LIKE would not
+        rows = self.connection.execute(
+            'SELECT PHN, name, birth_date, phone, email, address FROM patients WHERE instr(name, ?) > 0 ORDER BY position', (name,))
+        
+        # rows are read from the database as the patients are used
+        for row in rows:
+            yield self.to_patient(row)
+    
+    def update_patient(self, key, patient):
+        
+        if key != patient.PHN and self.search_patient(patient.PHN):
+            raise IllegalOperationException("Cannot Have Same PHN as Existing Patient")
+        
+        existing_patient = self.search_patient(key)
+        
+        with self.connection:
+            if key == patient.PHN:
+                self.connection.execute(
+                    'UPDATE patients SET name = ?, birth_date = ?, phone = ?, email = ?, address = ? WHERE PHN = ?',
+                    (patient.name, patient.birth_date, patient.phone, patient.email, patient.address, key))
+            else:
+                # a patient with a new PHN moves to the end of the list, like PatientDAOJSON
+                self.connection.execute(
+                    'UPDATE patients SET PHN = ?, position = ?, name = ?, birth_date = ?, phone = ?, email = ?, address = ? WHERE PHN = ?',
+                    (patient.PHN, self.next_position(), patient.name, patient.birth_date, patient.phone, patient.email, patient.address, key))
+        
+        if self.prefix_index is not None:
+            self.prefix_index.remove(existing_patient.name)
+            self.prefix_index.add(patient.name)
+        existing_patient.update_patient(patient.PHN, patient.name, patient.birth_date, patient.phone, patient.email, patient.address)
+        del self.loaded_patients[key]
+        self.loaded_patients[patient.PHN] = existing_patient
+        self.loaded_notes.pop(key, None)
+        self.loaded_notes[patient.PHN] = existing_patient.patient_record.notes_dao
+        # the patient's notes are found under the new PHN
+        self.clinic_index.watch(existing_patient)
+        
+        return True
+    
+    def delete_patient(self, key):
+        
+        patient = self.search_patient(key)
+        patient.drop_notes()
+        
+        with self.connection:
+            self.connection.execute('DELETE FROM patients WHERE PHN = ?', (key,))
+        self.loaded_patients.pop(key, None)
+        self.loaded_notes.pop(key, None)
+        if self.prefix_index is not None:
+            self.prefix_index.remove(patient.name)
+        
+        return True
+    
+    def complete_names(self, prefix, limit=10):
+        
+        if self.prefix_index is None:
+            # only the names are read, no patient is made
+            self.prefix_index = NamePrefixIndex(name for name, in self.connection.execute('SELECT name FROM patients'))
+        
+        return self.prefix_index.complete(prefix, limit)
+    
+    def iter_patients(self):
+        
+        rows = self.connection.execute(
+            'SELECT PHN, name, birth_date, phone, email, address FROM patients ORDER BY position')
+        
+        for row in rows:
+            yield self.to_patient(row)
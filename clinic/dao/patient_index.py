@@ -0,0 +1,187 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from .patient_decoder import PatientDecoder
+from .patient_stream import stream_patients
+from .persistence import write_file
+
+# the index file starts with a header holding the size and modification time of the
+# patients file it was built for, followed by one fixed width entry per patient
+# (PHN, offset, length) sorted by PHN, so one PHN can be found by binary search
+MAGIC = b'PHNIDX01'
+HEADER = struct.Struct('<8sQqQ')
+ENTRY = struct.Struct('<qQI')
+
+class PatientIndex:
+
+    def __init__(self, index_file, patients_file):
+        """
+        opens the index of patients_file, the index is only used if it matches the patients file
+        """
+
+        self.index_file = index_file
+        self.patients_file = patients_file
+
+        self.map = None
+        self.count = 0
+
+        try:
+            with open(index_file, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < HEADER.size:
+                    return
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return
+
+        magic, size, mtime, count = HEADER.unpack_from(self.map, 0)
+        try:
+            stat = os.stat(patients_file)
+        except FileNotFoundError:
+            stat = None
+
+        if magic != MAGIC or stat is None or stat.st_size != size or stat.st_mtime_ns != mtime \
+                or len(self.map) != HEADER.size + count * ENTRY.size:
+            self.close()
+            return
+
+        self.count = count
+
+    def is_valid(self):
+
+        return self.map is not None
+
+    def close(self):
+
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def lookup(self, PHN):
+        """
+        finds where a patient is stored in the patients file
+
+        Returns:
+            (offset, length) of the patient
+            None if the PHN is not in the index
+        """
+
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            key, offset, length = ENTRY.unpack_from(self.map, HEADER.size + middle * ENTRY.size)
+            if key == PHN:
+                return offset, length
+            if key < PHN:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def read_patient(self, PHN):
+        """
+        reads one patient from the patients file
+
+        Returns:
+            The patient if the PHN is in the index
+            None if it is not
+        """
+
+        position = self.lookup(PHN)
+        if position is None:
+            return None
+
+        offset, length = position
+        with open(self.patients_file, 'rb') as file:
+            file.seek(offset)
+            return json.loads(file.read(length), cls=PatientDecoder)
+
+
+def write_index(index_file, patients_file, entries):
+    """
+    writes the index for patients_file, entries is a list of (PHN, offset, length)
+    """
+
+    stat = os.stat(patients_file)
+    entries = sorted(entries)
+
+    data = bytearray(HEADER.size + len(entries) * ENTRY.size)
+    HEADER.pack_into(data, 0, MAGIC, stat.st_size, stat.st_mtime_ns, len(entries))
+    for i, entry in enumerate(entries):
+        ENTRY.pack_into(data, HEADER.size + i * ENTRY.size, *entry)
+
+    write_file(index_file, bytes(data))
+
+
+def find_journal_change(journal_file, PHN):
+    """
+    looks for the latest change to a patient in a journal of PatientDAOJSON
+
+    Returns:
+        The patient if it was last saved in the journal
+        False if it was last deleted in the journal
+        None if the journal does not change the patient
+    """
+
+    found = None
+    try:
+        with open(journal_file, 'r') as file:
+            for line in file:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if change['op'] == 'delete' and change['PHN'] == PHN:
+                    found = False
+                elif change['op'] == 'put' and change['patient']['PHN'] == PHN:
+                    found = line
+    except FileNotFoundError:
+        return None
+
+    if found:
+        return json.loads(found, cls=PatientDecoder)['patient']
+
+    return found
+
+
+def lookup_patient(PHN, patients_file='clinic/records/patients.json'):
+    """
+    finds one patient without loading every patient, using the index and the journal
+    next to patients_file, and falls back to reading the whole file when the index is stale
+
+    Returns:
+        The patient if it could be found
+        None if no patient has the PHN
+    """
+
+    base = os.path.splitext(patients_file)[0]
+
+    # the journal is newer than the snapshot, and is kept small by compaction
+    change = find_journal_change(base + '.journal', PHN)
+    if change is not None:
+        return change or None
+
+    index = PatientIndex(base + '.idx', patients_file)
+    if index.is_valid():
+        try:
+            return index.read_patient(PHN)
+        finally:
+            index.close()
+
+    try:
+        with open(patients_file, 'r') as file:
+            for key, patient, position in stream_patients(file):
+                if key == str(PHN):
+                    return patient
+    except FileNotFoundError:
+        return None
+
+    return None
+
+
+if __name__ == '__main__':
+    # python -m clinic.dao.patient_index PHN
+    print(lookup_patient(int(sys.argv[1])))
@@ -0,0 +1,62 @@
+import marshal
+import os
+import struct
+import zlib
+from clinic.patient import Patient
+from .persistence import write_file
+
+# the snapshot starts with a header holding the size and modification time of the
+# patients file it was made from and a checksum of the rest of the snapshot, which
+# is every patient as a tuple of plain values written with marshal
+MAGIC = b'PSNAP001'
+HEADER = struct.Struct('<8sQqIQ')
+
+def write_snapshot(snapshot_file, patients_file, patients):
+    """
+    writes a snapshot of patients, a dictionary of PHN to Patient, that
+    is only used while patients_file stays the way it is now
+    """
+
+    payload = marshal.dumps([
+        (patient.PHN, patient.name, patient.birth_date, patient.phone, patient.email, patient.address, patient.autosave)
+        for patient in patients.values()
+    ])
+
+    stat = os.stat(patients_file)
+    header = HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, zlib.crc32(payload), len(payload))
+    write_file(snapshot_file, header + payload)
+
+
+def read_snapshot(snapshot_file, patients_file):
+    """
+    reads the snapshot of patients_file
+
+    Returns:
+        A list of patients in the order they were saved
+        None if there is no snapshot or it does not match patients_file
+    """
+
+    try:
+        with open(snapshot_file, 'rb') as file:
+            data = file.read()
+        stat = os.stat(patients_file)
+    except FileNotFoundError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+
+    magic, size, mtime, checksum, length = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns or length != len(data) - HEADER.size:
+        return None
+
+    payload = memoryview(data)[HEADER.size:]
+    if zlib.crc32(payload) != checksum:
+        return None
+
+    try:
+        rows = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    return [Patient(*row) for row in rows]
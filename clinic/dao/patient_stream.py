@@ -0,0 +1,81 @@
+import json
+from .patient_decoder import PatientDecoder
+
+WHITESPACE = ' \t\n\r'
+
+def stream_patients(file, chunk_size=64 * 1024):
+    """
+    reads a patients file written by PatientDAOJSON one patient at a time, so only
+    one chunk of the file and one patient are decoded in memory at once
+
+    Returns:
+        A generator of (key, patient, position) where position is how many
+        characters of the file have been read so far
+    """
+
+    decoder = PatientDecoder()
+    buffer = ''
+    position = 0
+    consumed = 0
+    end_of_file = False
+
+    def read_more():
+        nonlocal buffer, position, consumed, end_of_file
+        chunk = file.read(chunk_size)
+        if not chunk:
+            end_of_file = True
+            return False
+        # drop what was already parsed before adding the new chunk
+        consumed += position
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer) or not read_more():
+                return
+
+    def expect(characters):
+        nonlocal position
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] not in characters:
+            raise json.JSONDecodeError(f"Expecting one of {characters!r}", buffer, position)
+        position += 1
+        return buffer[position - 1]
+
+    def decode_value(decode):
+        nonlocal position
+        while True:
+            try:
+                value, end = decode(buffer, position)
+                # a value that ends with the buffer may be cut off, like a number
+                if end < len(buffer) or end_of_file:
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise
+            read_more()
+
+    expect('{')
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == '}':
+        return
+
+    while True:
+        skip_whitespace()
+        key = decode_value(decoder.raw_decode)
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buffer, position)
+        expect(':')
+        skip_whitespace()
+        patient = decode_value(decoder.raw_decode)
+        yield key, patient, consumed + position
+
+        if expect(',}') == '}':
+            return
+
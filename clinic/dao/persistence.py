@@ -0,0 +1,174 @@
+import atexit
+import os
+import threading
+import time
+from clinic import config
+
+# how much a write is protected against a crash or a power failure
+#   none     the file is replaced atomically, but the operating system decides when it reaches the disk
+#   commit   every write is fsynced before it returns
+#   batched  written files are fsynced together by the first write FSYNC_BATCH_INTERVAL seconds
+#            after the last sync, and when the program exits
+NONE = 'none'
+COMMIT = 'commit'
+BATCHED = 'batched'
+
+DURABILITY_MODES = (NONE, COMMIT, BATCHED)
+
+# files written in batched mode that have not been fsynced yet
+unsynced_files = set()
+last_sync = time.monotonic()
+sync_lock = threading.Lock()
+
+
+def get_durability(durability=None):
+
+    durability = durability or config.DURABILITY
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode {durability!r}, use one of {DURABILITY_MODES}")
+
+    return durability
+
+
+def write_file(path, data, durability=None):
+    """
+    replaces the file at path with data, writing a temporary file first and
+    renaming it over path, so a crash leaves either the old or the new file
+    """
+
+    durability = get_durability(durability)
+    temp_path = path + '.tmp'
+
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+            if durability == COMMIT:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    written(path, durability)
+
+
+def append_file(path, data, durability=None):
+    """
+    adds data to the end of the file at path
+    """
+
+    durability = get_durability(durability)
+
+    with open(path, 'ab') as file:
+        file.write(data)
+        if durability == COMMIT:
+            file.flush()
+            os.fsync(file.fileno())
+
+    written(path, durability)
+
+
+def read_journal(path, durability=None):
+    """
+    reads the lines of a journal that were written completely, a last line that
+    was cut off by a crash is cut from the file, so the next change appended
+    starts on a line of its own instead of being joined to it
+
+    Returns:
+        A list of lines
+    """
+
+    durability = get_durability(durability)
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    end = data.rfind(b'\n') + 1
+    if end < len(data):
+        with open(path, 'r+b') as file:
+            file.truncate(end)
+            if durability == COMMIT:
+                file.flush()
+                os.fsync(file.fileno())
+        written(path, durability)
+
+    return data[:end].decode('utf-8').splitlines(keepends=True)
+
+
+def remove_file(path, durability=None):
+    """
+    deletes the file at path if it exists
+    """
+
+    durability = get_durability(durability)
+
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+
+    if durability == COMMIT:
+        sync_directory(os.path.dirname(path))
+
+
+def written(path, durability):
+
+    if durability == COMMIT:
+        # the rename or the new file is only durable once its directory is synced
+        sync_directory(os.path.dirname(path))
+
+    elif durability == BATCHED:
+        with sync_lock:
+            unsynced_files.add(path)
+            due = time.monotonic() - last_sync >= config.FSYNC_BATCH_INTERVAL
+
+        if due:
+            sync()
+
+
+def sync():
+    """
+    fsyncs every file written in batched mode since the last sync
+    """
+
+    global unsynced_files, last_sync
+
+    with sync_lock:
+        paths = unsynced_files
+        unsynced_files = set()
+        last_sync = time.monotonic()
+
+    directories = set()
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            continue
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(path))
+
+    for directory in directories:
+        sync_directory(directory)
+
+
+def sync_directory(directory):
+
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        # directories cannot be opened on some systems, like Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+atexit.register(sync)
@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+from clinic import config
+from .note_compression import LazyNote
+from .note_codec import MappedNote
+
+def note_size(note):
+
+    # a compressed note that has not been read only holds its compressed text,
+    # and a mapped one only its place in the file
+    if isinstance(note, LazyNote) and note.plain_text is None:
+        return len(note.compressed)
+    if isinstance(note, MappedNote) and note.plain_text is None:
+        return 0
+
+    return len(note.text)
+
+
+class RecordCache:
+
+    def __init__(self, max_records=0, max_bytes=0):
+        """
+        keeps the notes of only the most recently used patients in memory, the
+        notes of the least recently used patient are written and dropped once
+        there are more than max_records patients or more than max_bytes of
+        note text loaded, 0 means no limit
+
+        an evicted patient's notes are read again the next time they are used
+        """
+
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        # note DAO -> bytes of note text, from least to most recently used
+        self.records = OrderedDict()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit(self, dao):
+        """
+        records that dao was used while its notes were in memory
+        """
+
+        with self.lock:
+            if dao in self.records:
+                self.records.move_to_end(dao)
+                self.hits += 1
+                return
+
+        # the notes were dropped by another cache or were never counted
+        self.loaded(dao)
+
+    def loaded(self, dao):
+        """
+        records that dao has just read its notes, and evicts other DAOs if the cache is full
+        """
+
+        size = sum(note_size(note) for note in dao.notes.values())
+
+        with self.lock:
+            self.misses += 1
+            self.total_bytes += size - self.records.pop(dao, 0)
+            self.records[dao] = size
+            victims = self.choose_victims()
+
+        for victim in victims:
+            victim.unload_notes()
+
+    def resize(self, dao, change):
+        """
+        records that the note text of dao grew or shrank by change bytes
+        """
+
+        with self.lock:
+            if dao not in self.records:
+                return
+            self.records[dao] += change
+            self.total_bytes += change
+            victims = self.choose_victims()
+
+        for victim in victims:
+            victim.unload_notes()
+
+    def forget(self, dao):
+        """
+        stops counting dao, for notes that were dropped without an eviction
+        """
+
+        with self.lock:
+            self.total_bytes -= self.records.pop(dao, 0)
+
+    def choose_victims(self):
+        """
+        takes the least recently used DAOs out of the cache until it is within
+        its limits, the most recently used one is always kept
+
+        Returns:
+            A list of DAOs to unload
+        """
+
+        victims = []
+        while len(self.records) > 1 and (
+            (self.max_records and len(self.records) > self.max_records)
+            or (self.max_bytes and self.total_bytes > self.max_bytes)
+        ):
+            dao, size = self.records.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            victims.append(dao)
+
+        return victims
+
+    def stats(self):
+        """
+        gets the counters of the cache
+
+        Returns:
+            A dictionary with hits, misses, evictions, records and bytes
+        """
+
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'records': len(self.records),
+                'bytes': self.total_bytes,
+            }
+
+
+shared_cache = None
+
+def get_record_cache():
+    """
+    gets the cache shared by every patient record
+
+    Returns:
+        The cache if a limit is set in the configuration
+        None if every patient's notes stay in memory
+    """
+
+    global shared_cache
+
+    if config.RECORD_CACHE_SIZE <= 0 and config.RECORD_CACHE_MB <= 0:
+        return None
+
+    if shared_cache is None:
+        shared_cache = RecordCache(config.RECORD_CACHE_SIZE, int(config.RECORD_CACHE_MB * 1024 * 1024))
+
+    return shared_cache
@@ -0,0 +1,119 @@
+def trigrams(text):
+    """
+    Returns:
+        A set of every three character piece of text
+    """
+
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+
+    def __init__(self, items=()):
+        """
+        an index from every three character piece of some texts to the keys of
+        the texts it is in, items are (key, text) pairs
+
+        a text that has a search string in it has every trigram of the search
+        string, so the keys with all of them are the only ones that need checking
+
+        the keys are given back in the order they were added, an updated text
+        keeps its place
+        """
+
+        # trigram -> set of keys
+        self.postings = {}
+        # key -> number giving its place in the order keys were added
+        self.order = {}
+        self.next_order = 0
+
+        for key, text in items:
+            self.add(key, text)
+
+    def add(self, key, text):
+
+        self.order[key] = self.next_order
+        self.next_order += 1
+
+        for trigram in trigrams(text):
+            self.postings.setdefault(trigram, set()).add(key)
+
+    def remove(self, key, text):
+
+        self.order.pop(key, None)
+        self.remove_trigrams(key, trigrams(text))
+
+    def update(self, key, old_text, new_text):
+
+        old_trigrams = trigrams(old_text)
+        new_trigrams = trigrams(new_text)
+
+        self.remove_trigrams(key, old_trigrams - new_trigrams)
+        for trigram in new_trigrams - old_trigrams:
+            self.postings.setdefault(trigram, set()).add(key)
+
+    def remove_trigrams(self, key, removed):
+
+        for trigram in removed:
+            keys = self.postings.get(trigram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[trigram]
+
+    def candidates(self, search_string, common=None):
+        """
+        finds the keys of the texts that may have search_string in them
+
+        Returns:
+            A list of keys in the order they were added
+            None if search_string is too short to have a trigram, or even its rarest
+            trigram is in more than common texts, so every text has to be checked
+        """
+
+        wanted = trigrams(search_string)
+        if not wanted:
+            return None
+
+        return self.intersect(wanted, common)
+
+    def count(self, wanted):
+        """
+        Returns:
+            The number of keys with the rarest trigram in wanted, the most intersect can give back
+        """
+
+        return min(len(self.postings.get(trigram, ())) for trigram in wanted)
+
+    def cost(self, wanted):
+        """
+        Returns:
+            About how many keys intersect goes through, every trigram after the rarest
+            is intersected with at most the keys of the rarest
+        """
+
+        return self.count(wanted) * len(wanted)
+
+    def intersect(self, wanted, common=None):
+        """
+        Returns:
+            A list of the keys that have every trigram in wanted, in the order they were added
+            None if every trigram in wanted is in more than common texts
+        """
+
+        # the rarest trigram is looked at first, so the sets only get smaller
+        postings = sorted((self.postings.get(trigram, set()) for trigram in wanted), key=len)
+        if common is not None and len(postings[0]) > common:
+            return None
+
+        keys = set(postings[0])
+        for posting in postings[1:]:
+            if not keys:
+                break
+            keys &= posting
+
+        # many keys are put in order by going through every key, fewer by sorting them
+        if len(keys) > len(self.order) // 16:
+            return [key for key in self.order if key in keys]
+
+        return sorted(keys, key=self.order.__getitem__)
@@ -432,7 +432,7 @@ class AppointmentMenuWindow(QWidget):
     
     def retrieve_all_notes(self):
         try:
-            notes_list = self.controller.list_notes()
+            notes_list = self.controller.iter_notes()
             
             text = QPlainTextEdit()
             text.setPlainText("")
@@ -206,6 +206,15 @@ class MainMenuWindow(QWidget):
         patients_name.setPlaceholderText("Name")
         layout.addWidget(patients_name)
         
+        # names are offered as they are typed, the list is filled before the completer
+        # looks at it since it is connected to textEdited first
+        names_model = QtCore.QStringListModel()
+        patients_name.textEdited.connect(lambda text: names_model.setStringList(self.controller.complete_patient_names(text)))
+        completer = QtWidgets.QCompleter(names_model, patients_name)
+        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        completer.setFilterMode(Qt.MatchFlag.MatchContains)
+        patients_name.setCompleter(completer)
+        
         patients_retrieve_button = QPushButton("Retrieve")
         layout.addWidget(patients_retrieve_button)
         
@@ -215,17 +224,11 @@ class MainMenuWindow(QWidget):
         return widget
     
     def retrieve_patients(self, name):
-        patient_list = self.controller.retrieve_patients(name)
-        if len(patient_list) == 0:
+        data_list = [self.make_patient_into_list(patient) for patient in self.controller.iter_retrieve_patients(name)]
+        if len(data_list) == 0:
             dlg = self.create_dialog("Error", "No Patients Found")
             dlg.exec()
         else:
-            
-            data_list = []
-        
-            for patient in patient_list:
-                data_list.append(self.make_patient_into_list(patient))
-        
             dlg = QDialog(self)
             layout = QVBoxLayout()
         
@@ -466,17 +469,12 @@ class MainMenuWindow(QWidget):
         return widget
     
     def retrieve_all_patients(self):
-        patient_list = self.controller.list_patients()
-        if len(patient_list) == 0:
+        data_list = [self.make_patient_into_list(patient) for patient in self.controller.iter_patients()]
+        if len(data_list) == 0:
             dlg = self.create_dialog("Error", f"No Patients On Record")
             dlg.exec()
         
         else:
-            data_list = []
-        
-            for patient in patient_list:
-                data_list.append(self.make_patient_into_list(patient))
-        
             dlg = QDialog(self)
             layout = QVBoxLayout()
         
@@ -39,9 +39,9 @@ class Patient:
         
         return self.patient_record.search_note(code)
 
-    def retrieve_notes(self, text):
+    def retrieve_notes(self, text, regex=False, wildcard=False):
         
-        return self.patient_record.retrieve_notes(text)
+        return self.patient_record.retrieve_notes(text, regex, wildcard)
 
     def update_note(self, code, text):
         
@@ -55,6 +55,14 @@ class Patient:
         
         return self.patient_record.list_notes()
 
+    def iter_notes(self, limit=None, before_code=None):
+        
+        return self.patient_record.iter_notes(limit, before_code)
+
+    def drop_notes(self):
+        
+        return self.patient_record.drop_notes()
+
     def __eq__(self, other):
         """
         Patients are equal if
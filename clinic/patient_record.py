@@ -1,5 +1,12 @@
 from .note import Note
+from clinic import config
 from clinic.dao.note_dao_pickle import NoteDAOPickle
+from clinic.dao.note_dao_journal import NoteDAOJournal
+from clinic.dao.note_dao_pack import NoteDAOPack
+from clinic.dao.note_dao_binary import NoteDAOBinary
+from clinic.dao.note_dao_mapped import NoteDAOMapped
+from clinic.dao.flush_scheduler import get_scheduler
+from clinic.dao.record_cache import get_record_cache
 class PatientRecord:
     
     def __init__(self, PHN, autosave=False):
@@ -7,7 +14,19 @@ class PatientRecord:
         Constructor for a patients record
         """
 
-        self.notes_dao = NoteDAOPickle(PHN, autosave)
+        # notes that are not saved cannot be read again, so they are never evicted
+        cache = get_record_cache() if autosave else None
+
+        if config.NOTE_BACKEND == 'journal':
+            self.notes_dao = NoteDAOJournal(PHN, autosave, get_scheduler(), cache)
+        elif config.NOTE_BACKEND == 'pack':
+            self.notes_dao = NoteDAOPack(PHN, autosave, get_scheduler(), cache)
+        elif config.NOTE_BACKEND == 'binary':
+            self.notes_dao = NoteDAOBinary(PHN, autosave, get_scheduler(), cache)
+        elif config.NOTE_BACKEND == 'mapped':
+            self.notes_dao = NoteDAOMapped(PHN, autosave, get_scheduler(), cache)
+        else:
+            self.notes_dao = NoteDAOPickle(PHN, autosave, get_scheduler(), cache)
         
     def search_note(self, code):
         """
@@ -30,15 +49,17 @@ class PatientRecord:
         
         return self.notes_dao.create_note(text)
     
-    def retrieve_notes(self, text):
+    def retrieve_notes(self, text, regex=False, wildcard=False):
         """
-        retrieves notes with a certain text within the note
+        retrieves notes with a certain text within the note, or a match of
+        the regular expression text when regex is True, or of the wildcards
+        * and ? in text when wildcard is True
 
         Returns:
             A list of notes
         """
         
-        return self.notes_dao.retrieve_notes(text)
+        return self.notes_dao.retrieve_notes(text, regex, wildcard)
     
     def update_note(self, code, text):
         """
@@ -72,4 +93,23 @@ class PatientRecord:
         """
 
         return self.notes_dao.list_notes()
-        
\ No newline at end of file
+    
+    def iter_notes(self, limit=None, before_code=None):
+        """
+        goes through the notes of patients record from newest to oldest
+
+        Returns:
+            A generator of at most limit notes with a code lower than before_code
+        """
+
+        return self.notes_dao.iter_notes(limit, before_code)
+    
+    def drop_notes(self):
+        """
+        deletes every note from patient's record at once
+
+        Returns:
+            True once the notes are deleted
+        """
+
+        return self.notes_dao.drop_notes()
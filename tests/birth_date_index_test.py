@@ -0,0 +1,39 @@
+from datetime import date
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.birth_date_index import BirthDateIndex, birth_ordinal
+
+class BirthDateIndexTest(TestCase):
+
+    def test_birth_ordinal(self):
+
+        self.assertEqual(birth_ordinal("2000-10-10"), date(2000, 10, 10).toordinal())
+        self.assertIsNone(birth_ordinal("10/10/2000"))
+        self.assertIsNone(birth_ordinal("2000-02-30"))
+        self.assertIsNone(birth_ordinal(None))
+
+    def test_between(self):
+
+        patients = [
+            Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"),
+            Patient(9790014444, "Mary Doe", "1955-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"),
+            Patient(9792225555, "Joe Hancock", "1950-01-01", "278 456 7890", "joe.hancock@gmail.com", "5000 Douglas St, Saanich"),
+            Patient(9791234567, "Ann Doering", "1955-07-01", "250 999 1234", "ann@gmail.com", "1 Main St, Victoria"),
+            Patient(9797654321, "Bob Unknown", "sometime", "250 999 4321", "bob@gmail.com", "2 Main St, Victoria"),
+        ]
+        index = BirthDateIndex((patient.PHN, patient) for patient in patients)
+
+        self.assertEqual(index.between(birth_ordinal("1950-01-01"), birth_ordinal("1960-12-31")), [9792225555, 9790014444, 9791234567],
+            "oldest first, patients born the same day in the order they were added")
+        self.assertEqual(index.between(birth_ordinal("1955-07-01"), birth_ordinal("1955-07-01")), [9790014444, 9791234567])
+        self.assertEqual(index.between(birth_ordinal("1960-01-01"), birth_ordinal("1999-12-31")), [])
+
+        index.remove(9790014444, "1955-07-01")
+        index.add(9790014444, "1956-07-01")
+        index.remove(9797654321, "sometime")
+        self.assertEqual(index.between(birth_ordinal("1955-01-01"), birth_ordinal("2000-10-10")), [9791234567, 9790014444, 9790012000])
+
+
+if __name__ == '__main__':
+    main()
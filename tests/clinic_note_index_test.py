@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.clinic_note_index import ClinicNoteIndex
+
+class ClinicNoteIndexTest(TestCase):
+
+    def make_patients(self):
+
+        john = Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+        mary = Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria")
+        john.create_note("Patient is taking warfarin.")
+        john.create_note("Patient comes with headache.")
+        mary.create_note("Warfarin stopped, patient started on apixaban.")
+        mary.create_note("Patient takes warfarin again.")
+        return mary, john
+
+    def hits(self, index, search_string, after=None):
+        return [(PHN, code) for PHN, code, notes_dao in index.candidates(search_string, after)]
+
+    def test_candidates(self):
+
+        mary, john = self.make_patients()
+        index = ClinicNoteIndex()
+        index.build([mary, john])
+
+        self.assertEqual(self.hits(index, "warfarin"), [(9790012000, 1), (9790014444, 1), (9790014444, 2)], "terms are casefolded, the notes are checked later")
+        self.assertEqual(self.hits(index, "warfarin", after=(9790012000, 1)), [(9790014444, 1), (9790014444, 2)])
+        self.assertEqual(self.hits(index, "aspirin"), [])
+        self.assertEqual(len(self.hits(index, ", ")), 4, "a search with no words checks every note")
+
+    def test_kept_up_to_date(self):
+
+        mary, john = self.make_patients()
+        index = ClinicNoteIndex()
+        index.build([mary, john])
+
+        john.create_note("Warfarin dose lowered.")
+        john.update_note(1, "Patient is taking aspirin.")
+        mary.delete_note(2)
+        self.assertEqual(self.hits(index, "warfarin"), [(9790012000, 3), (9790014444, 1)])
+
+        ann = Patient(9791234567, "Ann Doering", "1980-05-05", "250 999 1234", "ann@gmail.com", "1 Main St, Victoria")
+        index.watch(ann)
+        ann.create_note("Started on warfarin.")
+        self.assertEqual(self.hits(index, "warfarin"), [(9790012000, 3), (9790014444, 1), (9791234567, 1)])
+
+    def test_PHN_change(self):
+
+        mary, john = self.make_patients()
+        index = ClinicNoteIndex()
+        index.build([mary, john])
+
+        john.update_patient(9799999999, john.name, john.birth_date, john.phone, john.email, john.address)
+        # the patient DAO watches a patient again after their PHN changes
+        index.watch(john)
+        john.create_note("Warfarin dose lowered.")
+        self.assertEqual(self.hits(index, "warfarin"), [(9790014444, 1), (9790014444, 2), (9799999999, 1), (9799999999, 3)])
+
+    def test_drop(self):
+
+        mary, john = self.make_patients()
+        index = ClinicNoteIndex()
+        index.build([mary, john])
+
+        mary.drop_notes()
+        self.assertEqual(self.hits(index, "warfarin"), [(9790012000, 1)])
+        self.assertFalse(any(notes_dao is mary.patient_record.notes_dao for notes_dao, code in index.words.postings["warfarin"]),
+            "the words of notes in memory are taken out")
+
+        index.drop(john.patient_record.notes_dao)
+        self.assertFalse(index.built, "without the texts the index is built again once it has more dropped notes than live ones")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.contact_index import ContactIndex, normalize_phone, normalize_email
+
+class ContactIndexTest(TestCase):
+
+    def test_normalize(self):
+
+        self.assertEqual(normalize_phone("250 203 1010"), "2502031010")
+        self.assertEqual(normalize_phone("(250) 203-1010"), "2502031010")
+        self.assertEqual(normalize_phone("+1 250.203.1010"), "2502031010")
+        self.assertEqual(normalize_phone(None), "")
+        self.assertEqual(normalize_email(" John.Doe@Gmail.com "), "john.doe@gmail.com")
+        self.assertEqual(normalize_email(""), "")
+
+    def test_add_and_remove(self):
+
+        john = Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+        mary = Patient(9790014444, "Mary Doe", "1995-07-01", "250-203-1010", "mary.doe@gmail.com", "300 Moss St, Victoria")
+        index = ContactIndex([(john.PHN, john), (mary.PHN, mary)])
+
+        self.assertEqual(index.find_phone("(250) 203 1010"), [9790012000, 9790014444], "a family can share a phone number")
+        self.assertEqual(index.find_email("MARY.DOE@gmail.com"), [9790014444])
+        self.assertEqual(index.find_phone(""), [])
+
+        index.remove(john.PHN, john)
+        self.assertEqual(index.find_phone("250 203 1010"), [9790014444])
+        self.assertEqual(index.find_email("john.doe@gmail.com"), [])
+
+        index.remove(mary.PHN, mary)
+        self.assertEqual(index.phones, {}, "empty entries are removed")
+        self.assertEqual(index.emails, {})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.flush_scheduler import FlushScheduler
+from clinic.dao.patient_dao_json import PatientDAOJSON
+
+class CountingDAO:
+
+    def __init__(self):
+        self.flushes = 0
+        # set by the first flush, so tests wait for the background thread instead of sleeping
+        self.flushed = threading.Event()
+
+    def flush(self):
+        self.flushes += 1
+        self.flushed.set()
+
+class FlushSchedulerTest(TestCase):
+
+    def test_changes_are_grouped(self):
+
+        scheduler = FlushScheduler(delay=0.05, max_changes=1000)
+        dao = CountingDAO()
+        for i in range(20):
+            scheduler.mark_dirty(dao)
+
+        self.assertEqual(dao.flushes, 0, "nothing is written right away")
+        self.assertTrue(dao.flushed.wait(10), "the changes are written after the delay")
+        self.assertEqual(dao.flushes, 1, "twenty changes are written with one flush")
+        self.assertEqual(scheduler.dirty, {}, "no other flush is waiting")
+
+    def test_max_changes(self):
+
+        scheduler = FlushScheduler(delay=60, max_changes=5)
+        dao = CountingDAO()
+        for i in range(5):
+            scheduler.mark_dirty(dao)
+
+        self.assertTrue(dao.flushed.wait(10), "reaching max_changes flushes without waiting for the delay")
+        self.assertEqual(dao.flushes, 1)
+
+    def test_flush_all(self):
+
+        scheduler = FlushScheduler(delay=60, max_changes=1000)
+        dao = CountingDAO()
+        scheduler.mark_dirty(dao)
+        scheduler.flush_all()
+        self.assertEqual(dao.flushes, 1)
+        scheduler.flush_all()
+        self.assertEqual(dao.flushes, 1, "a DAO without changes is not flushed again")
+
+    def test_patient_dao_flush(self):
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file = os.path.join(temp_dir, 'patients.json')
+            scheduler = FlushScheduler(delay=60, max_changes=1000)
+            dao = PatientDAOJSON(True, file=file, journal=True, scheduler=scheduler)
+            for i in range(3):
+                dao.create_patient(Patient(9790000000 + i, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+            self.assertFalse(os.path.exists(dao.journal_file), "changes wait for the scheduler")
+            scheduler.flush_all()
+            self.assertEqual(len(PatientDAOJSON(True, file=file, journal=True).list_patients()), 3, "every change is written by the flush")
+
+
+if __name__ == '__main__':
+    main()
@@ -741,5 +741,215 @@ class IntegrationTest(TestCase):
 		self.assertEqual(notes_list[1], expected_note_2, "note 2 is the second in the list of notes")
 
 
+	def test_iter_notes(self):
+		# cannot do operation without logging in
+		with self.assertRaises(IllegalAccessException, msg="cannot go through notes without logging in"):
+			self.controller.iter_notes()
+
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+
+		# cannot do operation without a valid current patient
+		with self.assertRaises(NoCurrentPatientException, msg="cannot go through notes without a valid current patient"):
+			self.controller.iter_notes()
+
+		self.controller.create_patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+		self.controller.set_current_patient(9792225555)
+		self.assertEqual(list(self.controller.iter_notes()), [], "no notes to go through")
+
+		for i in range(1, 26):
+			self.controller.create_note("Visit %d." % i)
+		self.controller.delete_note(20)
+		self.controller.delete_note(19)
+
+		# going through the notes a page at a time, newest first
+		first_page = list(self.controller.iter_notes(limit=10))
+		self.assertEqual([note.code for note in first_page], [25, 24, 23, 22, 21, 18, 17, 16, 15, 14])
+		second_page = list(self.controller.iter_notes(limit=10, before_code=first_page[-1].code))
+		self.assertEqual([note.code for note in second_page], [13, 12, 11, 10, 9, 8, 7, 6, 5, 4])
+		last_page = list(self.controller.iter_notes(limit=10, before_code=second_page[-1].code))
+		self.assertEqual([note.code for note in last_page], [3, 2, 1])
+
+		# a cursor far past the newest note starts from the newest note
+		self.assertEqual([note.code for note in self.controller.iter_notes(limit=2, before_code=10 ** 12)], [25, 24])
+
+		# the same notes as the list of notes
+		self.reset_persistence()
+		self.controller.set_current_patient(9792225555)
+		self.assertEqual(list(self.controller.iter_notes()), self.controller.list_notes())
+
+	def test_iter_patients(self):
+		# cannot do operation without logging in
+		with self.assertRaises(IllegalAccessException, msg="cannot go through patients without logging in"):
+			self.controller.iter_patients()
+		with self.assertRaises(IllegalAccessException, msg="cannot go through patients without logging in"):
+			self.controller.iter_retrieve_patients("Joe")
+
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+		self.assertEqual(list(self.controller.iter_patients()), [], "no patients to go through")
+
+		self.controller.create_patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+		self.controller.create_patient(9790012000, "John Doe", "2002-02-28", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.create_patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria")
+
+		# patients are given one at a time, in the same order as the list of patients
+		patients = self.controller.iter_patients()
+		self.assertEqual(next(patients).PHN, 9792225555, "the first patient is given before the rest are read")
+		self.assertEqual([patient.PHN for patient in patients], [9790012000, 9790014444])
+		self.assertEqual(list(self.controller.iter_retrieve_patients("Doe")), self.controller.retrieve_patients("Doe"))
+		self.assertEqual(list(self.controller.iter_retrieve_patients("Smith")), [])
+
+		self.reset_persistence()
+		self.assertEqual(list(self.controller.iter_patients()), self.controller.list_patients())
+
+	def test_retrieve_notes_regex(self):
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+		self.controller.create_patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+		self.controller.set_current_patient(9792225555)
+
+		self.controller.create_note("Patient comes with headache, BP 150/95.")
+		self.controller.create_note("Patient started on metformin 500mg.")
+		self.controller.create_note("BP 120/80, metformin continued.")
+		self.controller.create_note("Blood pressure not measured.")
+
+		self.assertEqual([note.code for note in self.controller.retrieve_notes(r"BP \d+/\d+", regex=True)], [1, 3])
+		self.assertEqual([note.code for note in self.controller.retrieve_notes(r"metfor\w*", regex=True)], [2, 3])
+		self.assertEqual([note.code for note in self.controller.retrieve_notes(r"(?i)bp|blood", regex=True)], [1, 3, 4])
+		self.assertEqual(self.controller.retrieve_notes(r"BP \d+/\d+"), [], "without regex the text is searched for as it is")
+		self.assertEqual([note.code for note in self.controller.retrieve_notes("met*min", wildcard=True)], [2, 3])
+		self.assertEqual([note.code for note in self.controller.retrieve_notes("BP 1?0/*", wildcard=True)], [1, 3])
+		self.assertEqual(self.controller.retrieve_notes("(BP", wildcard=True), [], "only * and ? are wildcards")
+		with self.assertRaises(IllegalOperationException, msg="the regular expression must be valid"):
+			self.controller.retrieve_notes("(", regex=True)
+		self.assertEqual(self.controller.retrieve_notes("("), [], "without regex any text can be searched for")
+
+		# notes changed after the first search are found
+		self.controller.update_note(4, "BP 135/85 after rest.")
+		self.controller.delete_note(1)
+		self.assertEqual([note.code for note in self.controller.retrieve_notes(r"BP \d+/\d+", regex=True)], [3, 4])
+
+	def test_find_patients_by_phone_and_email(self):
+		# cannot do operation without logging in
+		with self.assertRaises(IllegalAccessException, msg="cannot find patients without logging in"):
+			self.controller.find_patients_by_phone("250 203 1010")
+		with self.assertRaises(IllegalAccessException, msg="cannot find patients without logging in"):
+			self.controller.find_patients_by_email("john.doe@gmail.com")
+
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+		self.controller.create_patient(9790012000, "John Doe", "2002-02-28", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.create_patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria")
+
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_by_phone("(250) 203-1010")], [9790012000])
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_by_email("MARY.DOE@gmail.com")], [9790014444])
+		self.assertEqual(self.controller.find_patients_by_phone("278 999 4041"), [])
+
+		# the lookups follow updates and deletes
+		self.controller.update_patient(9790012000, 9790015555, "John Doe", "2002-02-28", "278 999 4041", "john.doe@hotmail.com", "300 Moss St, Victoria")
+		self.controller.delete_patient(9790014444)
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_by_phone("278 999 4041")], [9790015555])
+		self.assertEqual(self.controller.find_patients_by_phone("250 203 1010"), [])
+		self.assertEqual(self.controller.find_patients_by_email("mary.doe@gmail.com"), [])
+
+	def test_find_patients_by_birth_date(self):
+		# cannot do operation without logging in
+		with self.assertRaises(IllegalAccessException, msg="cannot find patients without logging in"):
+			self.controller.find_patients_born_between("1950-01-01", "1960-12-31")
+		with self.assertRaises(IllegalAccessException, msg="cannot find patients without logging in"):
+			self.controller.find_patients_turning(65, 2023, 13)
+
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+		with self.assertRaises(IllegalOperationException, msg="dates must be YYYY-MM-DD"):
+			self.controller.find_patients_born_between("01/01/1950", "1960-12-31")
+		with self.assertRaises(IllegalOperationException, msg="months go from 1 to 12"):
+			self.controller.find_patients_turning(65, 2023, 13)
+		with self.assertRaises(IllegalOperationException, msg="the birth year must be a year"):
+			self.controller.find_patients_turning(3000, 2023, 7)
+		with self.assertRaises(IllegalOperationException, msg="the birth year must be a year"):
+			self.controller.find_patients_turning(0, 2 ** 70, 7)
+
+		self.controller.create_patient(9790012000, "John Doe", "2002-02-28", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.create_patient(9790014444, "Mary Doe", "1958-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.create_patient(9792225555, "Joe Hancock", "1952-07-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_born_between("1950-01-01", "1960-12-31")], [9792225555, 9790014444])
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_turning(65, 2023, 7)], [9790014444])
+		self.assertEqual(self.controller.find_patients_turning(65, 2023, 8), [])
+
+		# the searches follow updates and deletes
+		self.controller.update_patient(9790012000, 9790015555, "John Doe", "1958-07-31", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.delete_patient(9790014444)
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_turning(65, 2023, 7)], [9790015555])
+		self.assertEqual([patient.PHN for patient in self.controller.find_patients_born_between("1950-01-01", "1960-12-31")], [9792225555, 9790015555])
+
+	def test_complete_patient_names(self):
+		# cannot do operation without logging in
+		with self.assertRaises(IllegalAccessException, msg="cannot complete names without logging in"):
+			self.controller.complete_patient_names("Jo")
+
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+		self.assertEqual(self.controller.complete_patient_names("Jo"), [], "no patients to complete")
+
+		self.controller.create_patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+		self.controller.create_patient(9790012000, "John Doe", "2002-02-28", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.create_patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria")
+
+		self.assertEqual(self.controller.complete_patient_names("jo"), ["Joe Hancock", "John Doe"])
+		self.assertEqual(self.controller.complete_patient_names("Doe"), ["John Doe", "Mary Doe"])
+		self.assertEqual(self.controller.complete_patient_names("Doe", limit=1), ["John Doe"])
+
+		# completions follow updates and deletes
+		self.controller.update_patient(9790012000, 9790015555, "Johnny Doe", "2002-02-28", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.delete_patient(9792225555)
+		self.assertEqual(self.controller.complete_patient_names("jo"), ["Johnny Doe"])
+
+	def test_search_all_notes(self):
+		# cannot do operation without logging in
+		with self.assertRaises(IllegalAccessException, msg="cannot search notes without logging in"):
+			self.controller.search_all_notes("warfarin")
+
+		self.assertTrue(self.controller.login("user", "123456"), "login correctly")
+		self.controller.create_patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+		self.controller.create_patient(9790012000, "John Doe", "2002-02-28", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria")
+		self.controller.create_patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria")
+
+		self.controller.set_current_patient(9792225555)
+		self.controller.create_note("Patient is taking warfarin.")
+		self.controller.create_note("Patient comes with headache.")
+		self.controller.create_note("Warfarin dose lowered, patient on warfarin 2mg.")
+		self.controller.set_current_patient(9790014444)
+		for i in range(1, 6):
+			self.controller.create_note("Visit %d, patient continues on warfarin." % i)
+		self.controller.unset_current_patient()
+
+		# a search does not need a current patient, and is given a page at a time
+		self.reset_persistence()
+		first_page = self.controller.search_all_notes("warfarin", limit=4)
+		self.assertEqual(first_page, [(9790014444, 1), (9790014444, 2), (9790014444, 3), (9790014444, 4)])
+		second_page = self.controller.search_all_notes("warfarin", limit=4, after=first_page[-1])
+		self.assertEqual(second_page, [(9790014444, 5), (9792225555, 1), (9792225555, 3)])
+		self.assertEqual(self.controller.search_all_notes("Warfarin dose"), [(9792225555, 3)], "notes are matched as retrieve_notes does")
+		self.assertEqual(self.controller.search_all_notes("aspirin"), [])
+		with self.assertRaises(IllegalOperationException, msg="a page has at least one note"):
+			self.controller.search_all_notes("warfarin", limit=0)
+
+		# the search follows changes to the notes
+		self.controller.set_current_patient(9790012000)
+		self.controller.create_note("Started on warfarin.")
+		self.controller.set_current_patient(9792225555)
+		self.controller.update_note(1, "Patient is taking aspirin.")
+		self.controller.delete_patient(9790014444)
+		self.assertEqual(self.controller.search_all_notes("warfarin"), [(9790012000, 1), (9792225555, 3)])
+		self.assertEqual(self.controller.search_all_notes("aspirin"), [(9792225555, 1)])
+
+		# a patient keeps their notes in the search when their PHN changes
+		self.controller.unset_current_patient()
+		self.controller.update_patient(9792225555, 9792226666, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich")
+		self.controller.set_current_patient(9792226666)
+		self.controller.create_note("Patient stopped warfarin.")
+		self.assertEqual(self.controller.search_all_notes("warfarin"), [(9790012000, 1), (9792226666, 3), (9792226666, 4)])
+
+		# a new controller has an index of its own
+		self.reset_persistence()
+		self.assertEqual(self.controller.search_all_notes("aspirin"), [])
+
 if __name__ == '__main__':
 	main()
\ No newline at end of file
@@ -0,0 +1,41 @@
+from unittest import TestCase
+from unittest import main
+from clinic.dao.name_prefix_index import NamePrefixIndex, name_suffixes
+
+NAMES = ["John Doe", "Mary Doe", "Joe Hancock", "Ann Doering", "Johanna  Smith", "Doe Jones"]
+
+class NamePrefixIndexTest(TestCase):
+
+    def test_name_suffixes(self):
+
+        self.assertEqual(name_suffixes("John Doe"), {"john doe", "doe"})
+        self.assertEqual(name_suffixes("Johanna  Smith"), {"johanna  smith", "smith"})
+        self.assertEqual(name_suffixes("Doe Doe"), {"doe doe", "doe"})
+
+    def test_complete(self):
+
+        index = NamePrefixIndex(NAMES)
+
+        self.assertEqual(index.complete("Jo"), ["Joe Hancock", "Johanna  Smith", "John Doe", "Doe Jones"], "ordered by the matching word")
+        self.assertEqual(index.complete("doe"), ["John Doe", "Mary Doe", "Doe Jones", "Ann Doering"], "shorter matches first")
+        self.assertEqual(index.complete("john d"), ["John Doe"])
+        self.assertEqual(index.complete("Jo", limit=2), ["Joe Hancock", "Johanna  Smith"])
+        self.assertEqual(index.complete("oe"), [], "only the starts of words are completed")
+        self.assertEqual(index.complete(" "), [])
+
+    def test_add_and_remove(self):
+
+        index = NamePrefixIndex(NAMES + ["John Doe"])
+
+        index.remove("John Doe")
+        self.assertEqual(index.complete("john"), ["John Doe"], "another patient still has the name")
+        index.remove("John Doe")
+        self.assertEqual(index.complete("john"), [])
+
+        index.add("Johnny Cash")
+        self.assertEqual(index.complete("joh"), ["Johanna  Smith", "Johnny Cash"])
+        self.assertEqual(index.complete("ca"), ["Johnny Cash"])
+
+
+if __name__ == '__main__':
+    main()
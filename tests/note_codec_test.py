@@ -0,0 +1,62 @@
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+from unittest import main
+from clinic.note import Note
+from clinic.dao.note_codec import encode_notes, decode_notes, parse_timestamp, format_timestamp, migrate_directory
+
+class NoteCodecTest(TestCase):
+
+    def test_round_trip(self):
+
+        notes = {
+            1: Note(1, "Patient comes with headache and high blood pressure."),
+            2: Note(2, "Paciente con cefalea — 頭痛"),
+            300: Note(300, "x" * 1000),
+        }
+        notes[2].timestamp = "09:05, 01, January, 1999"
+        notes[300].timestamp = "yesterday"
+
+        decoded, autocounter = decode_notes(encode_notes(notes, 301))
+        self.assertEqual(autocounter, 301)
+        self.assertEqual(list(decoded.values()), list(notes.values()))
+        self.assertEqual([note.timestamp for note in decoded.values()], [note.timestamp for note in notes.values()], "timestamps are kept exactly")
+
+        notes = {5: Note(5, "🙂 out of order"), 2: Note(2, "")}
+        self.assertEqual(list(decode_notes(encode_notes(notes, 5))[0].values()), list(notes.values()))
+        self.assertEqual(decode_notes(encode_notes({}, 7)), ({}, 7))
+
+    def test_timestamps(self):
+
+        self.assertEqual(parse_timestamp("00:00, 01, January, 1970"), 0)
+        self.assertEqual(format_timestamp(parse_timestamp("23:59, 29, February, 2024")), "23:59, 29, February, 2024")
+        self.assertIsNone(parse_timestamp("9:05, 01, January, 1999"), "a timestamp that would not come back the same is kept as text")
+
+    def test_smaller_than_pickle(self):
+
+        notes = {code: Note(code, "Patient comes with headache, visit %d." % code) for code in range(1, 1001)}
+        self.assertLess(len(encode_notes(notes, 1000)) * 2, len(pickle.dumps(notes)))
+
+    def test_not_a_notes_file(self):
+
+        with self.assertRaises(ValueError):
+            decode_notes(b'\x80\x04 not notes')
+
+    def test_migrate_directory(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            notes = {1: Note(1, "Patient comes with headache and high blood pressure."), 3: Note(3, "note")}
+            with open(os.path.join(directory, '9790012000.dat'), 'wb') as file:
+                pickle.dump(notes, file)
+
+            self.assertEqual(migrate_directory(directory, remove=True), 1)
+            self.assertEqual(os.listdir(directory), ['9790012000.notes'])
+            with open(os.path.join(directory, '9790012000.notes'), 'rb') as file:
+                decoded, autocounter = decode_notes(file.read())
+            self.assertEqual(list(decoded.values()), list(notes.values()))
+            self.assertEqual(autocounter, 3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import tempfile
+import zlib
+from unittest import TestCase
+from unittest import main
+from clinic import config
+from clinic.note import Note
+from clinic.dao import note_compression
+from clinic.dao.note_codec import encode_notes, decode_notes
+from clinic.dao.note_compression import DEFAULT_DICTIONARY, LazyNote, train_dictionary, dictionary_file
+from clinic.dao.note_dao_binary import NoteDAOBinary
+
+TEXTS = [
+    "Patient complains of headache for the last 3 days. BP 130/85 mmHg, follow up in two weeks.",
+    "Patient complains of back pain for the last 10 days. BP 120/80 mmHg, follow up in two weeks.",
+    "Patient says high BP is controlled, 120x80 in general.",
+]
+
+class NoteCompressionTest(TestCase):
+
+    def test_round_trip(self):
+
+        notes = {code: Note(code, text) for code, text in enumerate(TEXTS, 1)}
+        data = encode_notes(notes, 3, DEFAULT_DICTIONARY)
+        self.assertLess(len(data), len(encode_notes(notes, 3)))
+
+        decoded, autocounter = decode_notes(data)
+        self.assertIsInstance(decoded[1], LazyNote)
+        self.assertIsNone(decoded[1].plain_text, "texts are not decompressed when the notes are read")
+        self.assertEqual(list(decoded.values()), list(notes.values()))
+
+    def test_unread_notes_are_not_decompressed_again(self):
+
+        notes = decode_notes(encode_notes({1: Note(1, TEXTS[0]), 2: Note(2, TEXTS[1])}, 2, DEFAULT_DICTIONARY))[0]
+        notes[2].update_note("Patient comes with headache.")
+
+        decoded = decode_notes(encode_notes(notes, 2, DEFAULT_DICTIONARY))[0]
+        self.assertIsNone(notes[1].plain_text, "an unchanged note is written as it was read")
+        self.assertEqual([note.text for note in decoded.values()], [TEXTS[0], "Patient comes with headache."])
+
+    def test_trained_dictionary(self):
+
+        dictionary = train_dictionary(TEXTS * 10, size=256)
+        self.assertLessEqual(len(dictionary), 256)
+        self.assertIn(b"Patient complains of", dictionary)
+
+        checksum = zlib.adler32(dictionary)
+        data = encode_notes({1: Note(1, TEXTS[0])}, 1, dictionary)
+        with self.assertRaises(ValueError):
+            decode_notes(data)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(dictionary_file(checksum, directory), 'wb') as file:
+                file.write(dictionary)
+            note_compression.DICTIONARY_DIRECTORY, old_directory = directory, note_compression.DICTIONARY_DIRECTORY
+            try:
+                self.assertEqual(decode_notes(data)[0][1].text, TEXTS[0], "a trained dictionary is read from its file")
+            finally:
+                note_compression.DICTIONARY_DIRECTORY = old_directory
+                note_compression.dictionaries.pop(checksum, None)
+
+    def test_compressed_notes_file(self):
+
+        config.NOTE_COMPRESSION, old_compression = True, config.NOTE_COMPRESSION
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                dao = NoteDAOBinary(9790012000, True, records=directory)
+                for text in TEXTS:
+                    dao.create_note(text)
+
+                dao = NoteDAOBinary(9790012000, True, records=directory)
+                self.assertEqual([note.text for note in dao.list_notes()], TEXTS[::-1])
+        finally:
+            config.NOTE_COMPRESSION = old_compression
+
+
+if __name__ == '__main__':
+    main()
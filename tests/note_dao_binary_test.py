@@ -0,0 +1,49 @@
+import os
+from unittest import main
+from clinic.note import Note
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+from clinic.dao.note_dao_binary import NoteDAOBinary
+from tests.note_dao_test_case import NoteDAOTestCase
+
+class NoteDAOBinaryTest(NoteDAOTestCase):
+
+    dao_class = NoteDAOBinary
+
+    def test_notes_are_kept(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+        dao.delete_note(2)
+
+        timestamp = dao.search_note(1).timestamp
+        dao = self.make_dao()
+        self.assertEqual(dao.list_notes(), [Note(1, "Patient comes with headache and high blood pressure.")])
+        self.assertEqual(dao.search_note(1).timestamp, timestamp)
+        self.assertEqual(dao.create_note("note").code, 3, "the counter is saved with the notes")
+
+    def test_notes_from_pickle_are_moved(self):
+
+        pickle_dao = self.make_dao(dao_class=NoteDAOPickle)
+        pickle_dao.create_note("Patient comes with headache and high blood pressure.")
+
+        dao = self.make_dao()
+        self.assertEqual(dao.list_notes(), [Note(1, "Patient comes with headache and high blood pressure.")])
+        self.assertTrue(os.path.exists(dao.notes_file))
+
+        dao.drop_notes()
+        self.assertEqual(os.listdir(self.records), [], "dropping the notes removes both files")
+
+    def test_notes_with_a_deleted_note_are_moved(self):
+
+        pickle_dao = self.make_dao(dao_class=NoteDAOPickle)
+        for text in ("one", "two", "three"):
+            pickle_dao.create_note(text)
+        pickle_dao.delete_note(1)
+
+        self.assertEqual(self.make_dao().create_note("four").code, 4, "a new note does not take the code of a moved one")
+        self.assertEqual([note.text for note in self.make_dao().list_notes()], ["four", "three", "two"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import os
+from unittest import main
+from clinic.note import Note
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+from clinic.dao.note_dao_journal import NoteDAOJournal
+from tests.note_dao_test_case import NoteDAOTestCase
+
+class NoteDAOJournalTest(NoteDAOTestCase):
+
+    dao_class = NoteDAOJournal
+
+    def count_lines(self, dao):
+        with open(dao.journal_file) as file:
+            return len(file.readlines())
+
+    def test_replay(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+        dao.update_note(1, "Patient comes with headache.")
+        dao.delete_note(2)
+        self.assertEqual(self.count_lines(dao), 4, "each change is one line")
+
+        timestamp = dao.search_note(1).timestamp
+        dao = self.make_dao()
+        self.assertEqual(dao.list_notes(), [Note(1, "Patient comes with headache.")])
+        self.assertEqual(dao.search_note(1).timestamp, timestamp, "timestamps are kept")
+
+    def test_append_after_cut_off_change(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache.")
+
+        with open(dao.journal_file, 'a') as file:
+            file.write('{"op": "create", "code": 2, "te')
+
+        dao = self.make_dao()
+        dao.create_note("Patient has a fever.")
+
+        dao = self.make_dao()
+        self.assertEqual([note.text for note in dao.list_notes()], ["Patient has a fever.", "Patient comes with headache."], "the note after the cut off one is kept")
+
+    def test_counter_is_kept(self):
+
+        dao = self.make_dao()
+        for i in range(3):
+            dao.create_note("note %d" % i)
+        dao.delete_note(3)
+        dao.compact()
+
+        dao = self.make_dao()
+        self.assertEqual(dao.create_note("note").code, 4, "the code of a deleted note is not given again")
+
+    def test_compaction(self):
+
+        dao = self.make_dao()
+        dao.create_note("note")
+        for i in range(100):
+            dao.update_note(1, "note %d" % i)
+
+        self.assertLess(self.count_lines(dao), 40, "the journal is compacted")
+        self.assertEqual(self.make_dao().search_note(1).text, "note 99")
+
+    def test_notes_from_pickle_are_moved(self):
+
+        pickle_dao = self.make_dao(dao_class=NoteDAOPickle)
+        pickle_dao.create_note("Patient comes with headache and high blood pressure.")
+
+        dao = self.make_dao()
+        self.assertEqual(dao.list_notes(), [Note(1, "Patient comes with headache and high blood pressure.")])
+        self.assertTrue(os.path.exists(dao.journal_file), "the notes are written to the journal")
+
+    def test_notes_with_a_deleted_note_are_moved(self):
+
+        pickle_dao = self.make_dao(dao_class=NoteDAOPickle)
+        for text in ("one", "two", "three"):
+            pickle_dao.create_note(text)
+        pickle_dao.delete_note(1)
+
+        dao = self.make_dao()
+        self.assertEqual(dao.create_note("four").code, 4, "a new note does not take the code of a moved one")
+        self.assertEqual([note.text for note in self.make_dao().list_notes()], ["four", "three", "two"])
+
+    def test_drop_notes(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.drop_notes()
+
+        self.assertFalse(os.path.exists(dao.journal_file), "the journal is removed")
+        self.assertEqual(self.make_dao().list_notes(), [])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import os
+from unittest import skipUnless
+from unittest import main
+from clinic import config
+from clinic.note import Note
+from clinic.dao.note_codec import MappedNote, NoteTable, encode_indexed_notes, decode_notes
+from clinic.dao.note_dao_binary import NoteDAOBinary
+from clinic.dao.note_dao_mapped import NoteDAOMapped
+from tests.note_dao_test_case import NoteDAOTestCase
+
+class NoteDAOMappedTest(NoteDAOTestCase):
+
+    dao_class = NoteDAOMapped
+
+    def test_table(self):
+
+        notes = {code: Note(code, "note %d" % code) for code in range(1, 200, 3)}
+        notes[4].timestamp = "yesterday"
+        table = NoteTable(encode_indexed_notes(notes, 250))
+
+        self.assertEqual(table.autocounter, 250)
+        self.assertEqual(table.find(100), Note(100, "note 100"))
+        self.assertEqual(table.find(4).timestamp, "yesterday")
+        self.assertIsNone(table.find(5))
+        self.assertIsNone(table.find(500))
+        self.assertEqual(table.notes(), list(notes.values()))
+        self.assertEqual(decode_notes(encode_indexed_notes(notes, 250))[0], notes, "the indexed version can be decoded whole")
+
+    def test_reads_do_not_load_the_notes(self):
+
+        dao = self.make_dao()
+        for i in range(50):
+            dao.create_note("Patient comes with headache, visit %d." % i)
+
+        dao = self.make_dao()
+        note = dao.search_note(20)
+        self.assertIsInstance(note, MappedNote)
+        self.assertIsNone(note.plain_text, "the text is only decoded when it is used")
+        self.assertEqual(note.text, "Patient comes with headache, visit 19.")
+        self.assertFalse(dao.loaded, "the notes were read through the mapped file")
+        self.assertEqual(len(dao.list_notes()), 50)
+        self.assertEqual(dao.list_notes()[0].code, 50)
+        self.assertIsNone(dao.search_note(51))
+        self.assertEqual([note.code for note in dao.iter_notes(limit=3, before_code=20)], [19, 18, 17])
+        self.assertFalse(dao.loaded)
+
+    def count_open_files(self):
+        return len(os.listdir('/proc/self/fd'))
+
+    @skipUnless(os.path.isdir('/proc/self/fd'), "needs /proc to count open files")
+    def test_open_files_stay_bounded(self):
+
+        daos = []
+        for PHN in range(9790000000, 9790000300):
+            dao = self.make_dao(PHN)
+            dao.create_note("Patient comes with headache.")
+            dao.create_note("Patient says high BP is controlled.")
+            daos.append(self.make_dao(PHN))
+
+        open_files = self.count_open_files()
+        for dao in daos:
+            self.assertEqual(dao.search_note(2).text, "Patient says high BP is controlled.")
+            self.assertEqual(len(dao.list_notes()), 2)
+            self.assertEqual(len(list(dao.iter_notes())), 2)
+        self.assertLess(self.count_open_files() - open_files, 10, "reads of notes that are not loaded keep no file open")
+
+        for dao in daos:
+            dao.list_notes()
+            dao.load_notes()
+            dao.unload_notes()
+        self.assertLess(self.count_open_files() - open_files, 10, "unloaded notes keep no file open")
+
+    def test_changes(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+
+        dao = self.make_dao()
+        old_note = dao.search_note(1)
+        dao.update_note(2, "Patient comes with headache.")
+        dao.create_note("Patient says high BP is controlled, 120x80 in general.")
+        self.assertEqual(old_note.text, "Patient comes with headache and high blood pressure.", "a note read before a change stays readable")
+
+        dao = self.make_dao()
+        self.assertEqual([note.text for note in dao.list_notes()], [
+            "Patient says high BP is controlled, 120x80 in general.",
+            "Patient comes with headache.",
+            "Patient comes with headache and high blood pressure.",
+        ])
+        dao.delete_note(3)
+        self.assertEqual(self.make_dao().create_note("note").code, 4)
+
+    def test_notes_read_before_loading_are_kept(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+
+        dao = self.make_dao()
+        note = dao.search_note(1)
+        listed = dao.list_notes()
+        self.assertIs(listed[1], note, "a note is handed out once while the notes are not loaded")
+        dao.update_note(1, "Patient comes with headache.")
+        self.assertEqual(note.text, "Patient comes with headache.", "a note read before the notes were loaded sees the change")
+        self.assertIs(dao.search_note(1), note)
+
+        dao.unload_notes()
+        self.assertIs(dao.search_note(2), listed[0], "notes still in use are handed out again after the notes are dropped")
+
+    def test_file_is_not_mapped_while_written(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+
+        dao = self.make_dao()
+        dao.load_notes()
+        mapped = dao.table.data
+        dao.create_note("Patient says high BP is controlled, 120x80 in general.")
+        self.assertFalse(any(isinstance(note, MappedNote) and note.table is not None and note.table.data is mapped
+            for note in dao.notes.values()), "no note reads the replaced file")
+        self.assertEqual(dao.search_note(2).text, "Patient complains of a strong headache on the back of neck.")
+        self.assertEqual(self.make_dao().search_note(2).text, "Patient complains of a strong headache on the back of neck.")
+
+    def test_compressed(self):
+
+        config.NOTE_COMPRESSION, old_compression = True, config.NOTE_COMPRESSION
+        try:
+            dao = self.make_dao()
+            dao.create_note("Patient comes with headache and high blood pressure.")
+            dao.create_note("Patient complains of a strong headache on the back of neck.")
+            self.assertEqual(self.make_dao().search_note(2).text, "Patient complains of a strong headache on the back of neck.")
+        finally:
+            config.NOTE_COMPRESSION = old_compression
+
+    def test_binary_notes_are_read(self):
+
+        binary_dao = self.make_dao(dao_class=NoteDAOBinary)
+        binary_dao.create_note("Patient comes with headache and high blood pressure.")
+
+        dao = self.make_dao()
+        self.assertEqual(dao.list_notes(), [Note(1, "Patient comes with headache and high blood pressure.")])
+        dao.create_note("note")
+        self.assertIsNotNone(NoteTable.open(dao.notes_file), "the notes are written in the indexed version")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import os
+from unittest import main
+from clinic.note import Note
+from clinic.dao import note_pack
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+from clinic.dao.note_dao_pack import NoteDAOPack
+from tests.note_dao_test_case import NoteDAOTestCase
+
+class NoteDAOPackTest(NoteDAOTestCase):
+
+    dao_class = NoteDAOPack
+
+    def setUp(self):
+        super().setUp()
+        self.pack_file = os.path.join(self.records, 'notes.pack')
+
+    def tearDown(self):
+        pack = note_pack.packs.pop(self.pack_file, None)
+        if pack:
+            pack.close()
+        super().tearDown()
+
+    def reopen(self):
+        # forget the shared pack, like a new run of the program
+        note_pack.packs.pop(self.pack_file).close()
+
+    def test_patients_share_the_pack(self):
+
+        john = self.make_dao(9790012000)
+        mary = self.make_dao(9790014444)
+        john.create_note("Patient comes with headache and high blood pressure.")
+        mary.create_note("Patient complains of a strong headache on the back of neck.")
+        john.create_note("Patient says high BP is controlled, 120x80 in general.")
+        john.update_note(1, "Patient comes with headache.")
+        john.delete_note(2)
+
+        self.assertEqual(sorted(os.listdir(self.records)), ['notes.pack', 'notes.pack.idx'], "every note is in one pack")
+
+        self.reopen()
+        self.assertEqual(self.make_dao(9790012000).list_notes(), [Note(1, "Patient comes with headache.")])
+        self.assertEqual(self.make_dao(9790014444).list_notes(), [Note(1, "Patient complains of a strong headache on the back of neck.")])
+        self.assertEqual(self.make_dao(9790012000).create_note("note").code, 3, "the code of a deleted note is not given again")
+
+    def test_index_is_rebuilt(self):
+
+        dao = self.make_dao(9790012000)
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+        self.reopen()
+
+        with open(self.pack_file + '.idx', 'r+b') as file:
+            file.truncate(note_pack.ENTRY.size)
+        with open(self.pack_file, 'ab') as file:
+            file.write(b'\x40\x00\x00\x00{"op": "cre')
+
+        self.assertEqual(len(self.make_dao(9790012000).list_notes()), 2, "the index is rebuilt from the pack and the cut off record is dropped")
+        self.assertEqual(self.make_dao(9790012000).create_note("note").code, 3)
+        self.reopen()
+        self.assertEqual(len(self.make_dao(9790012000).list_notes()), 3)
+
+    def test_compaction(self):
+
+        pack = note_pack.get_pack(self.pack_file)
+        pack.compact_bytes = 0
+        dao = self.make_dao(9790012000)
+        dao.create_note("note")
+        dao.create_note("other note")
+        for i in range(20):
+            dao.update_note(1, "note %d" % i)
+        dao.delete_note(2)
+
+        self.assertLess(pack.pack_size - pack.live_bytes, pack.live_bytes + 200, "dead records are dropped")
+        self.reopen()
+        dao = self.make_dao(9790012000)
+        self.assertEqual(dao.list_notes(), [Note(1, "note 19")])
+        self.assertEqual(dao.create_note("note").code, 3, "the counter survives compaction")
+
+    def test_notes_from_pickle_are_moved(self):
+
+        pickle_dao = self.make_dao(dao_class=NoteDAOPickle)
+        pickle_dao.create_note("Patient comes with headache and high blood pressure.")
+
+        self.assertEqual(self.make_dao(9790012000).list_notes(), [Note(1, "Patient comes with headache and high blood pressure.")])
+        self.reopen()
+        os.remove(pickle_dao.file)
+        self.assertEqual(self.make_dao(9790012000).list_notes(), [Note(1, "Patient comes with headache and high blood pressure.")], "the notes are written to the pack")
+
+    def test_drop_notes(self):
+
+        john = self.make_dao(9790012000)
+        mary = self.make_dao(9790014444)
+        john.create_note("Patient comes with headache and high blood pressure.")
+        john.create_note("Patient says high BP is controlled, 120x80 in general.")
+        mary.create_note("Patient complains of a strong headache on the back of neck.")
+
+        pack_size = os.path.getsize(self.pack_file)
+        self.make_dao(9790012000).drop_notes()
+        self.assertLess(os.path.getsize(self.pack_file) - pack_size, 100, "one small record drops every note")
+
+        self.reopen()
+        self.assertEqual(self.make_dao(9790012000).list_notes(), [])
+        self.assertEqual(len(self.make_dao(9790014444).list_notes()), 1, "other patients keep their notes")
+
+        pack = note_pack.get_pack(self.pack_file)
+        pack.compact()
+        self.reopen()
+        self.assertEqual(self.make_dao(9790012000).list_notes(), [])
+        self.assertEqual(len(self.make_dao(9790014444).list_notes()), 1)
+
+
+if __name__ == '__main__':
+    main()
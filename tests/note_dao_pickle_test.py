@@ -0,0 +1,37 @@
+import os
+from unittest import main
+from clinic.note import Note
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+from tests.note_dao_test_case import NoteDAOTestCase
+
+class NoteDAOPickleTest(NoteDAOTestCase):
+
+    def test_notes_are_loaded_when_used(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+
+        dao = self.make_dao()
+        self.assertFalse(dao.loaded, "creating the DAO does not read the notes file")
+
+        self.assertEqual(dao.search_note(2), Note(2, "Patient complains of a strong headache on the back of neck."))
+        self.assertTrue(dao.loaded, "the notes file is read the first time a note is needed")
+
+        self.assertEqual(dao.create_note("Patient says high BP is controlled, 120x80 in general.").code, 3, "codes continue after the loaded notes")
+
+    def test_drop_notes(self):
+
+        dao = self.make_dao()
+        dao.create_note("Patient comes with headache and high blood pressure.")
+        dao.create_note("Patient complains of a strong headache on the back of neck.")
+
+        dao = self.make_dao()
+        self.assertTrue(dao.drop_notes())
+        self.assertFalse(os.path.exists(dao.file), "the notes file is removed")
+        self.assertEqual(dao.list_notes(), [])
+        self.assertEqual(self.make_dao().list_notes(), [])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import tempfile
+from unittest import TestCase
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+
+class NoteDAOTestCase(TestCase):
+
+    # the note DAO made by make_dao when no other class is given
+    dao_class = NoteDAOPickle
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.records = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_dao(self, PHN=9790012000, cache=None, dao_class=None):
+        return (dao_class or self.dao_class)(PHN, True, cache=cache, records=self.records)
@@ -0,0 +1,81 @@
+import random
+from unittest import TestCase
+from unittest import main
+from clinic.note import Note
+from clinic.dao.note_index import NoteIndex
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+
+TEXTS = [
+    "Patient comes with headache and high blood pressure.",
+    "Patient complains of a strong headache on the back of neck.",
+    "Patient is taking medicines to control blood pressure.",
+    "Patient feels general improvement and no more headaches.",
+    "Patient says high BP is controlled, 120x80 in general.",
+    "Headstrong patient, refuses metformin.",
+    "Straße closed, patient came late.",
+]
+
+SEARCHES = [
+    "headache", "Headache", "head", "ache", "headache and", "strong headache", " headache ",
+    "BP", "120x80", "x8", "0x80 in", "in general.", "general", ", ", ".", "", "e a",
+    "blood pressure", "pressure.", "metformin", "warfarin", "Straße", "ße cl", "no more headaches.",
+]
+
+class NoteIndexTest(TestCase):
+
+    def scan(self, dao, search_string):
+        return [note for note in dao.notes.values() if search_string in note.text]
+
+    def test_same_as_scan(self):
+
+        dao = NoteDAOPickle(9790012000)
+        for text in TEXTS:
+            dao.create_note(text)
+
+        for search_string in SEARCHES:
+            self.assertEqual(dao.retrieve_notes(search_string), self.scan(dao, search_string), search_string)
+
+    def test_kept_up_to_date(self):
+
+        dao = NoteDAOPickle(9790012000)
+        for text in TEXTS:
+            dao.create_note(text)
+        dao.retrieve_notes("headache")
+        self.assertIsNotNone(dao.text_index, "the index is built by the first search")
+
+        dao.update_note(1, "Patient comes with a fever.")
+        dao.delete_note(2)
+        dao.create_note("Patient has a headache again.")
+
+        self.assertEqual([note.code for note in dao.retrieve_notes("headache")], [4, 8])
+        self.assertEqual([note.code for note in dao.retrieve_notes("fever")], [1])
+        self.assertEqual(dao.retrieve_notes("strong headache"), [])
+
+    def test_random_searches(self):
+
+        generator = random.Random(7)
+        dao = NoteDAOPickle(9790012000)
+        for i in range(100):
+            dao.create_note(generator.choice(TEXTS) + " Visit %d." % i)
+
+        for i in range(300):
+            text = generator.choice(TEXTS)
+            start = generator.randrange(len(text))
+            search_string = text[start:start + generator.randint(1, 12)]
+            self.assertEqual(dao.retrieve_notes(search_string), self.scan(dao, search_string), search_string)
+
+    def test_candidates(self):
+
+        index = NoteIndex([Note(1, "Patient comes with headache."), Note(2, "Patient is fine.")])
+        self.assertEqual(index.candidates("headache"), {1})
+        self.assertEqual(index.candidates("Patient"), {1, 2})
+        self.assertEqual(index.candidates("migraine"), set())
+        self.assertIsNone(index.candidates(". "), "a search without words checks every note")
+
+        index.remove(1, "Patient comes with headache.")
+        self.assertEqual(index.candidates("headache"), set())
+        self.assertNotIn("headache", index.postings)
+
+
+if __name__ == '__main__':
+    main()
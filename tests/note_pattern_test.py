@@ -0,0 +1,100 @@
+import random
+import re
+from unittest import TestCase
+from unittest import main
+from clinic.dao.note_pattern import required_literals, required_trigrams, wildcard_pattern
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+
+TEXTS = [
+    "Patient comes with headache and high blood pressure, BP 150/95.",
+    "Patient complains of a strong headache on the back of neck.",
+    "Patient is taking metformin 500mg to control diabetes.",
+    "Patient says high BP is controlled, 120/80 in general.",
+    "Back pain since last visit, prescribed ibuprofen.",
+    "Follow up in two weeks.",
+]
+
+PATTERNS = [
+    r"BP \d+/\d+", r"metfor\w*", r"(head|back)ache", r"(?i)back", r"\bhigh\b", r"(?:blood )?pressure",
+    r"^Patient", r"weeks\.$", r"\d{3}", r"ache|pain", r"x?y*", r"[A-Z]ack", r"control(s|led)?", r"",
+]
+
+class NotePatternTest(TestCase):
+
+    def test_required_literals(self):
+
+        self.assertEqual(required_literals(r"BP \d+/\d+"), [["BP ", "/"]])
+        self.assertEqual(required_literals(r"metfor\w*"), [["metfor"]])
+        self.assertEqual(required_literals(r"(head|back)ache"), [["head", "ache"], ["back", "ache"]])
+        self.assertEqual(required_literals(r"\bfever\b"), [["fever"]])
+        self.assertEqual(required_literals(r"(?:blood )?pressure"), [["pressure"]])
+        self.assertEqual(required_literals(r"(?i)warfarin"), [[]], "a case insensitive pattern needs no exact string")
+        self.assertEqual(required_literals(r"ache|\d+"), [[]], "a branch that needs nothing lets anything match")
+
+    def test_required_trigrams(self):
+
+        self.assertEqual(required_trigrams(r"metfor\w*"), [{"met", "etf", "tfo", "for"}])
+        self.assertIsNone(required_trigrams(r"BP\d+"), "BP is too short to have a trigram")
+
+    def test_wildcard_pattern(self):
+
+        self.assertEqual(wildcard_pattern("metfor*"), r"metfor.*")
+        self.assertEqual(wildcard_pattern("BP 1?0/*"), r"BP\ 1.0/.*")
+        self.assertEqual(wildcard_pattern("(500mg)"), r"\(500mg\)", "everything but * and ? is matched as it is")
+        self.assertEqual(required_trigrams(wildcard_pattern("met*min")), [{"met", "min"}], "the index narrows wildcard searches down too")
+
+    def test_same_as_scan(self):
+
+        dao = NoteDAOPickle(9790012000)
+        for text in TEXTS:
+            dao.create_note(text)
+
+        for pattern in PATTERNS:
+            scanned = [note for note in dao.notes.values() if re.search(pattern, note.text)]
+            self.assertEqual(dao.retrieve_notes(pattern, regex=True), scanned, pattern)
+
+    def test_kept_up_to_date(self):
+
+        dao = NoteDAOPickle(9790012000)
+        for text in TEXTS:
+            dao.create_note(text)
+        dao.retrieve_notes(r"metfor\w*", regex=True)
+        self.assertIsNotNone(dao.pattern_index, "the index is built by the first search")
+
+        dao.update_note(2, "Patient switched from metformin to insulin.")
+        dao.delete_note(3)
+        dao.create_note("Metformin stopped.")
+
+        self.assertEqual([note.code for note in dao.retrieve_notes(r"metfor\w*", regex=True)], [2])
+        self.assertEqual([note.code for note in dao.retrieve_notes(r"[Mm]etformin", regex=True)], [2, 7])
+        self.assertEqual(dao.retrieve_notes(r"headache on", regex=True), [])
+
+    def test_random_patterns(self):
+
+        generator = random.Random(5)
+        dao = NoteDAOPickle(9790012000)
+        for i in range(100):
+            dao.create_note(generator.choice(TEXTS) + " Visit %d." % i)
+        for code in generator.sample(range(1, 101), 30):
+            dao.delete_note(code)
+
+        for i in range(100):
+            pattern = r"Visit %d\d?\." % generator.randrange(10)
+            scanned = [note for note in dao.notes.values() if re.search(pattern, note.text)]
+            self.assertEqual(dao.retrieve_notes(pattern, regex=True), scanned, pattern)
+
+    def test_prefilter_cost(self):
+
+        dao = NoteDAOPickle(9790012000)
+        for i in range(100):
+            dao.create_note("Patient is taking metformin, visit %d." % i)
+        dao.create_note("Patient started on warfarin.")
+        dao.retrieve_notes(r"warfarin\w*", regex=True)
+
+        self.assertLess(dao.prefilter_cost(required_trigrams(r"warfarin\w*")), len(dao.notes), "a rare string is found through the index")
+        self.assertGreaterEqual(dao.prefilter_cost(required_trigrams(r"metformin\w*")), len(dao.notes),
+            "intersecting the postings of a string in every note costs more than checking the notes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.patient_dao_json import PatientDAOJSON
+from clinic.dao.patient_index import PatientIndex, lookup_patient
+from clinic.dao.patient_encoder import PatientEncoder
+from clinic.dao.patient_stream import stream_patients
+from clinic.dao.patient_snapshot import read_snapshot
+
+class PatientDAOJSONTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, 'patients.json')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_dao(self, **kwargs):
+        return PatientDAOJSON(True, file=self.file, journal=True, **kwargs)
+
+    def test_journal_replay(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.update_patient(9790012000, Patient(9790015555, "John Doe", "2000-10-10", "278 999 4041", "john.doe@hotmail.com", "205 Foul Bay Rd, Oak Bay"))
+        dao.delete_patient(9790014444)
+
+        with open(self.file) as file:
+            self.assertEqual(file.read(), "{}", "the snapshot is not rewritten on every change")
+
+        dao = self.make_dao()
+        self.assertEqual(len(dao.list_patients()), 1, "replaying the journal leaves one patient")
+        self.assertIsNone(dao.search_patient(9790012000), "old PHN is gone after replay")
+        self.assertEqual(dao.search_patient(9790015555), Patient(9790015555, "John Doe", "2000-10-10", "278 999 4041", "john.doe@hotmail.com", "205 Foul Bay Rd, Oak Bay"))
+
+    def test_journal_ignores_cut_off_change(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        with open(dao.journal_file, 'a') as file:
+            file.write('{"op": "put", "patient": {"__type__": "Pat')
+
+        dao = self.make_dao()
+        self.assertEqual(len(dao.list_patients()), 1, "the cut off change is not applied")
+
+    def test_journal_appends_after_cut_off_change(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        with open(dao.journal_file, 'a') as file:
+            file.write('{"op": "put", "patient": {"__type__": "Pat')
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+
+        dao = self.make_dao()
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], [9790012000, 9790014444], "the change after the cut off one is kept")
+
+    def test_journal_compaction(self):
+
+        dao = self.make_dao(compact_threshold=500)
+        for i in range(10):
+            dao.create_patient(Patient(9790000000 + i, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        self.assertLessEqual(os.path.getsize(dao.journal_file) if os.path.exists(dao.journal_file) else 0, 500, "the journal is compacted when it grows too large")
+
+        dao = self.make_dao(compact_threshold=500)
+        self.assertEqual(len(dao.list_patients()), 10, "every patient survives compaction")
+
+    def test_journal_mode_turned_off(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+
+        dao = PatientDAOJSON(True, file=self.file)
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], [9790012000, 9790014444], "the journal is read without journal mode")
+        self.assertFalse(os.path.exists(dao.journal_file), "the journal is folded into the patients file")
+        dao.delete_patient(9790012000)
+
+        dao = self.make_dao()
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], [9790014444], "an old journal does not bring deleted patients back")
+
+    def test_index_lookup(self):
+
+        dao = PatientDAOJSON(True, file=self.file)
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.flush()
+
+        index = PatientIndex(dao.index_file, self.file)
+        self.assertTrue(index.is_valid())
+        self.assertIsNone(index.lookup(9790013000), "PHN that is not in the index")
+        self.assertEqual(index.read_patient(9790014444), Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        index.close()
+
+        with open(self.file, 'a') as file:
+            file.write(' ')
+        self.assertFalse(PatientIndex(dao.index_file, self.file).is_valid(), "index is stale once the patients file changes")
+        self.assertEqual(lookup_patient(9790012000, self.file).name, "John Doe", "lookup falls back to reading the whole file")
+
+    def test_index_lookup_with_journal(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.compact()
+        dao.update_patient(9790012000, Patient(9790012000, "John Doe", "2000-10-10", "278 999 4041", "john.doe@hotmail.com", "205 Foul Bay Rd, Oak Bay"))
+
+        self.assertEqual(lookup_patient(9790012000, self.file).phone, "278 999 4041", "changes in the journal are newer than the index")
+
+        dao.delete_patient(9790012000)
+        self.assertIsNone(lookup_patient(9790012000, self.file), "a patient deleted in the journal is not found")
+
+    def test_stream_patients(self):
+
+        patients = {9790000000 + i: Patient(9790000000 + i, "Jöhn Doe %d" % i, "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria") for i in range(50)}
+
+        for text in (json.dumps(patients, cls=PatientEncoder, indent=4), json.dumps(patients, cls=PatientEncoder)):
+            streamed = {int(key): patient for key, patient, position in stream_patients(io.StringIO(text), chunk_size=7)}
+            self.assertEqual(streamed, patients, "patients are streamed from small chunks")
+
+        self.assertEqual(list(stream_patients(io.StringIO(' { } '))), [], "no patients")
+        with self.assertRaises(json.JSONDecodeError):
+            list(stream_patients(io.StringIO('{"1": {"__type__": "Patient"')))
+
+    def test_load_progress(self):
+
+        dao = PatientDAOJSON(True, file=self.file)
+        for i in range(5):
+            dao.create_patient(Patient(9790000000 + i, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        # without the binary snapshot the patients file is streamed
+        self.assertFalse(os.path.exists(dao.snapshot_file), "the snapshot is written on flush, not with every change")
+        progress = []
+        dao = PatientDAOJSON(True, file=self.file, progress=lambda count, fraction: progress.append((count, fraction)))
+        self.assertEqual(len(dao.list_patients()), 5)
+        self.assertEqual([count for count, fraction in progress], [1, 2, 3, 4, 5, 5])
+        self.assertEqual(progress[-1][1], 1.0, "the whole file was read")
+
+    def test_snapshot(self):
+
+        dao = PatientDAOJSON(True, file=self.file)
+        for i in range(5):
+            dao.create_patient(Patient(9790000000 + i, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.flush()
+
+        self.assertEqual(read_snapshot(dao.snapshot_file, self.file), dao.list_patients(), "the snapshot matches the saved patients")
+        dao.create_patient(Patient(9790000005, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        self.assertIsNone(read_snapshot(dao.snapshot_file, self.file), "a change does not rewrite the snapshot")
+        self.assertEqual(len(PatientDAOJSON(True, file=self.file).list_patients()), 6, "the patients file is read instead")
+        dao.delete_patient(9790000005)
+        dao.flush()
+        self.assertEqual(PatientDAOJSON(True, file=self.file).list_patients(), dao.list_patients())
+
+        with open(dao.snapshot_file, 'r+b') as file:
+            file.seek(-1, os.SEEK_END)
+            last = file.read(1)
+            file.seek(-1, os.SEEK_END)
+            file.write(bytes([last[0] ^ 0xFF]))
+        self.assertIsNone(read_snapshot(dao.snapshot_file, self.file), "a snapshot with a bad checksum is not used")
+
+        dao.save_patients()
+        with open(self.file, 'a') as file:
+            file.write(' ')
+        self.assertIsNone(read_snapshot(dao.snapshot_file, self.file), "a snapshot is not used once the patients file changes")
+        self.assertEqual(len(PatientDAOJSON(True, file=self.file).list_patients()), 5, "patients are read from the patients file instead")
+
+    def test_retrieve_by_name_index(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "joe.hancock@gmail.com", "5000 Douglas St, Saanich"))
+
+        self.assertEqual([patient.PHN for patient in dao.retrieve_patients("Doe")], [9790012000, 9790014444])
+        self.assertIsNotNone(dao.name_index, "the index is built by the first search")
+
+        dao.create_patient(Patient(9791234567, "Ann Doering", "1980-05-05", "250 999 1234", "ann@gmail.com", "1 Main St, Victoria"))
+        dao.update_patient(9790014444, Patient(9790014444, "Mary Smith", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.update_patient(9790012000, Patient(9790015555, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.delete_patient(9792225555)
+
+        for name in ["Doe", "Smith", "Hancock", "Jo", "o", "", "n Do"]:
+            scanned = [patient for patient in dao.patients.values() if name in patient.name]
+            self.assertEqual(dao.retrieve_patients(name), scanned, name)
+        self.assertEqual([patient.PHN for patient in dao.retrieve_patients("Doe")], [9791234567, 9790015555])
+
+    def test_common_name_scanned(self):
+
+        dao = self.make_dao()
+        for i in range(320):
+            name = "Ann Smith" if i % 10 == 0 else "Ann Doe %d" % i
+            dao.create_patient(Patient(9790000000 + i, name, "2000-10-10", "", "", ""))
+
+        self.assertEqual(len(dao.name_candidates("Doe 17")), 10, "a rare name is found through the index")
+        self.assertIs(type(dao.name_candidates("Smith")), type(dao.patients.values()),
+            "a name of more than one patient in sixteen is found by checking every patient")
+        self.assertEqual(len(dao.retrieve_patients("Smith")), 32)
+        self.assertEqual(list(dao.iter_retrieve_patients("Smith")), dao.retrieve_patients("Smith"))
+
+    def test_find_by_phone_and_email(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+
+        self.assertEqual([patient.PHN for patient in dao.find_patients_by_phone("(250) 203-1010")], [9790012000])
+        self.assertIsNotNone(dao.contact_index, "the index is built by the first lookup")
+
+        dao.create_patient(Patient(9792225555, "Joe Hancock", "1990-01-15", "250 203 1010", "joe.hancock@gmail.com", "5000 Douglas St, Saanich"))
+        dao.update_patient(9790014444, Patient(9790014444, "Mary Doe", "1995-07-01", "278 999 4041", "Mary.Doe@Hotmail.com", "300 Moss St, Victoria"))
+        dao.update_patient(9790012000, Patient(9790015555, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        self.assertEqual([patient.PHN for patient in dao.find_patients_by_phone("250 203 1010")], [9792225555, 9790015555])
+        self.assertEqual(dao.find_patients_by_phone("250 203 2020"), [])
+        self.assertEqual([patient.PHN for patient in dao.find_patients_by_email("mary.doe@hotmail.com")], [9790014444])
+        self.assertEqual(dao.find_patients_by_email("mary.doe@gmail.com"), [])
+
+        dao.delete_patient(9790015555)
+        self.assertEqual([patient.PHN for patient in dao.find_patients_by_phone("250 203 1010")], [9792225555])
+        self.assertEqual(dao.find_patients_by_email("john.doe@gmail.com"), [])
+
+    def test_complete_names(self):
+
+        dao = self.make_dao()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+
+        self.assertEqual(dao.complete_names("jo"), ["John Doe"])
+        self.assertIsNotNone(dao.prefix_index, "the index is built by the first completion")
+
+        dao.create_patient(Patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "joe.hancock@gmail.com", "5000 Douglas St, Saanich"))
+        dao.update_patient(9790014444, Patient(9790014444, "Mary Jones", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.update_patient(9790012000, Patient(9790015555, "Johnny Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        self.assertEqual(dao.complete_names("jo"), ["Joe Hancock", "Johnny Doe", "Mary Jones"])
+        self.assertEqual(dao.complete_names("doe"), ["Johnny Doe"])
+
+        dao.delete_patient(9792225555)
+        self.assertEqual(dao.complete_names("jo"), ["Johnny Doe", "Mary Jones"])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.patient_dao_json import PatientDAOJSON
+from clinic.dao.patient_dao_sharded import PatientDAOSharded, reshard
+
+class PatientDAOShardedTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, 'patients.json')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_patients(self, dao, count):
+        for i in range(count):
+            dao.create_patient(Patient(9790000000 + i, "Patient %d" % i, "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+    def test_change_writes_one_shard(self):
+
+        dao = PatientDAOSharded(True, file=self.file, shards=4)
+        self.create_patients(dao, 20)
+
+        written = []
+        save_shard = dao.save_shard
+        dao.save_shard = lambda shard: written.append(shard) or save_shard(shard)
+        dao.update_patient(9790000003, Patient(9790000003, "Patient 3", "2000-10-10", "278 999 4041", "john.doe@hotmail.com", "205 Foul Bay Rd, Oak Bay"))
+
+        self.assertEqual(written, [dao.shard_of(9790000003)], "only the shard of the patient is written")
+
+    def test_persistence_keeps_order(self):
+
+        dao = PatientDAOSharded(True, file=self.file, shards=4)
+        self.create_patients(dao, 20)
+        dao.update_patient(9790000000, Patient(9790000100, "Patient 0", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.delete_patient(9790000005)
+
+        expected = [patient.PHN for patient in dao.list_patients()]
+        dao = PatientDAOSharded(True, file=self.file, shards=4)
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], expected, "patients are listed in the same order after loading the shards")
+        self.assertEqual(expected[-1], 9790000100, "a patient with a new PHN moves to the end")
+
+    def test_move_into_shards_and_reshard(self):
+
+        dao = PatientDAOJSON(True, file=self.file)
+        self.create_patients(dao, 10)
+
+        dao = PatientDAOSharded(True, file=self.file, shards=2)
+        self.assertEqual(len(dao.list_patients()), 10, "patients from the single patients file are moved into shards")
+
+        old_files = dao.shard_files()
+        dao = reshard(5, file=self.file)
+        self.assertFalse(any(os.path.exists(old_file) for old_file in old_files), "old shards are removed")
+
+        dao = PatientDAOSharded(True, file=self.file, shards=2)
+        self.assertEqual(dao.shard_count, 5, "the manifest decides the number of shards")
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], [9790000000 + i for i in range(10)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import gc
+import os
+import tempfile
+from unittest import TestCase
+from unittest import main
+from clinic.patient import Patient
+from clinic.dao.patient_dao_sqlite import PatientDAOSQLite
+from clinic.dao.patient_dao_json import PatientDAOJSON
+from clinic.exception.illegal_operation_exception import IllegalOperationException
+
+class PatientDAOSQLiteTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, 'patients.db')
+        self.json_file = os.path.join(self.temp_dir.name, 'patients.json')
+        self.dao = PatientDAOSQLite(True, file=self.file, json_file=self.json_file)
+        self.dao.create_patient(Patient(9798884444, "Ali Mesbah", "1980-03-03", "250 301 6060", "mesbah.ali@gmail.com", "500 Fairfield Rd, Victoria"))
+        self.dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        self.dao.create_patient(Patient(9790014444, "Mary Doe", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+
+    def tearDown(self):
+        self.dao.connection.close()
+        self.temp_dir.cleanup()
+
+    def test_persistence(self):
+
+        dao = PatientDAOSQLite(True, file=self.file)
+        self.assertEqual(dao.search_patient(9790012000), Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], [9798884444, 9790012000, 9790014444], "patients keep the order they were added in")
+        dao.connection.close()
+
+    def test_patients_from_json_are_imported(self):
+
+        json_dao = PatientDAOJSON(True, file=self.json_file)
+        json_dao.create_patient(Patient(9792225555, "Joe Hancock", "1990-01-15", "278 456 7890", "john.hancock@outlook.com", "5000 Douglas St, Saanich"))
+        json_dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        file = os.path.join(self.temp_dir.name, 'imported.db')
+        dao = PatientDAOSQLite(True, file=file, json_file=self.json_file)
+        self.assertEqual(dao.list_patients(), json_dao.list_patients(), "a new database starts with the patients of patients.json")
+        dao.delete_patient(9790012000)
+        dao.connection.close()
+
+        dao = PatientDAOSQLite(True, file=file, json_file=self.json_file)
+        self.assertEqual([patient.PHN for patient in dao.list_patients()], [9792225555], "patients are only imported into a new database")
+        dao.connection.close()
+
+    def test_durability(self):
+
+        self.assertEqual(self.dao.connection.execute('PRAGMA synchronous').fetchone()[0], 1, "NORMAL by default")
+        dao = PatientDAOSQLite(True, file=self.file, json_file=self.json_file, durability='commit')
+        self.assertEqual(dao.connection.execute('PRAGMA synchronous').fetchone()[0], 2, "every transaction is synced in commit mode")
+        dao.connection.close()
+
+    def test_retrieve_patients(self):
+
+        self.assertEqual([patient.name for patient in self.dao.retrieve_patients("Doe")], ["John Doe", "Mary Doe"])
+        self.assertEqual(self.dao.retrieve_patients("doe"), [], "name search is case sensitive")
+        self.assertEqual(self.dao.retrieve_patients("%"), [], "name search has no wildcards")
+
+    def test_update_patient(self):
+
+        with self.assertRaises(IllegalOperationException):
+            self.dao.update_patient(9790012000, Patient(9790014444, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+
+        patient = self.dao.search_patient(9790012000)
+        self.assertTrue(self.dao.update_patient(9790012000, Patient(9790015555, "John Doe", "2000-10-10", "278 999 4041", "john.doe@hotmail.com", "205 Foul Bay Rd, Oak Bay")))
+        self.assertIsNone(self.dao.search_patient(9790012000))
+        self.assertIs(self.dao.search_patient(9790015555), patient, "the patient in use is updated in place")
+        self.assertEqual(self.dao.list_patients()[-1].PHN, 9790015555, "a patient with a new PHN moves to the end")
+
+    def test_delete_patient(self):
+
+        self.assertTrue(self.dao.delete_patient(9790012000))
+        self.assertIsNone(self.dao.search_patient(9790012000))
+        self.assertEqual(len(self.dao.list_patients()), 2)
+
+    def test_complete_names(self):
+
+        self.assertEqual(self.dao.complete_names("do"), ["John Doe", "Mary Doe"])
+        self.assertIsNotNone(self.dao.prefix_index, "the index is built by the first completion")
+
+        self.dao.create_patient(Patient(9791234567, "Ann Doering", "1980-05-05", "250 999 1234", "ann@gmail.com", "1 Main St, Victoria"))
+        self.dao.update_patient(9790014444, Patient(9790014444, "Mary Smith", "1995-07-01", "250 203 2020", "mary.doe@gmail.com", "300 Moss St, Victoria"))
+        self.dao.delete_patient(9790012000)
+        self.assertEqual(self.dao.complete_names("do"), ["Ann Doering"])
+        self.assertEqual(self.dao.complete_names("m"), ["Mary Smith", "Ali Mesbah"], "names are ordered by the part that matched")
+
+    def test_notes_dao_kept_while_in_use(self):
+
+        # the flush scheduler or the record cache can keep a note DAO after the patient is no longer used
+        notes_dao = self.dao.search_patient(9790012000).patient_record.notes_dao
+        gc.collect()
+        self.assertIs(self.dao.search_patient(9790012000).patient_record.notes_dao, notes_dao,
+            "a patient made again has the note DAO with the changes that are not written yet")
+
+    def test_notes_kept_without_autosave(self):
+
+        dao = PatientDAOSQLite()
+        dao.create_patient(Patient(9790012000, "John Doe", "2000-10-10", "250 203 1010", "john.doe@gmail.com", "300 Moss St, Victoria"))
+        dao.search_patient(9790012000).create_note("Patient comes with headache.")
+        gc.collect()
+        self.assertEqual(len(dao.search_patient(9790012000).list_notes()), 1, "the notes are only in memory, so the patient is kept")
+        dao.connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest import main
+from clinic.dao import persistence
+
+class PersistenceTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, 'patients.json')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_file(self):
+
+        for durability in persistence.DURABILITY_MODES:
+            persistence.write_file(self.file, durability.encode(), durability)
+            with open(self.file, 'rb') as file:
+                self.assertEqual(file.read(), durability.encode(), "file is written in %s mode" % durability)
+
+        self.assertEqual(os.listdir(self.temp_dir.name), ['patients.json'], "no temporary file is left behind")
+
+    def test_failed_write_keeps_old_file(self):
+
+        persistence.write_file(self.file, b'old', persistence.NONE)
+        with self.assertRaises(TypeError):
+            persistence.write_file(self.file, 'not bytes', persistence.NONE)
+
+        with open(self.file, 'rb') as file:
+            self.assertEqual(file.read(), b'old', "a write that fails leaves the old file")
+        self.assertEqual(os.listdir(self.temp_dir.name), ['patients.json'])
+
+    def test_append_file(self):
+
+        persistence.append_file(self.file, b'one\n', persistence.COMMIT)
+        persistence.append_file(self.file, b'two\n', persistence.BATCHED)
+        with open(self.file, 'rb') as file:
+            self.assertEqual(file.read(), b'one\ntwo\n')
+
+    def test_batched_sync(self):
+
+        persistence.write_file(self.file, b'data', persistence.BATCHED)
+        persistence.sync()
+        self.assertEqual(persistence.unsynced_files, set(), "sync fsyncs every waiting file")
+
+    def test_unknown_mode(self):
+
+        with self.assertRaises(ValueError):
+            persistence.write_file(self.file, b'data', 'sometimes')
+
+
+if __name__ == '__main__':
+    main()
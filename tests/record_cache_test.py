@@ -0,0 +1,73 @@
+from unittest import main
+from clinic.note import Note
+from clinic.dao.record_cache import RecordCache
+from clinic.dao.note_dao_pickle import NoteDAOPickle
+from clinic.dao.note_dao_journal import NoteDAOJournal
+from tests.note_dao_test_case import NoteDAOTestCase
+
+class RecordCacheTest(NoteDAOTestCase):
+
+    def test_least_recently_used_is_evicted(self):
+
+        cache = RecordCache(max_records=2)
+        john = self.make_dao(9790012000, cache)
+        mary = self.make_dao(9790014444, cache)
+        joe = self.make_dao(9792225555, cache)
+
+        john.create_note("Patient comes with headache and high blood pressure.")
+        mary.create_note("Patient complains of a strong headache on the back of neck.")
+        john.list_notes()
+        joe.create_note("Patient says high BP is controlled, 120x80 in general.")
+
+        self.assertTrue(john.loaded)
+        self.assertFalse(mary.loaded, "the least recently used notes are dropped")
+        self.assertTrue(joe.loaded)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 3, 'evictions': 1, 'records': 2, 'bytes': 106})
+
+        self.assertEqual(mary.list_notes(), [Note(1, "Patient complains of a strong headache on the back of neck.")], "evicted notes are read again")
+        self.assertEqual(mary.create_note("note").code, 2)
+        self.assertFalse(john.loaded)
+        self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_counter_kept_when_evicted(self):
+
+        cache = RecordCache(max_records=1)
+        john = self.make_dao(9790012000, cache)
+        mary = self.make_dao(9790014444, cache)
+
+        for text in ("one", "two", "three"):
+            john.create_note(text)
+        john.delete_note(1)
+        mary.list_notes()
+        self.assertFalse(john.loaded)
+
+        self.assertEqual(john.create_note("four").code, 4, "a new note does not take the code of a note that is still there")
+        self.assertEqual([note.text for note in john.list_notes()], ["four", "three", "two"])
+
+        john.delete_note(4)
+        mary.list_notes()
+        self.assertEqual(john.create_note("five").code, 5, "the code of a deleted note is not given again in the same run")
+
+    def test_byte_limit(self):
+
+        cache = RecordCache(max_bytes=100)
+        john = self.make_dao(9790012000, cache, NoteDAOJournal)
+        mary = self.make_dao(9790014444, cache, NoteDAOJournal)
+
+        john.create_note("x" * 60)
+        mary.create_note("y" * 30)
+        self.assertTrue(john.loaded)
+
+        mary.update_note(1, "y" * 50)
+        self.assertFalse(john.loaded, "growing notes evict other patients")
+        self.assertEqual(cache.stats()['bytes'], 50)
+
+        mary.create_note("y" * 200)
+        self.assertTrue(mary.loaded, "the most recently used patient is always kept")
+
+        self.assertEqual(john.search_note(1).text, "x" * 60)
+        self.assertEqual(john.create_note("note").code, 2)
+
+
+if __name__ == '__main__':
+    main()
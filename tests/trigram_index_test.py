@@ -0,0 +1,62 @@
+import random
+from unittest import TestCase
+from unittest import main
+from clinic.dao.trigram_index import TrigramIndex, trigrams
+
+NAMES = ["John Doe", "Mary Doe", "Joe Hancock", "Ann Doering", "Jo", "Johanna Smith", "Doeson Jo"]
+
+class TrigramIndexTest(TestCase):
+
+    def scan(self, names, search_string):
+        return [key for key, name in names.items() if search_string in name]
+
+    def test_trigrams(self):
+
+        self.assertEqual(trigrams("John"), {"Joh", "ohn"})
+        self.assertEqual(trigrams("Jo"), set())
+
+    def test_candidates(self):
+
+        index = TrigramIndex(enumerate(NAMES))
+
+        self.assertEqual(index.candidates("Doe"), [0, 1, 3, 6])
+        self.assertEqual(index.candidates("ohn Do"), [0])
+        self.assertEqual(index.candidates("Smythe"), [])
+        self.assertIsNone(index.candidates("Jo"), "too short to have a trigram")
+        self.assertIsNone(index.candidates("Doe", common=3), "in too many texts to be worth intersecting")
+        self.assertEqual(index.count({"Doe", "Mar"}), 1)
+        self.assertEqual(index.cost({"Doe", "Mar"}), 2)
+
+    def test_kept_in_order(self):
+
+        index = TrigramIndex(enumerate(NAMES))
+        index.update(0, "John Doe", "John Smith")
+        index.remove(1, "Mary Doe")
+        index.add(7, "Mary Doe")
+
+        self.assertEqual(index.candidates("Doe"), [3, 6, 7])
+        self.assertEqual(index.candidates("Smith"), [0, 5], "an updated name keeps its place")
+        self.assertEqual(index.candidates("ohn Do"), [])
+
+    def test_random_searches(self):
+
+        generator = random.Random(3)
+        names = {key: name for key, name in enumerate(NAMES)}
+        index = TrigramIndex(names.items())
+
+        for key in range(len(NAMES), 200):
+            names[key] = ' '.join(generator.choice(NAMES).split()[::-1])
+            index.add(key, names[key])
+        for key in generator.sample(sorted(names), 50):
+            index.remove(key, names.pop(key))
+
+        for i in range(200):
+            name = generator.choice([name for name in names.values() if len(name) >= 3])
+            start = generator.randrange(len(name) - 2)
+            search_string = name[start:start + generator.randrange(3, 8)]
+            candidates = [key for key in index.candidates(search_string) if search_string in names[key]]
+            self.assertEqual(candidates, self.scan(names, search_string), search_string)
+
+
+if __name__ == '__main__':
+    main()